@@ -11,6 +11,7 @@ from .data_processor.processor import DataProcessor
 from .data_processor.analyzer import DataAnalyzer
 from .data_processor.async_processor import AsyncDataProcessor
 from .data_processor.base import DataProcessorBase, ProcessedData
+from .data_processor.chunker import TextChunker
 
 from .vector_store.factory import VectorStoreFactory
 from .vector_store.base import VectorStoreBase
@@ -33,6 +34,7 @@ __all__ = [
     "AsyncDataProcessor",
     "DataProcessorBase",
     "ProcessedData",
+    "TextChunker",
     
     # Vector Store
     "VectorStoreFactory",
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+ANN 索引压测
+在聚类分布的合成向量上对比暴力检索、IVF-Flat（不同 nprobe）与 HNSW（已安装 hnswlib 时）的
+recall@k 与单次查询延迟
+
+用法: python ame/benchmarks/bench_ann.py [--rows 200000] [--dim 256] [--queries 200]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.vector_store.embedding_buffer import EmbeddingBuffer
+from ame.vector_store.ann import IVFFlatIndex, create_ann_index
+
+
+def make_data(rows: int, dim: int, clusters: int, queries: int, seed: int = 0):
+    """生成聚类分布的归一化向量"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, rows + queries)
+    x = centers[labels] + 1.5 * rng.standard_normal((rows + queries, dim)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x[:rows], x[rows:]
+
+
+def exact_topk(data: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = data @ query
+    return np.argsort(scores)[::-1][:k]
+
+
+def rescore(data: np.ndarray, candidates: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = data[candidates] @ query
+    return candidates[np.argsort(scores)[::-1][:k]]
+
+
+def measure(name, data, queries, truth, k, search):
+    hits = 0
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = search(query)
+        hits += len(np.intersect1d(found, expected))
+    elapsed = time.perf_counter() - start
+    recall = hits / (len(queries) * k)
+    print(f"{name:<28}{recall:>10.3f}{elapsed / len(queries) * 1000:>14.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    data, queries = make_data(args.rows, args.dim, args.clusters, args.queries)
+    buffer = EmbeddingBuffer(args.dim)
+    buffer.append(data)
+    truth = [exact_topk(data, q, args.k) for q in queries]
+
+    print(f"rows={args.rows} dim={args.dim} k={args.k}")
+    print(f"{'index':<28}{'recall@k':>10}{'ms/query':>14}")
+
+    measure("flat", data, queries, truth, args.k, lambda q: exact_topk(data, q, args.k))
+
+    start = time.perf_counter()
+    ivf = IVFFlatIndex(args.dim)
+    ivf.reset(buffer)
+    print(f"(ivf build {time.perf_counter() - start:.1f}s, nlist={len(ivf.centroids)})")
+    for nprobe in (1, 4, 8, 16, 32):
+        ivf.nprobe = nprobe
+        measure(
+            f"ivf nprobe={nprobe}", data, queries, truth, args.k,
+            lambda q: rescore(data, ivf.search(q, args.k), q, args.k)
+        )
+
+    try:
+        start = time.perf_counter()
+        hnsw = create_ann_index("hnsw", args.dim)
+        hnsw.reset(buffer)
+        print(f"(hnsw build {time.perf_counter() - start:.1f}s)")
+    except ImportError:
+        print("hnswlib not installed, skipping hnsw")
+        return
+    for ef in (32, 64, 128):
+        hnsw.ef_search = ef
+        measure(
+            f"hnsw ef={ef}", data, queries, truth, args.k,
+            lambda q: rescore(data, hnsw.search(q, args.k), q, args.k)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+文本分块压测
+1. 吞吐：旧版按空行切段落 与 TextChunker（句子边界 + token 滑动窗口）的 MB/s
+2. 检索召回：在超长段落与过短段落中埋入事实，分别按两种方式切分后写入 MemuVectorStore（本地哈希向量），
+   统计 top-k 结果中包含该事实的查询比例
+
+用法: python ame/benchmarks/bench_chunking.py [--mb 20] [--docs 100] [--chunk-size 500] [--overlap 50]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.data_processor.chunker import TextChunker
+from ame.data_processor.processor import DataProcessor
+from ame.vector_store.memu_store import MemuVectorStore
+from ame.vector_store.embedding import estimate_tokens
+
+CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严"
+CHAR_ARRAY = np.array(list(CHARS))
+# 事实中的名称只用这些字（不出现在填充文本中）
+NAME_CHARS = [c for c in "赵钱孙李吴郑冯陈褚卫蒋沈韩杨朱秦尤吕施孔曹魏陶姜戚谢邹喻柏窦章苏潘葛奚范彭郎鲁韦昌苗凤俞任袁柳鲍唐薛雷贺倪汤滕殷罗毕郝邬伏顾孟黄穆萧尹姚邵湛汪祁狄贝臧伍余卜庞熊纪舒屈项祝董梁杜阮蓝闵席麻贾娄危童颜郭梅盛钟邱骆" if c not in CHARS]
+CITIES = ["北京", "上海", "广州", "深圳", "成都", "杭州", "武汉", "西安", "南京", "重庆"]
+
+
+def make_name(rng) -> str:
+    return "".join(rng.choice(NAME_CHARS, size=3))
+
+
+def make_sentence(rng) -> str:
+    return "".join(rng.choice(CHAR_ARRAY, size=int(rng.integers(8, 30)))) + str(rng.choice(["。", "！", "？", "；"]))
+
+
+def make_paragraph(rng, sentences: int) -> str:
+    return "".join(make_sentence(rng) for _ in range(sentences))
+
+
+def make_corpus(mb: float, rng) -> str:
+    """混合超长段落与普通段落的文本（约 mb MB）"""
+    paragraphs = []
+    size = 0
+    while size < mb * 1024 * 1024:
+        sentences = int(rng.integers(200, 400)) if rng.random() < 0.1 else int(rng.integers(1, 8))
+        paragraph = make_paragraph(rng, sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph.encode("utf-8"))
+    return "\n\n".join(paragraphs)
+
+
+def bench_throughput(text: str, chunker: TextChunker, repeat: int = 3) -> None:
+    processor = DataProcessor()
+    size_mb = len(text.encode("utf-8")) / 1024 / 1024
+    paragraphs = processor._split_into_paragraphs(text)
+
+    def run_legacy():
+        return processor._split_into_paragraphs(text)
+
+    def run_chunker():
+        return list(chunker.iter_chunks(paragraphs))
+
+    print(f"吞吐（{size_mb:.1f} MB 文本，取 {repeat} 次最优）\n")
+    print(f"{'方式':<20}{'MB/s':>10}{'单元数':>10}{'平均 tokens':>14}{'最大 tokens':>14}")
+    for label, func in (("按空行切段落", run_legacy), ("TextChunker", run_chunker)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            units = func()
+            best = min(best, time.perf_counter() - start)
+        tokens = [estimate_tokens(unit) for unit in units]
+        print(f"{label:<20}{size_mb / best:>10.1f}{len(units):>10}{np.mean(tokens):>14.0f}{max(tokens):>14}")
+
+
+def make_recall_corpus(docs: int, rng):
+    """
+    每篇文档：一个超长段落（中间埋入 3 条事实）+ 若干普通段落 + 1 条过短的事实行
+
+    Returns:
+        (段落列表, [(查询, 答案片段, 类型)])
+    """
+    paragraphs = []
+    queries = []
+    for i in range(docs):
+        sentences = [make_sentence(rng) for _ in range(int(rng.integers(300, 600)))]
+        for _ in range(3):
+            name = make_name(rng)
+            city = str(rng.choice(CITIES))
+            number = int(rng.integers(100, 999))
+            sentences.insert(int(rng.integers(0, len(sentences))), f"{name}的仓库位于{city}{number}号。")
+            queries.append((f"{name}的仓库在哪里", f"{name}的仓库位于{city}{number}号", "长段落"))
+        paragraphs.append("".join(sentences))
+
+        paragraphs.extend(make_paragraph(rng, int(rng.integers(2, 6))) for _ in range(3))
+
+        name = make_name(rng)
+        city = str(rng.choice(CITIES))
+        paragraphs.append(f"{name}在{city}。")
+        queries.append((f"{name}在哪个城市", f"{name}在{city}", "短段落"))
+    return paragraphs, queries
+
+
+async def measure_recall(units, queries, dim: int, top_k: int) -> dict:
+    with tempfile.TemporaryDirectory() as db_path:
+        store = MemuVectorStore(db_path=db_path, embedding_dim=dim)
+        await store.add_documents([{"content": unit, "metadata": {}} for unit in units])
+        results = await store.search_batch([query for query, _, _ in queries], limit=top_k)
+
+    hits = {}
+    for (_, answer, kind), result in zip(queries, results):
+        found = any(answer in item.get("content", "") for item in result)
+        hits.setdefault(kind, []).append(found)
+    return {kind: float(np.mean(values)) for kind, values in hits.items()}
+
+
+def bench_recall(docs: int, chunker: TextChunker, dim: int, top_k: int, rng) -> None:
+    paragraphs, queries = make_recall_corpus(docs, rng)
+    processor = DataProcessor()
+
+    # 旧版：每个段落一个向量，过短段落（<= 10 字符）被丢弃
+    legacy_units = [p for p in paragraphs if len(processor._clean_text(p)) > 10]
+    chunked_units = list(chunker.iter_chunks(paragraphs))
+
+    print(f"\n检索召回（{docs} 篇文档，{len(queries)} 条查询，recall@{top_k}，哈希向量 dim={dim}）\n")
+    print(f"{'方式':<20}{'向量数':>10}{'长段落召回':>12}{'短段落召回':>12}")
+    for label, units in (("按空行切段落", legacy_units), ("TextChunker", chunked_units)):
+        recall = asyncio.run(measure_recall(units, queries, dim, top_k))
+        print(f"{label:<20}{len(units):>10}{recall['长段落']:>12.2%}{recall['短段落']:>12.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文本分块压测")
+    parser.add_argument("--mb", type=float, default=20)
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.overlap)
+    print(f"chunk_size={args.chunk_size}, chunk_overlap={args.overlap}\n")
+    bench_throughput(make_corpus(args.mb, rng), chunker)
+    bench_recall(args.docs, chunker, args.dim, args.top_k, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+批量向量生成压测
+对比逐条请求与批量并发请求写入 MemuVectorStore 的耗时（使用本地桩服务）
+
+用法: python ame/benchmarks/bench_embedding.py [--docs 2000] [--latency 0.02]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.vector_store.memu_store import MemuVectorStore
+from ame.vector_store.embedding import OpenAIEmbedder
+from ame.benchmarks.stub_embedding_server import StubEmbeddingServer
+
+
+async def run(server: StubEmbeddingServer, docs, batch_size: int, concurrency: int) -> float:
+    embedder = OpenAIEmbedder(
+        api_key="stub",
+        base_url=server.base_url,
+        batch_size=batch_size,
+        max_concurrency=concurrency
+    )
+    with tempfile.TemporaryDirectory() as db_path:
+        store = MemuVectorStore(
+            db_path=db_path,
+            embedding_dim=server.dim,
+            use_openai_embedding=True,
+            embedder=embedder
+        )
+        start = time.perf_counter()
+        ok = await store.add_documents(docs)
+        elapsed = time.perf_counter() - start
+        assert ok and len(store.documents) == len(docs)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.02, help="桩服务每请求延迟（秒）")
+    args = parser.parse_args()
+
+    docs = [{"content": f"聊天记录第 {i} 条：今天天气不错 message {i}"} for i in range(args.docs)]
+
+    with StubEmbeddingServer(dim=args.dim, latency=args.latency) as server:
+        print(f"{'mode':<32}{'requests':>10}{'seconds':>10}{'docs/s':>12}")
+        for name, batch_size, concurrency in [
+            ("per-document (1 x 1)", 1, 1),
+            ("batched (256 x 1)", 256, 1),
+            ("batched + concurrent (256 x 4)", 256, 4),
+        ]:
+            before = server.request_count
+            elapsed = asyncio.run(run(server, docs, batch_size, concurrency))
+            requests = server.request_count - before
+            print(f"{name:<32}{requests:>10}{elapsed:>10.2f}{len(docs) / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
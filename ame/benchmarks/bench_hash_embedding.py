@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+本地哈希向量压测
+对比旧版逐条 sha256 + np.tile 与批量字符 n-gram 哈希的吞吐，并给出几组文本的相似度
+
+用法: python ame/benchmarks/bench_hash_embedding.py [--docs 10000] [--dim 1536]
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.vector_store.hash_embedding import HashingEmbedder
+
+
+def sha256_embedding(text: str, dim: int) -> np.ndarray:
+    """旧版实现（仅作对照）"""
+    vector = np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8)
+    vector = np.tile(vector, (dim // len(vector) + 1))[:dim].astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    texts = [f"聊天记录第 {i} 条：今天天气不错，我们去公园散步 message {i}" for i in range(args.docs)]
+    embedder = HashingEmbedder(args.dim)
+
+    start = time.perf_counter()
+    np.vstack([sha256_embedding(text, args.dim) for text in texts])
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embedder.embed(texts)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts[:1000]:
+        embedder.embed([text])
+    single = (time.perf_counter() - start) / 1000
+
+    print(f"docs={args.docs} dim={args.dim}")
+    print(f"{'sha256 per text':<24}{legacy:>10.3f}s{args.docs / legacy:>14.0f} docs/s")
+    print(f"{'n-gram batched':<24}{batched:>10.3f}s{args.docs / batched:>14.0f} docs/s")
+    print(f"{'n-gram single query':<24}{single * 1000:>10.3f}ms")
+
+    pairs = [
+        ("我喜欢吃苹果", "我爱吃苹果"),
+        ("我喜欢吃苹果", "今天天气很好"),
+        ("the quick brown fox", "a quick brown dog"),
+        ("the quick brown fox", "stock market crash"),
+    ]
+    print("\nsimilarity (n-gram / sha256)")
+    for a, b in pairs:
+        va, vb = embedder.embed([a, b])
+        legacy_sim = float(sha256_embedding(a, args.dim) @ sha256_embedding(b, args.dim))
+        print(f"  {a} | {b}: {float(va @ vb):.3f} / {legacy_sim:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+导入期间的事件循环延迟压测
+向 MemuVectorStore 分批导入文档，同时并发检索，由 LoopLagMonitor 测量事件循环被阻塞的时长；
+对比在事件循环线程内执行（offload=False）与放到存储线程池执行（offload=True）
+
+用法: python ame/benchmarks/bench_loop_lag.py [--docs 50000] [--batch 5000] [--dim 1536]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.vector_store.memu_store import MemuVectorStore
+from ame.vector_store.executor import LoopLagMonitor
+
+
+def make_documents(n: int, rng) -> list:
+    words = [f"w{i}" for i in range(5000)]
+    return [
+        {"content": " ".join(rng.choice(words, size=60)), "metadata": {"source": f"file{i % 20}.txt"}}
+        for i in range(n)
+    ]
+
+
+async def run(offload: bool, documents: list, batch: int, dim: int) -> dict:
+    with tempfile.TemporaryDirectory() as db_path:
+        store = MemuVectorStore(db_path=db_path, embedding_dim=dim, offload=offload)
+        monitor = LoopLagMonitor(interval=0.01, window=100000)
+        monitor.start()
+        stop = asyncio.Event()
+
+        async def searcher():
+            searches = 0
+            while not stop.is_set():
+                await store.search("w1 w2 w3", limit=10)
+                searches += 1
+                await asyncio.sleep(0.005)
+            return searches
+
+        search_task = asyncio.create_task(searcher())
+        start = time.perf_counter()
+        for i in range(0, len(documents), batch):
+            await store.add_documents(documents[i:i + batch])
+            # 批次之间让出事件循环（相当于逐个上传请求）
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        searches = await search_task
+        # 等最后一次采样落地再停止
+        await asyncio.sleep(monitor.interval * 2)
+        await monitor.stop()
+
+        stats = monitor.get_stats()
+        return {
+            "import_s": elapsed,
+            "searches": searches,
+            "p99_ms": stats["p99_ms"],
+            "max_ms": stats["max_ms"]
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入期间的事件循环延迟压测")
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs, np.random.default_rng(0))
+    print(f"导入 {args.docs} 篇文档（每批 {args.batch}，dim={args.dim}），同时并发检索\n")
+    print(f"{'模式':<16}{'导入耗时(s)':>12}{'检索次数':>10}{'p99 延迟(ms)':>14}{'最大延迟(ms)':>14}")
+    for offload in (False, True):
+        result = asyncio.run(run(offload, documents, args.batch, args.dim))
+        label = "线程池执行" if offload else "事件循环内执行"
+        print(
+            f"{label:<16}{result['import_s']:>12.2f}{result['searches']:>10}"
+            f"{result['p99_ms']:>14.1f}{result['max_ms']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
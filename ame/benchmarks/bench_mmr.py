@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+多样性重排（MMR）压测
+对比旧版逐对 Jaccard 的 Python 循环与基于相似度矩阵的向量化 MMR
+
+用法: python ame/benchmarks/bench_mmr.py [--candidates 20 100 300] [--dim 1536]
+"""
+
+import re
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.retrieval.base import RetrievalResult
+from ame.retrieval.reranker import Reranker
+
+
+def legacy_similarity(doc1: RetrievalResult, doc2: RetrievalResult) -> float:
+    """旧版实现（仅作对照）"""
+    words1 = set(re.findall(r'\w+', doc1.content.lower()))
+    words2 = set(re.findall(r'\w+', doc2.content.lower()))
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / len(words1 | words2)
+
+
+def legacy_diversity(results, lambda_param=0.7):
+    """旧版 O(n²·k) MMR（仅作对照）"""
+    selected = [results[0]]
+    remaining = results[1:]
+    while remaining:
+        scores = [
+            lambda_param * candidate.score
+            - (1 - lambda_param) * max(legacy_similarity(candidate, doc) for doc in selected)
+            for candidate in remaining
+        ]
+        selected.append(remaining.pop(int(np.argmax(scores))))
+    return selected
+
+
+def make_results(n: int, dim: int, with_embeddings: bool, rng):
+    words = [f"w{i}" for i in range(500)]
+    results = []
+    for i in range(n):
+        content = " ".join(rng.choice(words, size=40))
+        results.append(RetrievalResult(
+            content=content,
+            metadata={},
+            score=float(1.0 - i / n),
+            embedding=rng.standard_normal(dim).astype(np.float32) if with_embeddings else None
+        ))
+    return results
+
+
+def timeit(fn, repeat: int) -> float:
+    """单次调用平均耗时（毫秒）"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 100, 300])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    reranker = Reranker("diversity")
+    rerank = lambda results: asyncio.run(reranker.rerank("q", results))
+
+    print(f"dim={args.dim}")
+    print(f"{'candidates':>10}{'legacy':>12}{'jaccard':>12}{'embedding':>12}  (ms, full reorder)")
+    for n in args.candidates:
+        plain = make_results(n, args.dim, False, rng)
+        embedded = make_results(n, args.dim, True, rng)
+        for result in plain:
+            result.get_features()
+
+        legacy_ms = timeit(lambda: legacy_diversity(plain), 1)
+        jaccard_ms = timeit(lambda: rerank(plain), args.repeat)
+        embedding_ms = timeit(lambda: rerank(embedded), args.repeat)
+        print(f"{n:>10}{legacy_ms:>12.2f}{jaccard_ms:>12.2f}{embedding_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
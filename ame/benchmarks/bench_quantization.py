@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+量化存储压测
+对比 float32 / float16 / int8 常驻矩阵的内存占用、recall@k（仅粗排 / 全精度重排）与查询延迟
+
+用法: python ame/benchmarks/bench_quantization.py [--rows 100000] [--dim 1536] [--queries 100]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ame.vector_store.embedding_buffer import EmbeddingBuffer
+from ame.vector_store.quantization import QuantizedMatrix
+from ame.vector_store.topk import top_k, blockwise_top_k_batch, streaming_top_k_batch
+from ame.benchmarks.bench_ann import make_data
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-multiplier", type=int, default=4)
+    parser.add_argument("--block-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    data, queries = make_data(args.rows, args.dim, args.clusters, args.queries)
+    buffer = EmbeddingBuffer(args.dim)
+    buffer.append(data)
+    del data
+
+    start = time.perf_counter()
+    truth, _ = blockwise_top_k_batch(buffer.blocks(args.block_size), queries, args.k)
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    print(f"rows={args.rows} dim={args.dim} k={args.k} rescore x{args.rescore_multiplier}")
+    print(f"{'storage':<10}{'MB':>10}{'recall(raw)':>14}{'recall(rescore)':>18}{'ms/query':>12}")
+    print(f"{'float32':<10}{buffer.nbytes / 2**20:>10.1f}{1.0:>14.3f}{1.0:>18.3f}{exact_ms:>12.2f}")
+
+    for kind in ("float16", "int8"):
+        quantized = QuantizedMatrix(args.dim, kind)
+        quantized.reset(buffer, args.block_size)
+
+        raw, _ = streaming_top_k_batch(
+            quantized.score_blocks(queries, args.block_size), len(queries), args.k
+        )
+
+        start = time.perf_counter()
+        candidates, _ = streaming_top_k_batch(
+            quantized.score_blocks(queries, args.block_size),
+            len(queries),
+            args.k * args.rescore_multiplier
+        )
+        rescored = []
+        for rows, query in zip(candidates, queries):
+            order, _ = top_k(buffer.take(rows) @ query, args.k)
+            rescored.append(rows[order])
+        elapsed_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        print(
+            f"{kind:<10}{quantized.nbytes / 2**20:>10.1f}{recall(raw, truth):>14.3f}"
+            f"{recall(np.array(rescored), truth):>18.3f}{elapsed_ms:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+本地 embeddings 桩服务
+实现 OpenAI 兼容的 POST /v1/embeddings，用于测试和压测批量向量路径，无需网络
+
+用法:
+    with StubEmbeddingServer(dim=1536, latency=0.05) as server:
+        embedder = OpenAIEmbedder(api_key="stub", base_url=server.base_url)
+"""
+
+import json
+import base64
+import time
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import numpy as np
+
+
+class StubEmbeddingServer:
+    """OpenAI 兼容的 embeddings 桩服务（后台线程运行）"""
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0
+    ):
+        """
+        Args:
+            dim: 返回向量维度
+            host: 监听地址
+            port: 监听端口（0 为随机端口）
+            latency: 每个请求的模拟延迟（秒）
+        """
+        self.dim = dim
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.request_count = 0
+        self.input_count = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def embed(self, text: str) -> np.ndarray:
+        """确定性向量：同一文本总是得到同一向量"""
+        rng = np.random.default_rng(zlib.crc32(text.encode('utf-8')))
+        vector = rng.standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def start(self) -> str:
+        """启动服务，返回 base_url"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/embeddings"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                inputs = payload["input"]
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.input_count += len(inputs)
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                data = []
+                for i, text in enumerate(inputs):
+                    vector = stub.embed(text)
+                    if payload.get("encoding_format") == "base64":
+                        embedding = base64.b64encode(vector.tobytes()).decode('ascii')
+                    else:
+                        embedding = vector.tolist()
+                    data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+                tokens = sum(len(text) for text in inputs)
+                body = json.dumps({
+                    "object": "list",
+                    "data": data,
+                    "model": payload.get("model", "stub"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+                }).encode('utf-8')
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """停止服务"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubEmbeddingServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OpenAI 兼容 embeddings 桩服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubEmbeddingServer(dim=args.dim, port=args.port, latency=args.latency)
+    print(f"Stub embeddings server listening on {server.start()}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
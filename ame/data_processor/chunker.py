@@ -0,0 +1,168 @@
+"""
+文本分块
+按句子边界（中英文标点、换行）切分，在 token 预算内滑动窗口合并，相邻分块保留重叠
+
+- 过长的段落被切成多个分块，不再整体生成一个超长向量
+- 过短的段落与相邻段落合并，不再被丢弃
+- 单个句子超过预算时按字符硬切
+"""
+
+import re
+import logging
+from typing import Generator, Iterable, Iterator, List, Tuple
+import numpy as np
+
+from ame.vector_store.embedding import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 句子：以中文句末标点（可带后引号 / 括号）、英文句末标点加空白、或换行结束，
+# 句末空白归入该句，拼接分块时保留原有的空格与换行。
+# 句子主体按「非句末字符串 | 不在空白前的英文标点（如 3.14）」展开匹配，避免逐字符的惰性回溯
+_SENTENCE_PATTERN = re.compile(
+    r'(?=.)(?:[^。！？；….!?;\n]+|[.!?;]+["\')\]]*(?!\s|$))*'
+    r'(?:[。！？；…]+[”’」』）)]*|[.!?;]+["\')\]]*(?=\s|$)|\n|$)\s*',
+    re.S
+)
+
+# 批量切句的块大小（字符数）
+BLOCK_CHARS = 1 << 16
+
+# 与 estimate_tokens 相同的中日韩字符范围（闭区间码点）
+_CJK_RANGES = ((0x3040, 0x30FF), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xAC00, 0xD7AF))
+
+
+class TextChunker:
+    """基于 token 数的滑动窗口分块器"""
+    
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+        """
+        初始化分块器
+        
+        Args:
+            chunk_size: 每个分块的 token 数上限
+            chunk_overlap: 相邻分块重叠的 token 数（按整句保留，不超过该值）
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be in [0, chunk_size)")
+        
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+    
+    def split(self, text: str) -> List[str]:
+        """切分单段文本"""
+        return list(self.iter_chunks([text]))
+    
+    def iter_chunks(self, texts: Iterable[str]) -> Iterator[str]:
+        """
+        流式切分连续的多段文本（如逐个产出的段落）
+        
+        段落攒成约 BLOCK_CHARS 字符的块后整块切句、估算 token，
+        分块边界用前缀和二分查找确定，Python 循环次数与分块数而非句子数成正比
+        
+        Args:
+            texts: 文本段落，段落之间视为换行
+        
+        Yields:
+            分块文本
+        """
+        # 尚未输出完的句子（含作为下一分块开头的重叠部分）
+        sentences: List[str] = []
+        counts: List[int] = []
+        # sentences 开头已输出过的句子数
+        emitted = 0
+        
+        buffer: List[str] = []
+        buffered = 0
+        for text in texts:
+            buffer.append(text + "\n")
+            buffered += len(text) + 1
+            if buffered >= BLOCK_CHARS:
+                self._extend("".join(buffer), sentences, counts)
+                buffer, buffered = [], 0
+                sentences, counts, emitted = yield from self._emit(sentences, counts, emitted)
+        
+        if buffer:
+            self._extend("".join(buffer), sentences, counts)
+        sentences, counts, emitted = yield from self._emit(sentences, counts, emitted)
+        # 只剩已输出过的重叠部分时不再单独输出
+        if len(sentences) > emitted:
+            yield self._join(sentences)
+    
+    def _emit(
+        self,
+        sentences: List[str],
+        counts: List[int],
+        emitted: int
+    ) -> Generator[str, None, Tuple[List[str], List[int], int]]:
+        """
+        输出放得下的完整分块
+        
+        Returns:
+            剩余句子、对应 token 数、其中已输出过的句子数
+        """
+        prefix = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        total = len(sentences)
+        start = 0
+        while True:
+            # 从 start 起放得下的最多句子
+            end = int(np.searchsorted(prefix, prefix[start] + self.chunk_size, side="right")) - 1
+            if end >= total:
+                break
+            yield self._join(sentences[start:end])
+            emitted = end
+            # 保留末尾不超过 chunk_overlap 的整句作为下一个分块的开头（且加上下一句不超过 chunk_size）
+            start = int(max(
+                np.searchsorted(prefix, prefix[end] - self.chunk_overlap, side="left"),
+                np.searchsorted(prefix, prefix[end + 1] - self.chunk_size, side="left")
+            ))
+        return sentences[start:], counts[start:], emitted - start
+    
+    def _extend(self, text: str, sentences: List[str], counts: List[int]) -> None:
+        """切分句子并估算 token 数，追加到 sentences / counts（超长句子按字符硬切）"""
+        found = _SENTENCE_PATTERN.findall(text)
+        for sentence, count in zip(found, _count_tokens(text, found)):
+            if sentence.isspace():
+                continue
+            
+            if count <= self.chunk_size:
+                sentences.append(sentence)
+                counts.append(count)
+                continue
+            
+            # 按 token 密度换算每段字符数，切完后逐段复核
+            step = max(1, len(sentence) * self.chunk_size // count)
+            start = 0
+            while start < len(sentence):
+                piece = sentence[start:start + step]
+                piece_count = estimate_tokens(piece)
+                while piece_count > self.chunk_size and len(piece) > 1:
+                    piece = piece[:len(piece) * self.chunk_size // piece_count or 1]
+                    piece_count = estimate_tokens(piece)
+                sentences.append(piece)
+                counts.append(piece_count)
+                start += len(piece)
+    
+    @staticmethod
+    def _join(sentences: List[str]) -> str:
+        return "".join(sentences).strip()
+
+
+def _count_tokens(text: str, sentences: List[str]) -> List[int]:
+    """
+    批量估算各句 token 数（结果与逐句调用 estimate_tokens 相同）
+    
+    sentences 依次拼接等于 text；整段文本一次转为码点数组，按句子区间累加中日韩字符数
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    is_cjk = np.zeros(len(codes), dtype=np.int64)
+    for low, high in _CJK_RANGES:
+        is_cjk |= (codes >= low) & (codes <= high)
+    prefix = np.concatenate(([0], np.cumsum(is_cjk)))
+    
+    ends = np.cumsum([len(sentence) for sentence in sentences], dtype=np.int64)
+    lengths = np.diff(ends, prepend=0)
+    cjk = prefix[ends] - prefix[ends - lengths]
+    return (cjk + (lengths - cjk + 3) // 4 + 1).tolist()
@@ -1,37 +1,68 @@
 """
 数据处理模块
 负责:文件解析、文本清洗、格式标准化
+大文件按段落 / JSON 数组元素流式解析，内存占用与文件大小无关
 """
 
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Iterator, TextIO
 from datetime import datetime
 from pathlib import Path
 import re
 import logging
 
+from .chunker import TextChunker
+
 logger = logging.getLogger(__name__)
 
+# 流式解析每次读取的字符数
+READ_CHUNK_SIZE = 1 << 16
+
 
 class DataProcessor:
     """数据处理器 - 独立的技术模块"""
     
-    def __init__(self):
+    def __init__(self, chunker: Optional[TextChunker] = None):
+        """
+        Args:
+            chunker: 分块器（为空时按空行切分段落，每个段落 / 消息一个文档）
+        """
         self.supported_formats = ['.txt', '.json', '.md']
+        self.chunker = chunker
     
     async def process_file(self, file_path: str) -> List[Dict]:
         """
         输入：文件路径
         输出：标准化的文档列表
         """
+        return [doc async for doc in self.iter_file(file_path)]
+    
+    async def iter_file(
+        self,
+        file_path: str,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式处理文件，逐个产出标准化文档（结果与 process_file 相同）
+        
+        Args:
+            file_path: 文件路径
+            progress: 每产出一个文档前以已读取的字节数调用（按读取块计，略超前于该文档）
+            
+        Yields:
+            标准化的文档对象
+        """
         extension = file_path.split('.')[-1].lower()
         
         if extension == 'txt' or extension == 'md':
-            return await self._process_text_file(file_path)
+            documents = self._process_text_file(file_path, progress)
         elif extension == 'json':
-            return await self._process_json_file(file_path)
+            documents = self._process_json_file(file_path, progress)
         else:
             raise ValueError(f"Unsupported file format: {extension}")
+        
+        async for doc in documents:
+            yield doc
     
     async def process_text(self, text: str, source: str, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -57,52 +88,180 @@ class DataProcessor:
             }
         }
     
-    async def _process_text_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """处理文本文件"""
+    async def _process_text_file(
+        self,
+        file_path: str,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        处理文本文件（逐行读取，按段落产出）
+        
+        按 UTF-8 流式解码，遇到解码错误时改用 GBK 从头重读，跳过已产出的分块，
+        不需要为检测编码预先完整读一遍文件
+        """
+        count = 0
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            async for doc in self._iter_text_documents(file_path, 'utf-8', 0, progress):
+                yield doc
+                count += 1
         except UnicodeDecodeError:
             # 尝试其他编码
             logger.warning(f"UTF-8 decoding failed for {file_path}, trying GBK")
-            with open(file_path, 'r', encoding='gbk') as f:
-                content = f.read()
+            async for doc in self._iter_text_documents(file_path, 'gbk', count, progress):
+                yield doc
+                count += 1
         
-        # 按段落分割
-        paragraphs = self._split_into_paragraphs(content)
+        logger.info(f"Processed {count} chunks from {Path(file_path).name}")
+    
+    async def _iter_text_documents(
+        self,
+        file_path: str,
+        encoding: str,
+        skip: int,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        以指定编码读取文本文件并产出文档
         
-        documents = []
-        for para in paragraphs:
-            if len(para.strip()) > 10:  # 过滤太短的段落
+        Args:
+            file_path: 文件路径
+            encoding: 文件编码
+            skip: 跳过开头已产出过的文档数
+            progress: 同 iter_file
+            
+        Raises:
+            UnicodeDecodeError: 文件内容不符合该编码
+        """
+        with open(file_path, 'r', encoding=encoding) as f:
+            if self.chunker is not None:
+                # 连续段落按 token 预算合并 / 切分
+                texts = self.chunker.iter_chunks(self._iter_paragraphs(f))
+            else:
+                # 过滤太短的段落
+                texts = (para for para in self._iter_paragraphs(f) if len(para) > 10)
+            
+            for index, text in enumerate(texts):
+                if index < skip:
+                    continue
                 doc = await self.process_text(
-                    text=para,
+                    text=text,
                     source=file_path
                 )
-                documents.append(doc)
-        
-        logger.info(f"Processed {len(documents)} paragraphs from {Path(file_path).name}")
-        return documents
+                if self.chunker is not None:
+                    doc["metadata"]["chunk_index"] = index
+                if progress is not None:
+                    progress(f.buffer.tell())
+                yield doc
     
-    async def _process_json_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """处理 JSON 文件（如微信聊天记录导出）"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        documents = []
+    async def _process_json_file(
+        self,
+        file_path: str,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """处理 JSON 文件（如微信聊天记录导出，顶层数组逐个元素解析）"""
+        count = 0
         
         # 假设格式：[{"content": "...", "timestamp": "...", "sender": "..."}]
-        if isinstance(data, list):
-            for item in data:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for item in self._iter_json_array(f):
                 if isinstance(item, dict) and item.get("content"):
-                    doc = await self.process_text(
-                        text=item.get("content", ""),
-                        source=f"{file_path}:{item.get('sender', 'unknown')}",
-                        timestamp=item.get("timestamp")
-                    )
-                    documents.append(doc)
-        
-        logger.info(f"Processed {len(documents)} messages from {Path(file_path).name}")
-        return documents
+                    # 每条消息单独成块，只切分超长消息（保留各自的发送者与时间）
+                    content = item.get("content", "")
+                    pieces = self.chunker.split(content) if self.chunker is not None else [content]
+                    for piece in pieces:
+                        if progress is not None:
+                            progress(f.buffer.tell())
+                        yield await self.process_text(
+                            text=piece,
+                            source=f"{file_path}:{item.get('sender', 'unknown')}",
+                            timestamp=item.get("timestamp")
+                        )
+                        count += 1
+        
+        logger.info(f"Processed {count} messages from {Path(file_path).name}")
+    
+    def _iter_paragraphs(self, lines: TextIO) -> Iterator[str]:
+        """
+        按空行切分段落（与 _split_into_paragraphs 结果相同）
+        
+        Yields:
+            去除首尾空白的非空段落
+        """
+        paragraph: List[str] = []
+        for line in lines:
+            if line.strip():
+                paragraph.append(line)
+            elif paragraph:
+                yield "".join(paragraph).strip()
+                paragraph = []
+        if paragraph:
+            yield "".join(paragraph).strip()
+    
+    def _iter_json_array(self, f: TextIO) -> Iterator[Any]:
+        """
+        增量解析顶层 JSON 数组，逐个产出元素
+        
+        顶层不是数组时不产出任何元素
+        
+        Raises:
+            json.JSONDecodeError: JSON 格式错误
+        """
+        decoder = json.JSONDecoder()
+        buffer = ""
+        pos = 0
+        eof = False
+        
+        def skip_whitespace() -> bool:
+            """跳过空白，缓冲区耗尽时继续读取；返回是否还有内容"""
+            nonlocal buffer, pos, eof
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buffer):
+                    return True
+                if eof:
+                    return False
+                buffer, pos = f.read(READ_CHUNK_SIZE), 0
+                eof = not buffer
+        
+        if not skip_whitespace() or buffer[pos] != "[":
+            return
+        pos += 1
+        
+        expect_value = True
+        while skip_whitespace():
+            char = buffer[pos]
+            if char == "]":
+                return
+            if not expect_value:
+                if char != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+                expect_value = True
+                continue
+            
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # 数字在缓冲区末尾可能被截断（如 "1." 会被解析为 1），
+                    # 确认元素之后已读到分隔符再产出（只向后扫描空白，不复制缓冲区）
+                    after = end
+                    while after < len(buffer) and buffer[after] in " \t\r\n":
+                        after += 1
+                    if eof or (after < len(buffer) and buffer[after] in ",]"):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                chunk = f.read(READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+            
+            yield item
+            pos = end
+            expect_value = False
+        
+        raise json.JSONDecodeError("Unterminated array", buffer, pos)
     
     def _clean_text(self, text: str) -> str:
         """文本清洗"""
@@ -0,0 +1,291 @@
+"""
+LLM 响应缓存
+按精确缓存键（消息 + 模型 + 温度的摘要）缓存非流式回复
+
+- memory: 进程内 LRU，按条目数与字节数淘汰
+- sqlite: SQLite（WAL 模式）文件，多个 worker 共享，按最近访问时间淘汰
+- 两种后端都支持 TTL，并统计命中、未命中、淘汰、节省的字节数与 token 数
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheBase(ABC):
+    """响应缓存抽象基类"""
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 0
+    ):
+        """
+        Args:
+            max_entries: 最大条目数（<= 0 不限制）
+            max_bytes: 回复 JSON 总字节数上限（<= 0 不限制）
+            ttl_seconds: 有效期（秒），<= 0 表示不过期
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes_saved = 0
+        self.tokens_saved = 0
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """查询，未命中或已过期返回 None"""
+        pass
+    
+    @abstractmethod
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """写入"""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """清空"""
+        pass
+    
+    @abstractmethod
+    def _usage(self) -> Tuple[int, int]:
+        """(条目数, 字节数)"""
+        pass
+    
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+    
+    def _record_hit(self, response: Dict[str, Any], size: int) -> None:
+        self.hits += 1
+        self.bytes_saved += size
+        self.tokens_saved += int((response.get("usage") or {}).get("total_tokens", 0))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """命中统计（计数为本进程内的累计值）"""
+        entries, size = self._usage()
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bytes_saved": self.bytes_saved,
+            "tokens_saved": self.tokens_saved,
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+class MemoryResponseCache(ResponseCacheBase):
+    """进程内 LRU 响应缓存"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # key -> (写入时间, 字节数, 回复)
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], time.time()):
+                self._pop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._record_hit(entry[2], entry[1])
+            return entry[2]
+    
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        size = len(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.time(), size, response)
+            self._bytes += size
+            while self._entries and (
+                (self.max_entries > 0 and len(self._entries) > self.max_entries)
+                or (self.max_bytes > 0 and self._bytes > self.max_bytes)
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def _pop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def _usage(self) -> Tuple[int, int]:
+        return len(self._entries), self._bytes
+
+
+class SQLiteResponseCache(ResponseCacheBase):
+    """SQLite 响应缓存（多个 worker 可共享同一文件）"""
+    
+    def __init__(self, path: str, **kwargs):
+        """
+        Args:
+            path: SQLite 文件路径
+            **kwargs: 同 ResponseCacheBase
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response, size, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._expired(row[2], now):
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.expirations += 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM response cache lookup failed: {e}")
+                self.misses += 1
+                return None
+            response = json.loads(row[0])
+            self._record_hit(response, row[1])
+            return response
+    
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload.encode('utf-8')), now, now)
+                )
+                self._enforce_limits(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist LLM response: {e}")
+    
+    def _enforce_limits(self, now: float) -> None:
+        """删除过期条目，再按最近访问时间淘汰超出容量的条目"""
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        over_entries = self.max_entries > 0 and count > self.max_entries
+        over_bytes = self.max_bytes > 0 and total > self.max_bytes
+        if not (over_entries or over_bytes):
+            return
+        
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if not (
+                (self.max_entries > 0 and count > self.max_entries)
+                or (self.max_bytes > 0 and total > self.max_bytes)
+            ):
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+    
+    def _usage(self) -> Tuple[int, int]:
+        with self._lock:
+            try:
+                count, total = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+            except sqlite3.Error:
+                return 0, 0
+        return count, total
+
+
+def create_response_cache(
+    backend: str = "memory",
+    path: Optional[str] = None,
+    **kwargs
+) -> ResponseCacheBase:
+    """
+    创建响应缓存
+    
+    Args:
+        backend: memory / sqlite
+        path: SQLite 文件路径（sqlite 后端必填）
+        **kwargs: max_entries / max_bytes / ttl_seconds
+    """
+    if backend == "memory":
+        return MemoryResponseCache(**kwargs)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("SQLite response cache requires path")
+        return SQLiteResponseCache(path, **kwargs)
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+# 进程内按 (后端, 路径) 共享的缓存实例，服务重新加载后仍然保留
+_caches: Dict[Tuple[str, Optional[str]], ResponseCacheBase] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(
+    backend: str = "memory",
+    path: Optional[str] = None,
+    **kwargs
+) -> ResponseCacheBase:
+    """获取共享的响应缓存实例（首次创建时的参数生效）"""
+    key = (backend, os.path.abspath(path) if path else None)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = create_response_cache(backend, key[1], **kwargs)
+        return _caches[key]
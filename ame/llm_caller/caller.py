@@ -4,14 +4,18 @@ LLM 调用模块
 优化:重试机制、流式输出、缓存、错误处理
 """
 
-from openai import OpenAI, AsyncOpenAI
+from openai import AsyncOpenAI
 import os
 from typing import List, Dict, Optional, AsyncIterator, Any
 import asyncio
 import hashlib
 import json
-from functools import lru_cache
 import logging
+from .cache import ResponseCacheBase, MemoryResponseCache
+from .semantic_cache import SemanticCache, SemanticLookup
+from .singleflight import SingleFlight
+from .rate_limiter import Permit, RateLimiter, get_rate_limiter, retry_after_seconds, is_rate_limited, backoff_delay
+from ame.vector_store.embedding import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +26,72 @@ DEFAULT_CONFIG = {
     "OPENAI_MODEL": "gpt-3.5-turbo"
 }
 
+# 未指定 max_tokens 时预留的输出 token 数（用于 token 预算预扣）
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+class _PermitStream:
+    """
+    上游流式响应的包装
+    
+    流读完、出错或被关闭时才归还准入名额（长时间的流式请求同样计入在途上限），
+    并按实际用量（上游返回 usage 时）或已输出内容的估算校正 token 预算
+    """
+    
+    def __init__(self, response, limiter: RateLimiter, permit: Permit, prompt_tokens: int):
+        self._response = response
+        self._limiter = limiter
+        self._permit = permit
+        self._prompt_tokens = prompt_tokens
+        self._parts: List[str] = []
+        self._usage: Optional[int] = None
+        self._closed = False
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            chunk = await self._response.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+        
+        usage = getattr(chunk, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            self._usage = usage.total_tokens
+        for choice in getattr(chunk, "choices", None) or []:
+            content = getattr(getattr(choice, "delta", None), "content", None)
+            if content:
+                self._parts.append(content)
+        return chunk
+    
+    async def aclose(self) -> None:
+        """关闭上游流并归还准入名额（可重复调用）"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close = getattr(self._response, "close", None)
+            if close is not None:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+        finally:
+            self._release()
+    
+    def _release(self) -> None:
+        self._permit.tokens = self._usage or self._prompt_tokens + estimate_tokens("".join(self._parts))
+        self._limiter.release(self._permit)
+    
+    def __del__(self):
+        # 调用方既未读完也未关闭时兜底归还
+        if not self._closed:
+            self._closed = True
+            self._release()
+
 
 class LLMCaller:
     """
@@ -41,7 +111,12 @@ class LLMCaller:
         model: Optional[str] = None, 
         max_retries: int = 3, 
         cache_enabled: bool = True,
-        timeout: float = 60.0
+        timeout: float = 60.0,
+        semantic_cache: Optional[SemanticCache] = None,
+        cache: Optional[ResponseCacheBase] = None,
+        coalesce_requests: bool = True,
+        rate_limiter: Optional[RateLimiter] = None,
+        http_client=None
     ):
         """
         初始化 LLM 调用器
@@ -53,32 +128,37 @@ class LLMCaller:
             max_retries: 最大重试次数
             cache_enabled: 是否启用缓存
             timeout: 请求超时时间（秒）
+            semantic_cache: 语义响应缓存（可选，精确缓存未命中时按提问相似度查找）
+            cache: 精确响应缓存后端（默认为进程内 LRU）
+            coalesce_requests: 是否合并并发的相同请求（在途期间只请求一次上游）
+            rate_limiter: 准入控制器（默认为进程内共享实例）
+            http_client: 异步请求使用的 httpx.AsyncClient（如 http_pool.get_http_client() 的共享连接池），
+                默认由 SDK 为本实例单独创建
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY", DEFAULT_CONFIG["OPENAI_API_KEY"])
         self.base_url = base_url or os.getenv("OPENAI_BASE_URL", DEFAULT_CONFIG["OPENAI_BASE_URL"])
         self.model = model or os.getenv("OPENAI_MODEL", DEFAULT_CONFIG["OPENAI_MODEL"])
-        self.client: Optional[OpenAI] = None
         self.async_client: Optional[AsyncOpenAI] = None
         self.max_retries = max_retries
         self.cache_enabled = cache_enabled
         self.timeout = timeout
-        self._cache: Dict[str, Any] = {}
+        self.cache: ResponseCacheBase = cache if cache is not None else MemoryResponseCache()
+        self.semantic_cache = semantic_cache
+        self.coalesce_requests = coalesce_requests
+        self._flights = SingleFlight()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.http_client = http_client
         self._init_client()
     
     def _init_client(self) -> None:
-        """初始化 OpenAI 客户端（同步和异步）"""
+        """初始化异步 OpenAI 客户端（请求都走异步接口，不再单独创建同步客户端）"""
         if self.api_key:
-            self.client = OpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url,
-                timeout=self.timeout,
-                max_retries=0  # 手动处理重试
-            )
             self.async_client = AsyncOpenAI(
                 api_key=self.api_key,
                 base_url=self.base_url,
                 timeout=self.timeout,
-                max_retries=0
+                max_retries=0,  # 手动处理重试
+                http_client=self.http_client
             )
     
     def _get_cache_key(self, messages: List[Dict], model: str, temperature: float) -> str:
@@ -95,12 +175,45 @@ class LLMCaller:
         """从缓存获取"""
         if not self.cache_enabled:
             return None
-        return self._cache.get(cache_key)
+        return self.cache.get(cache_key)
     
     def _save_to_cache(self, cache_key: str, response: Dict):
         """保存到缓存"""
         if self.cache_enabled:
-            self._cache[cache_key] = response
+            self.cache.put(cache_key, response)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """缓存统计（精确响应缓存与语义缓存）"""
+        return {
+            "enabled": self.cache_enabled,
+            "response_cache": self.cache.get_stats(),
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None,
+            "single_flight": self._flights.get_stats()
+        }
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """准入控制统计（进程内共享）"""
+        return self.rate_limiter.get_stats()
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]], max_tokens: Optional[int]) -> int:
+        """预估一次请求的 token 数（提示 + 最大输出）"""
+        return self._estimate_prompt_tokens(messages) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+    
+    def _estimate_prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(estimate_tokens(m.get("content") or "") for m in messages)
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        重试前等待的秒数
+        
+        上游限流（429）时按 Retry-After 暂停全部准入，由准入控制统一等待；
+        其他错误使用带抖动的指数退避
+        """
+        retry_after = retry_after_seconds(error)
+        if is_rate_limited(error):
+            self.rate_limiter.defer(retry_after if retry_after is not None else backoff_delay(attempt))
+            return 0.0
+        return retry_after if retry_after is not None else backoff_delay(attempt)
     
     async def generate(
         self,
@@ -143,22 +256,62 @@ class LLMCaller:
             if cached_response:
                 logger.debug(f"Cache hit for query")
                 return cached_response
+            
+            if self.coalesce_requests:
+                # 相同请求在途时等待同一个结果（语义缓存查询也只做一次）
+                return await self._flights.do(
+                    (cache_key, max_tokens),
+                    lambda: self._generate_uncached(messages, model, temperature, max_tokens, cache_key)
+                )
+            return await self._generate_uncached(messages, model, temperature, max_tokens, cache_key)
         
-        # 重试机制
+        return await self._request(messages, model, temperature, max_tokens, stream=True)
+    
+    async def _generate_uncached(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        cache_key: str
+    ) -> Dict[str, Any]:
+        """精确缓存未命中：先查语义缓存，再请求上游"""
+        semantic_lookup = None
+        if self.cache_enabled and self.semantic_cache is not None:
+            semantic_lookup = await self.semantic_cache.lookup(messages, model, temperature, max_tokens)
+            if semantic_lookup.response is not None:
+                logger.debug(f"Semantic cache hit (similarity={semantic_lookup.similarity:.3f})")
+                self._save_to_cache(cache_key, semantic_lookup.response)
+                return semantic_lookup.response
+        return await self._request(messages, model, temperature, max_tokens, cache_key, semantic_lookup)
+    
+    async def _request(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        cache_key: Optional[str] = None,
+        semantic_lookup: Optional[SemanticLookup] = None,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        """请求上游（带重试），非流式结果写入缓存"""
+        estimated_tokens = self._estimate_tokens(messages, max_tokens)
         last_error: Optional[Exception] = None
         for attempt in range(self.max_retries):
             try:
-                response = await self.async_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    stream=stream
-                )
-                
                 if stream:
-                    # 流式输出（暂不缓存）
-                    return {"stream": response}
+                    # 流式输出（暂不缓存），准入名额占用到流读完或被关闭
+                    return {"stream": await self._open_stream(messages, model, temperature, max_tokens)}
+                
+                async with self.rate_limiter.acquire(estimated_tokens) as permit:
+                    response = await self.async_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                    permit.tokens = response.usage.total_tokens
                 
                 result = {
                     "content": response.choices[0].message.content,
@@ -172,6 +325,8 @@ class LLMCaller:
                 
                 # 保存到缓存
                 self._save_to_cache(cache_key, result)
+                if semantic_lookup is not None:
+                    await self.semantic_cache.store(semantic_lookup, result)
                 logger.info(f"Generated response with {result['usage']['total_tokens']} tokens")
                 
                 return result
@@ -180,13 +335,34 @@ class LLMCaller:
                 last_error = e
                 logger.warning(f"Generation attempt {attempt + 1} failed: {str(e)}")
                 if attempt < self.max_retries - 1:
-                    # 指数退避
-                    wait_time = (2 ** attempt) * 0.5
-                    await asyncio.sleep(wait_time)
+                    # 带抖动的指数退避 / Retry-After
+                    await asyncio.sleep(self._retry_delay(e, attempt))
                     continue
         
         raise Exception(f"LLM generation failed after {self.max_retries} attempts: {str(last_error)}")
     
+    async def _open_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> _PermitStream:
+        """打开上游流，返回持有准入名额的流包装"""
+        permit = await self.rate_limiter.admit(self._estimate_tokens(messages, max_tokens))
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        except BaseException:
+            self.rate_limiter.release(permit)
+            raise
+        return _PermitStream(response, self.rate_limiter, permit, self._estimate_prompt_tokens(messages))
+    
     async def generate_with_system(
         self,
         prompt: str,
@@ -236,21 +412,38 @@ class LLMCaller:
         if not model:
             model = self.model
         
-        # 重试机制
+        if self.coalesce_requests:
+            # 相同请求在途时订阅同一个上游流
+            key = (self._get_cache_key(messages, model, temperature), max_tokens)
+            chunks = self._flights.stream(
+                key, lambda: self._stream_request(messages, model, temperature, max_tokens)
+            )
+        else:
+            chunks = self._stream_request(messages, model, temperature, max_tokens)
+        
+        async for chunk in chunks:
+            yield chunk
+    
+    async def _stream_request(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[str]:
+        """请求上游流（带重试），整个流期间占用一个准入名额"""
         last_error: Optional[Exception] = None
         for attempt in range(self.max_retries):
+            emitted = False
             try:
-                response = await self.async_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    stream=True
-                )
-                
-                async for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        yield chunk.choices[0].delta.content
+                response = await self._open_stream(messages, model, temperature, max_tokens)
+                try:
+                    async for chunk in response:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            emitted = True
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await response.aclose()
                 
                 logger.info("Stream generation completed")
                 return
@@ -258,9 +451,11 @@ class LLMCaller:
             except Exception as e:
                 last_error = e
                 logger.warning(f"Stream generation attempt {attempt + 1} failed: {str(e)}")
+                if emitted:
+                    # 已输出部分片段，重试会让订阅者收到重复内容
+                    break
                 if attempt < self.max_retries - 1:
-                    wait_time = (2 ** attempt) * 0.5
-                    await asyncio.sleep(wait_time)
+                    await asyncio.sleep(self._retry_delay(e, attempt))
                     continue
         
         raise Exception(f"LLM stream generation failed after {self.max_retries} attempts: {str(last_error)}")
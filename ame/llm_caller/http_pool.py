@@ -0,0 +1,87 @@
+"""
+共享 HTTP 连接池
+进程内的对话与向量请求共用同一个 httpx.AsyncClient（keep-alive 复用连接，减少 TCP/TLS 握手），
+服务重新加载时只要连接池参数不变就继续复用
+
+注意：httpx 连接绑定在首次使用它的事件循环上，共享客户端只应在同一个事件循环内使用
+（如后端服务）；每次调用都新建事件循环的脚本应使用各自的客户端
+"""
+
+import logging
+import threading
+import importlib.util
+from typing import Any, Dict, List, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 需要可选依赖 h2（pip install httpx[http2]）
+H2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_POOL_OPTIONS = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "http2": False
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_options: Optional[Dict[str, Any]] = None
+# 参数变化后被替换的客户端（可能仍有在途请求，关闭时统一释放）
+_retired: List[httpx.AsyncClient] = []
+_lock = threading.Lock()
+
+
+def get_http_client(**options) -> httpx.AsyncClient:
+    """
+    获取进程内共享的异步 HTTP 客户端
+    
+    Args:
+        **options: 连接池参数
+            - max_connections: 最大连接数
+            - max_keepalive_connections: 最大空闲保活连接数
+            - keepalive_expiry: 空闲连接保活时间（秒）
+            - http2: 是否启用 HTTP/2（需要安装 h2，未安装时回退到 HTTP/1.1）
+    
+    Returns:
+        httpx.AsyncClient（参数与现有实例相同时直接复用）
+    """
+    global _client, _client_options
+    resolved = {**DEFAULT_POOL_OPTIONS, **options}
+    if resolved["http2"] and not H2_AVAILABLE:
+        logger.warning("HTTP/2 requested but h2 is not installed, falling back to HTTP/1.1")
+        resolved["http2"] = False
+    
+    with _lock:
+        if _client is not None and not _client.is_closed and resolved == _client_options:
+            return _client
+        if _client is not None and not _client.is_closed:
+            _retired.append(_client)
+        
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=resolved["max_connections"],
+                max_keepalive_connections=resolved["max_keepalive_connections"],
+                keepalive_expiry=resolved["keepalive_expiry"]
+            ),
+            http2=resolved["http2"],
+            follow_redirects=True
+        )
+        _client_options = resolved
+        logger.info(
+            f"Created shared HTTP pool (max_connections={resolved['max_connections']}, "
+            f"keepalive={resolved['max_keepalive_connections']}, http2={resolved['http2']})"
+        )
+        return _client
+
+
+async def close_http_clients() -> None:
+    """关闭共享客户端（应用退出时调用）"""
+    global _client, _client_options
+    with _lock:
+        clients = _retired + ([_client] if _client is not None else [])
+        _retired.clear()
+        _client = None
+        _client_options = None
+    for client in clients:
+        await client.aclose()
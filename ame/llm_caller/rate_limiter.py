@@ -0,0 +1,292 @@
+"""
+LLM 请求准入控制
+进程内所有 LLMCaller 共享同一个限流器：
+- 在途请求数上限
+- 每分钟请求数 / token 数预算（令牌桶，按秒连续补充）
+- 上游返回 429 时按 Retry-After 暂停全部准入
+- 重试退避加入随机抖动，避免同步重试风暴
+- 统计排队等待时间
+
+限流器状态由线程锁保护，等待者按所属事件循环唤醒，可在多个事件循环中使用
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """每分钟预算的令牌桶（容量为一分钟的预算）"""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+    
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+    
+    def shortfall(self, amount: float) -> float:
+        """补足 amount 还需等待的秒数（超过容量的请求按容量计）"""
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+
+class Permit:
+    """一次准入许可，请求完成后可写入实际 token 数用于校正预算"""
+    
+    def __init__(self, estimated_tokens: int, waited: float):
+        self.estimated_tokens = estimated_tokens
+        self.tokens: Optional[int] = None
+        self.waited = waited
+        self.released = False
+
+
+class RateLimiter:
+    """异步准入控制器"""
+    
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0
+    ):
+        """
+        Args:
+            max_concurrency: 最大在途请求数（<= 0 不限制）
+            requests_per_minute: 每分钟请求数（<= 0 不限制）
+            tokens_per_minute: 每分钟 token 数（<= 0 不限制）
+        """
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._requests: Optional[_Bucket] = None
+        self._tokens: Optional[_Bucket] = None
+        self.configure(max_concurrency, requests_per_minute, tokens_per_minute)
+        
+        self.admitted = 0
+        self.queued = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+    
+    def configure(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ) -> None:
+        """更新限额（只更新传入的参数，为 None 的保持不变；在途请求不受影响）"""
+        with self._lock:
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+            # 预算不变时保留当前余量
+            if requests_per_minute is not None and (
+                self._requests is None or self._requests.capacity != requests_per_minute
+            ):
+                self._requests = _Bucket(requests_per_minute)
+            if tokens_per_minute is not None and (
+                self._tokens is None or self._tokens.capacity != tokens_per_minute
+            ):
+                self._tokens = _Bucket(tokens_per_minute)
+        self._wake_all()
+    
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0) -> AsyncIterator[Permit]:
+        """
+        等待准入
+        
+        Args:
+            estimated_tokens: 预估 token 数（提示 + 最大输出），预先从 token 预算中扣除
+        
+        Yields:
+            Permit，退出前设置 permit.tokens 可按实际用量退还或补扣预算
+        """
+        permit = await self.admit(estimated_tokens)
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+    
+    async def admit(self, estimated_tokens: int = 0) -> Permit:
+        """
+        等待准入并返回许可，用完后必须调用 release 归还
+        
+        用于跨越多个代码块的长请求（如流式响应）；单个代码块内优先使用 acquire
+        """
+        waited = await self._admit(estimated_tokens)
+        return Permit(estimated_tokens, waited)
+    
+    def release(self, permit: Permit) -> None:
+        """归还许可（重复调用无效果）；设置了 permit.tokens 时按实际用量校正 token 预算"""
+        with self._lock:
+            if permit.released:
+                return
+            permit.released = True
+            self._in_flight -= 1
+            if self._tokens.enabled and permit.tokens is not None:
+                # 按实际用量校正（可为负，超支部分由后续补充抵扣）
+                self._tokens.level = min(
+                    self._tokens.capacity,
+                    self._tokens.level + permit.estimated_tokens - permit.tokens
+                )
+        self._wake_all()
+    
+    def defer(self, seconds: float) -> None:
+        """上游要求退避（429 / Retry-After）：seconds 秒内暂停全部准入"""
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"LLM upstream throttled, pausing admissions for {seconds:.1f}s")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """准入统计"""
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            return {
+                "max_concurrency": self.max_concurrency,
+                "requests_per_minute": self._requests.capacity,
+                "tokens_per_minute": self._tokens.capacity,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "throttled": self.throttled,
+                "avg_wait_ms": self.wait_seconds / self.admitted * 1000 if self.admitted else 0.0,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+                "paused_for_ms": max(0.0, self._paused_until - now) * 1000,
+                "requests_available": self._requests.level if self._requests.enabled else None,
+                "tokens_available": self._tokens.level if self._tokens.enabled else None
+            }
+    
+    async def _admit(self, tokens: int) -> float:
+        """等待直到满足全部限额，返回等待秒数"""
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        queued = False
+        while True:
+            with self._lock:
+                delay = self._try_admit(tokens, time.monotonic())
+                if delay == 0:
+                    waited = time.monotonic() - start
+                    self.admitted += 1
+                    self.queued += queued
+                    self.wait_seconds += waited
+                    self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                    return waited
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            
+            queued = True
+            try:
+                # delay 为 None 时只等并发名额释放
+                await asyncio.wait_for(waiter[1], timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+    
+    def _try_admit(self, tokens: int, now: float) -> Optional[float]:
+        """满足限额时占用名额并返回 0，否则返回需等待的秒数（None 表示等待释放）"""
+        if now < self._paused_until:
+            # 暂停结束时间加入抖动，避免等待者同时涌入
+            return (self._paused_until - now) * (1 + 0.1 * random.random())
+        
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        delay = 0.0
+        if self._requests.enabled:
+            delay = max(delay, self._requests.shortfall(1))
+        if self._tokens.enabled:
+            delay = max(delay, self._tokens.shortfall(tokens))
+        if self.max_concurrency > 0 and self._in_flight >= self.max_concurrency:
+            return delay or None
+        if delay > 0:
+            return delay
+        
+        self._in_flight += 1
+        if self._requests.enabled:
+            self._requests.level -= 1
+        if self._tokens.enabled:
+            self._tokens.level -= tokens
+        return 0
+    
+    def _wake_all(self) -> None:
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(_wake, future)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """从上游错误响应头读取 Retry-After（秒），没有时返回 None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # HTTP 日期格式的 Retry-After 交给指数退避处理
+        return None
+    return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """是否为上游限流错误（HTTP 429）"""
+    return getattr(error, "status_code", None) == 429
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """带完全随机抖动的指数退避（0 ~ base * 2^attempt）"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# 进程内共享的限流器
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(**kwargs) -> RateLimiter:
+    """
+    获取进程内共享的限流器
+    
+    Args:
+        **kwargs: max_concurrency / requests_per_minute / tokens_per_minute，
+            传入时只更新共享实例的这几项限额，未传入的保持不变
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(**kwargs)
+        elif kwargs:
+            _limiter.configure(**kwargs)
+        return _limiter
@@ -0,0 +1,287 @@
+"""
+语义响应缓存
+对最后一条用户消息生成向量，与同一分区（其余消息、模型、温度档位、max_tokens）下的历史提问比较余弦相似度，
+超过阈值时直接返回缓存的回复，改写过的同一问题不再请求付费接口
+
+- 内存中每个分区一个归一化向量矩阵，查询为一次矩阵-向量乘
+- SQLite（WAL 模式）持久化，启动时加载最近的 max_entries 条；写入在线程中执行，不阻塞事件循环
+- 超出容量时淘汰最早写入的条目
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import inspect
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SemanticLookup:
+    """一次查询的结果，未命中时可直接用于写回（避免重复生成向量）"""
+    partition: str
+    embedding: Optional[np.ndarray]
+    response: Optional[Dict[str, Any]] = None
+    similarity: float = 0.0
+
+
+class _Partition:
+    """单个分区的向量与回复（矩阵在查询时按需堆叠）"""
+    
+    def __init__(self):
+        self.ids: List[int] = []
+        self.rows: List[np.ndarray] = []
+        self.responses: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.vstack(self.rows)
+        return self._matrix
+    
+    def add(self, entry_id: int, vector: np.ndarray, response: Dict[str, Any]) -> None:
+        self.ids.append(entry_id)
+        self.rows.append(vector)
+        self.responses.append(response)
+        self._matrix = None
+    
+    def remove(self, entry_id: int) -> None:
+        i = self.ids.index(entry_id)
+        del self.ids[i]
+        del self.rows[i]
+        del self.responses[i]
+        self._matrix = None
+
+
+class SemanticCache:
+    """
+    语义响应缓存
+    
+    分区键为 (除最后一条用户消息外的全部消息, 模型, 温度档位, max_tokens, 向量模型)，
+    只有系统提示与上下文完全相同的提问才会相互命中；输出上限较小时截断的回复不会返回给上限更大的请求
+    """
+    
+    def __init__(
+        self,
+        embedder=None,
+        path: Optional[str] = None,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        temperature_step: float = 0.1
+    ):
+        """
+        初始化语义缓存
+        
+        Args:
+            embedder: 向量生成器（提供 model 与 embed(texts)，embed 可为协程）；
+                默认使用本地 HashingEmbedder，只能识别字面上相近的提问
+            path: SQLite 文件路径，None 时仅使用内存
+            threshold: 命中所需的最小余弦相似度
+            max_entries: 最大条目数
+            temperature_step: 温度分档宽度
+        """
+        if embedder is None:
+            from ame.vector_store.hash_embedding import HashingEmbedder
+            embedder = HashingEmbedder(512)
+        self.embedder = embedder
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.temperature_step = temperature_step
+        self._partitions: Dict[str, _Partition] = {}
+        # 按写入顺序排列的 (条目 id, 分区)
+        self._order: Deque[Tuple[int, str]] = deque()
+        # 未持久化条目（仅内存或写入失败）使用负数 id，不与 SQLite 分配的 rowid 冲突
+        self._local_id = 0
+        # _lock 保护内存结构，_db_lock 保护 SQLite 连接（写库期间查询不必等待）
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        self.hits = 0
+        self.misses = 0
+        
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_cache ("
+                "id INTEGER PRIMARY KEY, partition TEXT NOT NULL, vector BLOB NOT NULL, "
+                "response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._load()
+    
+    @property
+    def model(self) -> str:
+        """向量模型标识（含维度，不同模型的向量不可比较）"""
+        name = getattr(self.embedder, "model", type(self.embedder).__name__)
+        dim = getattr(self.embedder, "embedding_dim", None)
+        return f"{name}:{dim}" if dim else str(name)
+    
+    def partition_key(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """分区键（最后一条消息之外的上下文 + 模型 + 温度档位 + 输出上限 + 向量模型）"""
+        bucket = round(temperature / self.temperature_step) if self.temperature_step > 0 else temperature
+        data = {
+            "context": messages[:-1],
+            "role": messages[-1].get("role") if messages else None,
+            "model": model,
+            "temperature": bucket,
+            "max_tokens": max_tokens,
+            "embedding_model": self.model
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+    
+    async def lookup(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int] = None
+    ) -> SemanticLookup:
+        """
+        查询缓存
+        
+        Returns:
+            SemanticLookup，命中时 response 非空
+        """
+        partition = self.partition_key(messages, model, temperature, max_tokens)
+        if not messages or not messages[-1].get("content"):
+            return SemanticLookup(partition=partition, embedding=None)
+        
+        embedding = await self._embed(messages[-1]["content"])
+        with self._lock:
+            entries = self._partitions.get(partition)
+            if entries is not None and entries.ids:
+                similarities = entries.matrix @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    return SemanticLookup(
+                        partition=partition,
+                        embedding=embedding,
+                        response=dict(entries.responses[best]),
+                        similarity=float(similarities[best])
+                    )
+            self.misses += 1
+        return SemanticLookup(partition=partition, embedding=embedding)
+    
+    async def store(self, lookup: SemanticLookup, response: Dict[str, Any]) -> None:
+        """写入一次未命中查询的回复（SQLite 写入在线程中执行）"""
+        if lookup.embedding is None or self.max_entries <= 0:
+            return
+        await asyncio.to_thread(self._store, lookup, response)
+    
+    def _store(self, lookup: SemanticLookup, response: Dict[str, Any]) -> None:
+        entry_id = self._insert(lookup.partition, lookup.embedding, response)
+        with self._lock:
+            self._add(entry_id, lookup.partition, lookup.embedding, response)
+            evicted = [i for i in self._evict() if i >= 0]
+        
+        if evicted and self._conn is not None:
+            with self._db_lock:
+                try:
+                    self._conn.executemany(
+                        "DELETE FROM semantic_cache WHERE id = ?", [(i,) for i in evicted]
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to evict semantic cache entries: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "entries": len(self._order),
+            "threshold": self.threshold,
+            "path": self.path
+        }
+    
+    async def _embed(self, text: str) -> np.ndarray:
+        vectors = self.embedder.embed([text])
+        if inspect.isawaitable(vectors):
+            vectors = await vectors
+        vector = np.asarray(vectors, dtype=np.float32)[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def _insert(self, partition: str, vector: np.ndarray, response: Dict[str, Any]) -> int:
+        """
+        持久化条目
+        
+        id 由 SQLite 分配，多个进程共享同一文件时不会相互覆盖
+        
+        Returns:
+            条目 id（未持久化时为负数的本地 id）
+        """
+        if self._conn is not None:
+            with self._db_lock:
+                try:
+                    cursor = self._conn.execute(
+                        "INSERT INTO semantic_cache (partition, vector, response, created) VALUES (?, ?, ?, ?)",
+                        (partition, vector.tobytes(), json.dumps(response, ensure_ascii=False), time.time())
+                    )
+                    self._conn.commit()
+                    return cursor.lastrowid
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist semantic cache entry: {e}")
+        with self._lock:
+            self._local_id -= 1
+            return self._local_id
+    
+    def _add(self, entry_id: int, partition: str, vector: np.ndarray, response: Dict[str, Any]) -> None:
+        entries = self._partitions.get(partition)
+        if entries is None:
+            entries = self._partitions[partition] = _Partition()
+        entries.add(entry_id, vector, response)
+        self._order.append((entry_id, partition))
+    
+    def _evict(self) -> List[int]:
+        evicted = []
+        while len(self._order) > self.max_entries:
+            entry_id, partition = self._order.popleft()
+            entries = self._partitions[partition]
+            entries.remove(entry_id)
+            if not entries.ids:
+                del self._partitions[partition]
+            evicted.append(entry_id)
+        return evicted
+    
+    def _load(self) -> None:
+        """加载最近的 max_entries 条"""
+        try:
+            rows = self._conn.execute(
+                "SELECT id, partition, vector, response FROM semantic_cache ORDER BY id DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            if rows:
+                # 容量调小后多出的旧条目不再保留
+                self._conn.execute("DELETE FROM semantic_cache WHERE id < ?", (rows[-1][0],))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to load semantic cache: {e}")
+            return
+        for entry_id, partition, blob, response in reversed(rows):
+            self._add(entry_id, partition, np.frombuffer(blob, dtype=np.float32), json.loads(response))
+        logger.info(f"Loaded {len(rows)} semantic cache entries from {self.path}")
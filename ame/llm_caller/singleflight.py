@@ -0,0 +1,144 @@
+"""
+在途请求合并（single-flight）
+同一缓存键的并发请求只向上游发起一次：
+- do(): 非流式请求，后到的调用者等待同一个任务的结果
+- stream(): 流式请求，一个上游流扇出给多个订阅者，后加入的订阅者先回放已收到的片段
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Broadcast:
+    """单个上游流的扇出状态"""
+    
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.condition = asyncio.Condition()
+
+
+class SingleFlight:
+    """在途请求合并器（同一事件循环内使用）"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        
+        self.leaders = 0
+        self.coalesced = 0
+        self.stream_leaders = 0
+        self.stream_coalesced = 0
+    
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入同一个键的在途请求
+        
+        Args:
+            key: 请求键
+            factory: 创建上游协程的函数（仅第一个调用者执行）
+        
+        Returns:
+            上游结果（异常同样传递给所有等待者）
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.debug("Joined in-flight LLM request")
+        # shield：某个调用者被取消时不影响其余等待者
+        return await asyncio.shield(task)
+    
+    async def stream(
+        self,
+        key: Hashable,
+        factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        订阅同一个键的上游流
+        
+        所有订阅者都退出后上游流随之取消
+        
+        Args:
+            key: 请求键
+            factory: 创建上游异步迭代器的函数（仅第一个订阅者执行）
+        
+        Yields:
+            文本片段
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.stream_leaders += 1
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, factory))
+        else:
+            self.stream_coalesced += 1
+            logger.debug("Joined in-flight LLM stream")
+        
+        broadcast.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with broadcast.condition:
+                    await broadcast.condition.wait_for(
+                        lambda: len(broadcast.chunks) > position or broadcast.done
+                    )
+                    chunks = broadcast.chunks[position:]
+                    finished = broadcast.done
+                
+                for chunk in chunks:
+                    yield chunk
+                position += len(chunks)
+                
+                if finished and position >= len(broadcast.chunks):
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                broadcast.task.cancel()
+    
+    async def _pump(
+        self,
+        key: Hashable,
+        broadcast: _Broadcast,
+        factory: Callable[[], AsyncIterator[str]]
+    ) -> None:
+        """读取上游流并通知订阅者"""
+        try:
+            async for chunk in factory():
+                async with broadcast.condition:
+                    broadcast.chunks.append(chunk)
+                    broadcast.condition.notify_all()
+        except asyncio.CancelledError:
+            broadcast.error = RuntimeError("LLM stream cancelled")
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            self._streams.pop(key, None)
+            async with broadcast.condition:
+                broadcast.done = True
+                broadcast.condition.notify_all()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """合并统计"""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "stream_leaders": self.stream_leaders,
+            "stream_coalesced": self.stream_coalesced,
+            "in_flight": len(self._calls),
+            "streams_in_flight": len(self._streams)
+        }
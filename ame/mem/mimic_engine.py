@@ -20,7 +20,8 @@ class MimicEngine:
         self,
         llm_caller: LLMCaller,
         vector_store_type: str = "memu",
-        db_path: str = "/app/data/mem_vector_store"
+        db_path: str = "/app/data/mem_vector_store",
+        **store_kwargs
     ):
         """
         初始化模仿引擎
@@ -29,13 +30,15 @@ class MimicEngine:
             llm_caller: LLM 调用器
             vector_store_type: 向量存储类型
             db_path: 数据库路径
+            **store_kwargs: 传递给 VectorStoreFactory 的其他参数
         """
         self.llm_caller = llm_caller
         
         # 创建用户对话记录的向量存储
         self.vector_store = VectorStoreFactory.create(
             store_type=vector_store_type,
-            db_path=db_path
+            db_path=db_path,
+            **store_kwargs
         )
         
         # 创建检索器（更注重时间和关键词）
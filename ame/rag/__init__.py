@@ -4,11 +4,13 @@ RAG (Retrieval-Augmented Generation) 模块
 """
 
 from .knowledge_base import KnowledgeBase
-from .document_manager import DocumentManager
-from .qa_engine import QAEngine
+from .query_cache import QueryCache
+from .ingestion import IngestionQueue, IngestionJob, IngestionQueueFull
 
 __all__ = [
     'KnowledgeBase',
-    'DocumentManager',
-    'QAEngine',
+    'QueryCache',
+    'IngestionQueue',
+    'IngestionJob',
+    'IngestionQueueFull',
 ]
@@ -0,0 +1,381 @@
+"""
+后台导入任务队列
+上传接口只登记任务并立即返回任务 ID，由固定数量的 worker 按 解析（含分块）→ 向量化 → 写入 处理：
+
+- 文件流式解析、按批写入，大文件不会整体加载到内存
+- 进度按已写入分块在文件中的字节位置计算，不需要预先统计分块总数
+- 待处理任务数有上限，超出时拒绝新任务（IngestionQueueFull）
+- 支持预先生成向量的存储上，向量化与写入流水线并行，两阶段之间的有界队列提供背压
+- 任务状态持久化到 SQLite，重启后未完成的任务从已写入的分块之后继续
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from ame.vector_store.base import PrecomputedEmbeddingsMixin
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class IngestionQueueFull(Exception):
+    """待处理任务已达上限"""
+    pass
+
+
+@dataclass
+class IngestionJob:
+    """导入任务"""
+    id: str
+    file_path: str
+    filename: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    # 解析（parse，含分块）/ 向量化（embed）/ 写入（index）；流水线中报告最下游正在进行的阶段
+    stage: str = QUEUED
+    # 已解析的分块数（解析结束后即总数）
+    chunks_total: int = 0
+    chunks_done: int = 0
+    # 文件大小与已写入分块在文件中的字节位置
+    bytes_total: int = 0
+    bytes_done: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # 本次运行开始时已完成的分块数（重启续跑时用于计算吞吐）
+    resumed_from: int = 0
+    
+    @property
+    def progress(self) -> float:
+        if self.status == COMPLETED:
+            return 1.0
+        return min(1.0, self.bytes_done / self.bytes_total) if self.bytes_total else 0.0
+    
+    @property
+    def chunks_per_second(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return (self.chunks_done - self.resumed_from) / elapsed if elapsed > 0 else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("resumed_from")
+        data["progress"] = self.progress
+        data["chunks_per_second"] = self.chunks_per_second
+        return data
+
+
+class IngestionQueue:
+    """后台导入任务队列"""
+    
+    def __init__(
+        self,
+        knowledge_base,
+        db_path: str,
+        workers: int = 2,
+        max_pending: int = 100,
+        batch_size: int = 64,
+        pipeline_depth: int = 2
+    ):
+        """
+        初始化任务队列
+        
+        Args:
+            knowledge_base: KnowledgeBase 实例
+            db_path: 任务状态 SQLite 文件路径
+            workers: 同时处理的任务数
+            max_pending: 排队与处理中的任务数上限
+            batch_size: 每次向量化与写入的分块数
+            pipeline_depth: 已生成向量、等待写入的批次数上限
+        """
+        self.kb = knowledge_base
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.batch_size = max(1, batch_size)
+        self.pipeline_depth = max(1, pipeline_depth)
+        
+        # 未结束的任务
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingestion_jobs ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, status TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ingestion_jobs_status ON ingestion_jobs (status)")
+        self._conn.commit()
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+    
+    async def start(self) -> None:
+        """启动 worker，并重新排入上次未完成的任务"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        for job in self._load_unfinished():
+            job.status = QUEUED
+            job.stage = QUEUED
+            self._jobs[job.id] = job
+            self._queue.put_nowait(job.id)
+        if self._jobs:
+            logger.info(f"Resuming {len(self._jobs)} unfinished ingestion jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        """停止 worker（处理中的任务保持 running 状态，下次启动时续跑）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def submit(
+        self,
+        file_path: str,
+        filename: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> IngestionJob:
+        """
+        登记导入任务
+        
+        Args:
+            file_path: 已保存的文件路径
+            filename: 原始文件名
+            metadata: 写入每个分块的元数据
+        
+        Returns:
+            新任务
+        
+        Raises:
+            IngestionQueueFull: 待处理任务已达上限
+        """
+        if len(self._jobs) >= self.max_pending:
+            raise IngestionQueueFull(f"Ingestion queue is full ({self.max_pending} pending jobs)")
+        await self.start()
+        
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            file_path=file_path,
+            filename=filename,
+            metadata=metadata or {}
+        )
+        self._jobs[job.id] = job
+        self._save(job)
+        self._queue.put_nowait(job.id)
+        logger.info(f"Queued ingestion job {job.id} for {filename}")
+        return job
+    
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """查询任务（含已结束的任务）"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM ingestion_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._decode(row[0]) if row else None
+    
+    def list_jobs(self, limit: int = 50) -> List[IngestionJob]:
+        """最近的任务（按创建时间倒序）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM ingestion_jobs ORDER BY created DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._jobs.get(job_id) or self._decode(data) for job_id, data in rows]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """队列统计"""
+        jobs = list(self._jobs.values())
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": len(jobs),
+            "running": sum(job.status == RUNNING for job in jobs),
+            "chunks_per_second": sum(job.chunks_per_second for job in jobs if job.status == RUNNING)
+        }
+    
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job: IngestionJob) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.finished_at = None
+        job.resumed_from = job.chunks_done
+        self._save(job)
+        try:
+            job.bytes_total = os.path.getsize(job.file_path)
+            await self._index(job, self._batches(job))
+            job.bytes_done = job.bytes_total
+            
+            job.status = COMPLETED
+            job.stage = COMPLETED
+            logger.info(
+                f"Ingestion job {job.id} completed: {job.chunks_total} chunks "
+                f"({job.chunks_per_second:.1f} chunks/s)"
+            )
+        except asyncio.CancelledError:
+            # 服务关闭：保持 running 状态，下次启动时续跑
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.id} failed at {job.stage}: {e}")
+        
+        job.finished_at = time.time()
+        self._save(job)
+        self._jobs.pop(job.id, None)
+    
+    async def _batches(self, job: IngestionJob) -> AsyncIterator[Tuple[List[Dict[str, Any]], int]]:
+        """
+        流式解析文件并按 batch_size 分批
+        
+        解析结果可重复得到，续跑时跳过已写入的分块；chunks_total 随解析推进累加
+        
+        Yields:
+            (分块批次, 批次末尾分块在文件中的字节位置)
+        """
+        job.chunks_total = 0
+        position = 0
+        
+        def track(offset: int) -> None:
+            nonlocal position
+            position = offset
+        
+        batch: List[Dict[str, Any]] = []
+        async for chunk in self.kb.data_processor.iter_file(job.file_path, progress=track):
+            if not chunk.get("content"):
+                continue
+            job.chunks_total += 1
+            if job.chunks_total <= job.chunks_done:
+                continue
+            chunk.setdefault("metadata", {}).update(job.metadata)
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield batch, position
+                batch = []
+        if batch:
+            yield batch, position
+        self._save(job)
+    
+    async def _index(
+        self,
+        job: IngestionJob,
+        batches: AsyncIterator[Tuple[List[Dict[str, Any]], int]]
+    ) -> None:
+        """向量化并写入；存储支持时两个阶段流水线并行"""
+        store = self.kb.vector_store
+        
+        if not isinstance(store, PrecomputedEmbeddingsMixin):
+            job.stage = "parse"
+            async for batch, position in batches:
+                job.stage = "index"
+                if not await store.add_documents(batch):
+                    raise RuntimeError("Vector store failed to index chunks")
+                self._advance(job, len(batch), position)
+                job.stage = "parse"
+            return
+        
+        # 解析 + 向量化与写入并行：写入进行中报告 index，否则报告向量化一侧所处的阶段
+        upstream = "parse"
+        writing = False
+        
+        def enter(stage: str) -> None:
+            nonlocal upstream
+            upstream = stage
+            if not writing:
+                job.stage = stage
+        
+        # 队列满时向量化等待写入消费（背压）
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_depth)
+        
+        async def embed_batches():
+            try:
+                enter("parse")
+                async for batch, position in batches:
+                    enter("embed")
+                    embeddings = await store.embed_documents(batch)
+                    enter("parse")
+                    await embedded.put((batch, position, embeddings))
+                await embedded.put(None)
+            except Exception as e:
+                await embedded.put(e)
+        
+        producer = asyncio.create_task(embed_batches())
+        try:
+            while True:
+                job.stage = upstream
+                item = await embedded.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                batch, position, embeddings = item
+                writing = True
+                job.stage = "index"
+                try:
+                    if not await store.add_embedded_documents(batch, embeddings):
+                        raise RuntimeError("Vector store failed to index chunks")
+                finally:
+                    writing = False
+                self._advance(job, len(batch), position)
+        finally:
+            producer.cancel()
+    
+    def _advance(self, job: IngestionJob, count: int, position: int) -> None:
+        job.chunks_done += count
+        job.bytes_done = max(job.bytes_done, position)
+        self._save(job)
+    
+    def _save(self, job: IngestionJob) -> None:
+        data = json.dumps(asdict(job), ensure_ascii=False)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ingestion_jobs (id, data, status, created) VALUES (?, ?, ?, ?)",
+                    (job.id, data, job.status, job.created_at)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist ingestion job {job.id}: {e}")
+    
+    def _load_unfinished(self) -> List[IngestionJob]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM ingestion_jobs WHERE status IN (?, ?) ORDER BY created",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._decode(row[0]) for row in rows]
+    
+    @staticmethod
+    def _decode(data: str) -> IngestionJob:
+        return IngestionJob(**json.loads(data))
@@ -13,7 +13,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from ame.vector_store.factory import VectorStoreFactory
 from ame.data_processor.processor import DataProcessor
+from ame.data_processor.chunker import TextChunker
 from ame.retrieval.factory import RetrieverFactory
+from .query_cache import QueryCache
 
 
 class KnowledgeBase:
@@ -22,7 +24,12 @@ class KnowledgeBase:
     def __init__(
         self,
         vector_store_type: str = "memu",
-        db_path: str = "/app/data/rag_vector_store"
+        db_path: str = "/app/data/rag_vector_store",
+        query_cache_size: int = 256,
+        query_cache_ttl: float = 300.0,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        **store_kwargs
     ):
         """
         初始化知识库
@@ -30,12 +37,20 @@ class KnowledgeBase:
         Args:
             vector_store_type: 向量存储类型
             db_path: 数据库路径
+            query_cache_size: 检索结果缓存条目数（0 表示禁用）
+            query_cache_ttl: 检索结果缓存有效期（秒）
+            chunk_size: 分块 token 数上限（0 表示按空行切分段落，不合并 / 切分）
+            chunk_overlap: 相邻分块重叠的 token 数
+            **store_kwargs: 传递给 VectorStoreFactory 的其他参数
         """
         self.vector_store = VectorStoreFactory.create(
             store_type=vector_store_type,
-            db_path=db_path
+            db_path=db_path,
+            **store_kwargs
+        )
+        self.data_processor = DataProcessor(
+            chunker=TextChunker(chunk_size, chunk_overlap) if chunk_size > 0 else None
         )
-        self.data_processor = DataProcessor()
         
         # 创建混合检索器
         self.retriever = RetrieverFactory.create_retriever(
@@ -45,37 +60,56 @@ class KnowledgeBase:
             keyword_weight=0.3,
             time_weight=0.1
         )
+        
+        # 检索结果缓存（存储写入代数变化后自动失效）
+        self.query_cache = QueryCache(
+            max_entries=query_cache_size,
+            ttl_seconds=query_cache_ttl
+        )
     
     async def add_document(
         self,
         file_path: str,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        batch_size: int = 256
     ) -> Dict[str, Any]:
         """
         添加文档到知识库
         
+        文件流式解析，每凑满 batch_size 个分块写入一次向量库，
+        大文件（如数 GB 的聊天记录导出）不会整体加载到内存
+        
         Args:
             file_path: 文件路径
             metadata: 元数据
+            batch_size: 每次写入向量库的分块数
             
         Returns:
             处理结果
         """
-        # 处理文件
-        processed_data = await self.data_processor.process_file(file_path)
+        documents_count = 0
+        batch: List[Dict[str, Any]] = []
         
-        # 添加自定义元数据
-        if metadata:
-            for item in processed_data:
+        async for item in self.data_processor.iter_file(file_path):
+            # 添加自定义元数据
+            if metadata:
                 item['metadata'].update(metadata)
+            batch.append(item)
+            
+            if len(batch) >= batch_size:
+                await self.vector_store.add_documents(batch)
+                documents_count += len(batch)
+                batch = []
         
-        # 存储到向量库
-        await self.vector_store.add_documents(processed_data)
+        # 存储剩余分块
+        if batch:
+            await self.vector_store.add_documents(batch)
+            documents_count += len(batch)
         
         return {
             "success": True,
             "file": Path(file_path).name,
-            "documents_count": len(processed_data)
+            "documents_count": documents_count
         }
     
     async def add_text(
@@ -127,13 +161,55 @@ class KnowledgeBase:
         Returns:
             检索结果
         """
+        key = QueryCache.make_key(query, top_k, filters, self.vector_store.generation)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        
         results = await self.retriever.retrieve(
             query=query,
             top_k=top_k,
             filters=filters
         )
         
-        return [r.to_dict() for r in results]
+        results = [r.to_dict() for r in results]
+        self.query_cache.put(key, results)
+        return results
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量检索知识库（评测、多查询扩展等场景）
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询的返回数量
+            filters: 过滤条件
+            
+        Returns:
+            与 queries 对齐的检索结果
+        """
+        generation = self.vector_store.generation
+        keys = [QueryCache.make_key(query, top_k, filters, generation) for query in queries]
+        output = [self.query_cache.get(key) for key in keys]
+        
+        # 只对未命中的查询做一次批量检索
+        missing = [i for i, cached in enumerate(output) if cached is None]
+        if missing:
+            batch = await self.retriever.retrieve_batch(
+                [queries[i] for i in missing],
+                top_k=top_k,
+                filters=filters
+            )
+            for i, results in zip(missing, batch):
+                output[i] = [r.to_dict() for r in results]
+                self.query_cache.put(keys[i], output[i])
+        
+        return output
     
     async def get_statistics(self) -> Dict[str, Any]:
         """获取知识库统计信息"""
@@ -141,5 +217,7 @@ class KnowledgeBase:
         return {
             "total_documents": stats.get("count", 0),
             "last_updated": stats.get("last_updated"),
-            "sources": stats.get("sources", {})
+            "sources": stats.get("sources", {}),
+            "embedding_cache": stats.get("embedding_cache"),
+            "query_cache": self.query_cache.get_stats()
         }
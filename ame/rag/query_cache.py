@@ -0,0 +1,118 @@
+"""
+检索结果缓存
+按 (规范化查询, top_k, 过滤条件, 存储写入代数) 缓存 KnowledgeBase.search 的结果，
+有界 LRU + TTL；写入代数变化后旧条目不再命中并被清理
+"""
+
+import copy
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+CacheKey = Tuple[str, int, str, int]
+
+
+class QueryCache:
+    """检索结果缓存（LRU + TTL）"""
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        """
+        初始化缓存
+        
+        Args:
+            max_entries: 最大条目数，<= 0 表示禁用
+            ttl_seconds: 条目有效期（秒），<= 0 表示不过期
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    @staticmethod
+    def make_key(
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        generation: int
+    ) -> CacheKey:
+        """
+        构建缓存键
+        
+        查询只折叠首尾与连续空白，不改变大小写（向量模型对大小写敏感）
+        """
+        normalized = " ".join(query.split())
+        filters_key = json.dumps(filters or {}, sort_keys=True, ensure_ascii=False, default=str)
+        return (normalized, top_k, filters_key, generation)
+    
+    def get(self, key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+        """查询缓存，未命中或已过期返回 None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._sync_generation(key[3])
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._copy_results(entry[1])
+    
+    def put(self, key: CacheKey, results: List[Dict[str, Any]]) -> None:
+        """写入缓存（超出容量时淘汰最久未使用的条目）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._sync_generation(key[3])
+            if key[3] != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), self._copy_results(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+    
+    @staticmethod
+    def _copy_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 深拷贝：调用方修改结果（含嵌套的 metadata）不影响缓存条目
+        return copy.deepcopy(results)
+    
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds
+    
+    def _sync_generation(self, generation: int) -> None:
+        # 存储写入后整体失效；搜索开始前读取的旧代数结果不会写回
+        if self._generation is None or generation > self._generation:
+            self._entries.clear()
+            self._generation = generation
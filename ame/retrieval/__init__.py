@@ -4,14 +4,19 @@
 
 from .base import RetrieverBase
 from .vector_retriever import VectorRetriever
+from .keyword_retriever import KeywordRetriever
 from .hybrid_retriever import HybridRetriever
+from .fusion import fuse_scores, normalize_scores
 from .reranker import Reranker, RerankerBase
 from .factory import RetrieverFactory
 
 __all__ = [
     "RetrieverBase",
     "VectorRetriever",
+    "KeywordRetriever",
     "HybridRetriever",
+    "fuse_scores",
+    "normalize_scores",
     "Reranker",
     "RerankerBase",
     "RetrieverFactory",
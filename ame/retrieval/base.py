@@ -2,9 +2,12 @@
 检索器抽象基类
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import numpy as np
+from ame.vector_store.features import DocumentFeatures
 
 
 @dataclass
@@ -14,13 +17,28 @@ class RetrievalResult:
     metadata: Dict[str, Any]
     score: float
     source: str = ""
+    doc_id: str = ""
+    # 存储预计算的打分特征（不参与序列化）
+    features: Optional[DocumentFeatures] = field(default=None, repr=False, compare=False)
+    # 文档向量（存储提供时用于向量 MMR，不参与序列化）
+    embedding: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    
+    def get_features(self) -> DocumentFeatures:
+        """预计算特征；存储未提供时由文本计算一次并缓存"""
+        if self.features is None:
+            self.features = DocumentFeatures.from_text(
+                self.content,
+                self.metadata.get("timestamp")
+            )
+        return self.features
     
     def to_dict(self) -> dict:
         return {
             "content": self.content,
             "metadata": self.metadata,
             "score": self.score,
-            "source": self.source
+            "source": self.source,
+            "doc_id": self.doc_id
         }
 
 
@@ -49,6 +67,29 @@ class RetrieverBase(ABC):
         """
         pass
     
+    async def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> List[List[RetrievalResult]]:
+        """
+        批量检索（默认逐个并发调用 retrieve）
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询的返回数量
+            filters: 过滤条件
+            **kwargs: 其他参数
+            
+        Returns:
+            与 queries 对齐的检索结果列表
+        """
+        return list(await asyncio.gather(
+            *(self.retrieve(query, top_k=top_k, filters=filters, **kwargs) for query in queries)
+        ))
+    
     @abstractmethod
     def get_name(self) -> str:
         """获取检索器名称"""
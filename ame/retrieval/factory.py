@@ -6,6 +6,7 @@ from typing import Optional
 from .base import RetrieverBase
 from .vector_retriever import VectorRetriever
 from .hybrid_retriever import HybridRetriever
+from .keyword_retriever import KeywordRetriever
 from .reranker import Reranker, LLMReranker, RerankerBase
 from ame.vector_store.base import VectorStoreBase
 
@@ -25,26 +26,44 @@ class RetrieverFactory:
         Args:
             retriever_type: 检索器类型
                 - vector: 纯向量检索
+                - keyword: BM25 关键词检索
                 - hybrid: 混合检索（向量+关键词+时间）
             vector_store: 向量存储实例
             **kwargs: 其他参数
                 - vector_weight: 向量权重（hybrid）
                 - keyword_weight: 关键词权重（hybrid）
                 - time_weight: 时间权重（hybrid）
+                - use_keyword_index: 使用 BM25 关键词通道（hybrid，默认 True）
+                - fusion: 融合方式 weighted / rrf（hybrid，默认 weighted）
+                - normalization: 分数归一化 none / minmax / zscore（hybrid，默认 minmax）
+                - rrf_k: RRF 平滑常数（hybrid，默认 60）
+                - include_embeddings: 结果附带文档向量（之后用 diversity 重排做向量 MMR 时开启，默认 False）
                 
         Returns:
             检索器实例
         """
+        include_embeddings = kwargs.get("include_embeddings", False)
+        
         if retriever_type == "vector":
-            return VectorRetriever(vector_store=vector_store)
+            return VectorRetriever(vector_store=vector_store, include_embeddings=include_embeddings)
+        
+        elif retriever_type == "keyword":
+            return KeywordRetriever(vector_store=vector_store, include_embeddings=include_embeddings)
         
         elif retriever_type == "hybrid":
-            vector_retriever = VectorRetriever(vector_store=vector_store)
+            vector_retriever = VectorRetriever(vector_store=vector_store, include_embeddings=include_embeddings)
+            keyword_retriever = None
+            if kwargs.get("use_keyword_index", True):
+                keyword_retriever = KeywordRetriever(vector_store=vector_store, include_embeddings=include_embeddings)
             return HybridRetriever(
                 vector_retriever=vector_retriever,
                 vector_weight=kwargs.get("vector_weight", 0.7),
                 keyword_weight=kwargs.get("keyword_weight", 0.2),
-                time_weight=kwargs.get("time_weight", 0.1)
+                time_weight=kwargs.get("time_weight", 0.1),
+                keyword_retriever=keyword_retriever,
+                fusion=kwargs.get("fusion", "weighted"),
+                normalization=kwargs.get("normalization", "minmax"),
+                rrf_k=kwargs.get("rrf_k", 60)
             )
         
         else:
@@ -53,18 +72,21 @@ class RetrieverFactory:
     @staticmethod
     def create_reranker(
         reranker_type: str = "diversity",
-        llm_caller=None
+        llm_caller=None,
+        **kwargs
     ) -> RerankerBase:
         """
         创建重排序器
         
         Args:
             reranker_type: 重排序器类型
-                - diversity: 多样性优先
+                - diversity: 多样性优先（MMR，结果带文档向量时按向量相似度）
                 - relevance: 相关性优先
                 - recency: 时效性优先
                 - llm: 基于LLM的重排序
             llm_caller: LLM调用器（仅llm类型需要）
+            **kwargs: 其他参数
+                - lambda_param: MMR 相关性权重（diversity，默认 0.7）
             
         Returns:
             重排序器实例
@@ -74,4 +96,7 @@ class RetrieverFactory:
                 raise ValueError("LLM reranker requires llm_caller")
             return LLMReranker(llm_caller=llm_caller)
         else:
-            return Reranker(strategy=reranker_type)
+            return Reranker(
+                strategy=reranker_type,
+                lambda_param=kwargs.get("lambda_param", 0.7)
+            )
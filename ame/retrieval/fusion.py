@@ -0,0 +1,126 @@
+"""
+多通道分数融合
+各检索通道（向量 / 关键词 / 时间）的原始分数量纲不同，先在通道内归一化再加权，
+或只看名次做倒数排名融合（RRF）
+
+- normalize_scores: none / minmax / zscore
+- fuse_scores: 按文档键合并各通道分数
+- gather_channels: 并发执行各通道并记录耗时
+"""
+
+import time
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+import numpy as np
+
+FUSION_METHODS = ("weighted", "rrf")
+NORMALIZATION_METHODS = ("none", "minmax", "zscore")
+
+
+def normalize_scores(scores: List[float], method: str = "minmax") -> np.ndarray:
+    """
+    通道内分数归一化
+    
+    Args:
+        scores: 原始分数
+        method: 归一化方法
+            - none: 不处理
+            - minmax: 线性映射到 [0, 1]（全部相等时为 1）
+            - zscore: 减均值除以标准差（全部相等时为 0）
+    
+    Returns:
+        归一化后的分数（float64）
+    """
+    values = np.asarray(scores, dtype=np.float64)
+    if method == "none" or len(values) == 0:
+        return values
+    if method == "minmax":
+        lo, hi = values.min(), values.max()
+        if hi - lo <= 1e-12:
+            return np.ones_like(values)
+        return (values - lo) / (hi - lo)
+    if method == "zscore":
+        std = values.std()
+        if std <= 1e-12:
+            return np.zeros_like(values)
+        return (values - values.mean()) / std
+    raise ValueError(f"Unknown normalization: {method}")
+
+
+def fuse_scores(
+    channels: Dict[str, Dict[str, float]],
+    weights: Dict[str, float],
+    method: str = "weighted",
+    normalization: str = "minmax",
+    rrf_k: int = 60
+) -> Dict[str, float]:
+    """
+    融合多个通道的分数
+    
+    Args:
+        channels: {通道名: {文档键: 原始分数}}，文档不在某通道中表示该通道未召回
+        weights: 通道权重，缺省为 1.0
+        method: 融合方式
+            - weighted: 通道内归一化后加权求和；未召回的文档在 minmax / none 下取 0，
+              zscore 下取比该通道最低分再低一个标准差，召回的文档总是高于未召回的文档
+            - rrf: 倒数排名融合 sum(w / (rrf_k + rank))，rank 从 1 开始，未召回不计分
+        normalization: weighted 方式下的归一化方法
+        rrf_k: RRF 平滑常数
+    
+    Returns:
+        {文档键: 融合分数}
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method}")
+    
+    keys: Dict[str, None] = {}
+    for scores in channels.values():
+        keys.update(dict.fromkeys(scores))
+    fused = dict.fromkeys(keys, 0.0)
+    
+    for name, scores in channels.items():
+        weight = weights.get(name, 1.0)
+        if not scores or weight == 0:
+            continue
+        channel_keys = list(scores)
+        values = [scores[key] for key in channel_keys]
+        
+        if method == "rrf":
+            order = np.argsort(-np.asarray(values, dtype=np.float64), kind='stable')
+            for rank, position in enumerate(order, start=1):
+                fused[channel_keys[position]] += weight / (rrf_k + rank)
+        else:
+            normalized = normalize_scores(values, normalization)
+            # 只有一个命中或分数全部相同时，minmax 全为 1、zscore 全为 0，
+            # 未召回取固定下限才能让该通道的命中获得加分
+            floor = float(normalized.min()) - 1.0 if normalization == "zscore" else 0.0
+            contributions = dict(zip(channel_keys, normalized.tolist()))
+            for key in fused:
+                fused[key] += weight * contributions.get(key, floor)
+    
+    return fused
+
+
+async def _timed(awaitable: Awaitable) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = await awaitable
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def gather_channels(
+    channels: Dict[str, Optional[Awaitable]]
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    并发执行各检索通道
+    
+    Args:
+        channels: {通道名: 协程}，值为 None 的通道跳过
+    
+    Returns:
+        ({通道名: 结果}, {通道名: 耗时毫秒})
+    """
+    names = [name for name, awaitable in channels.items() if awaitable is not None]
+    outputs = await asyncio.gather(*(_timed(channels[name]) for name in names))
+    results = {name: output[0] for name, output in zip(names, outputs)}
+    timings = {name: output[1] for name, output in zip(names, outputs)}
+    return results, timings
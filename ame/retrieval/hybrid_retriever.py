@@ -1,13 +1,19 @@
 """
 混合检索器 - 结合多种检索策略
 支持：向量检索 + 关键词检索 + 时间加权
+各通道分数经 fusion 模块归一化后加权融合，或使用倒数排名融合（RRF）
 """
 
+import math
+import time
+import asyncio
 from typing import List, Dict, Any, Optional
 from .base import RetrieverBase, RetrievalResult
 from .vector_retriever import VectorRetriever
-import re
-from datetime import datetime
+from .keyword_retriever import KeywordRetriever
+from .fusion import fuse_scores, gather_channels, FUSION_METHODS, NORMALIZATION_METHODS
+from ame.vector_store.keyword_index import tokenize
+from ame.vector_store.features import text_token_ids
 from collections import defaultdict
 
 
@@ -19,7 +25,11 @@ class HybridRetriever(RetrieverBase):
         vector_retriever: VectorRetriever,
         vector_weight: float = 0.7,
         keyword_weight: float = 0.2,
-        time_weight: float = 0.1
+        time_weight: float = 0.1,
+        keyword_retriever: Optional[KeywordRetriever] = None,
+        fusion: str = "weighted",
+        normalization: str = "minmax",
+        rrf_k: int = 60
     ):
         """
         初始化混合检索器
@@ -29,17 +39,36 @@ class HybridRetriever(RetrieverBase):
             vector_weight: 向量检索权重
             keyword_weight: 关键词检索权重
             time_weight: 时间权重
+            keyword_retriever: BM25 关键词检索器（作为第二召回通道；
+                为空或存储不支持时只对向量结果做关键词重叠打分）
+            fusion: 融合方式（weighted: 归一化加权 / rrf: 倒数排名融合）
+            normalization: weighted 方式的通道内归一化（none / minmax / zscore）
+            rrf_k: RRF 平滑常数
         """
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        if normalization not in NORMALIZATION_METHODS:
+            raise ValueError(f"Unknown normalization: {normalization}")
+        
         self.vector_retriever = vector_retriever
+        self.keyword_retriever = keyword_retriever
         self.vector_weight = vector_weight
         self.keyword_weight = keyword_weight
         self.time_weight = time_weight
+        self.fusion = fusion
+        self.normalization = normalization
+        self.rrf_k = rrf_k
         
         # 归一化权重
         total = vector_weight + keyword_weight + time_weight
         self.vector_weight /= total
         self.keyword_weight /= total
         self.time_weight /= total
+        
+        # 各通道耗时（毫秒）
+        self.last_timings: Dict[str, float] = {}
+        self._timing_totals: Dict[str, float] = defaultdict(float)
+        self._timing_calls: Dict[str, int] = defaultdict(int)
     
     async def retrieve(
         self,
@@ -58,85 +87,227 @@ class HybridRetriever(RetrieverBase):
             **kwargs: 其他参数
                 - keyword_boost: 关键词加权词列表
                 - time_decay_days: 时间衰减天数
+                - include_embeddings: 结果附带文档向量（之后做向量 MMR 重排时开启）
         """
-        # 1. 向量检索
-        vector_results = await self.vector_retriever.retrieve(
-            query=query,
-            top_k=top_k * 2,  # 取更多结果用于融合
-            filters=filters
-        )
+        results = await self.retrieve_batch([query], top_k=top_k, filters=filters, **kwargs)
+        return results[0]
+    
+    async def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> List[List[RetrievalResult]]:
+        """
+        批量混合检索
+        
+        向量检索合并为一次批量搜索，关键词通道与之并发，之后逐个查询计算时间分数并融合
+        """
+        # 1. 向量检索 + 关键词检索（取更多结果用于融合）
+        use_bm25 = self.keyword_retriever is not None and self.keyword_retriever.available
+        # 时间分数与（没有 BM25 时的）词重叠率使用预计算特征，其余情况不必取回
+        payload = {
+            "include_features": self.time_weight > 0 or (self.keyword_weight > 0 and not use_bm25)
+        }
+        if "include_embeddings" in kwargs:
+            payload["include_embeddings"] = kwargs["include_embeddings"]
         
-        # 2. 关键词匹配分数
+        keyword_task = None
+        if use_bm25:
+            keyword_task = asyncio.gather(*(
+                self.keyword_retriever.retrieve(query, top_k=top_k * 2, filters=filters, **payload)
+                for query in queries
+            ))
+        channels, timings = await gather_channels({
+            "vector": self.vector_retriever.retrieve_batch(
+                queries,
+                top_k=top_k * 2,
+                filters=filters,
+                **payload
+            ),
+            "keyword": keyword_task
+        })
+        keyword_batch = channels.get("keyword") or [None] * len(queries)
+        
+        # 2. 时间通道依赖前两个通道的候选，逐个查询计算后融合
+        fused = []
+        recency_ms = 0.0
+        fusion_ms = 0.0
+        for query, vector_results, keyword_results in zip(queries, channels["vector"], keyword_batch):
+            candidates = self._merge_candidates(vector_results, keyword_results)
+            
+            start = time.perf_counter()
+            time_scores = self._calculate_time_scores(
+                candidates,
+                decay_days=kwargs.get("time_decay_days", 365)
+            )
+            recency_ms += (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            fused.append(self._fuse(
+                query,
+                candidates,
+                vector_results,
+                keyword_results,
+                time_scores,
+                top_k,
+                **kwargs
+            ))
+            fusion_ms += (time.perf_counter() - start) * 1000
+        
+        timings["recency"] = recency_ms
+        timings["fusion"] = fusion_ms
+        self._record_timings(timings)
+        return fused
+    
+    def _merge_candidates(
+        self,
+        vector_results: List[RetrievalResult],
+        keyword_results: Optional[List[RetrievalResult]]
+    ) -> List[RetrievalResult]:
+        """合并两个通道的候选（按文档去重，保留先出现的结果）"""
+        candidates: Dict[str, RetrievalResult] = {}
+        for result in list(vector_results) + list(keyword_results or []):
+            candidates.setdefault(self._result_key(result), result)
+        return list(candidates.values())
+    
+    def _fuse(
+        self,
+        query: str,
+        candidates: List[RetrievalResult],
+        vector_results: List[RetrievalResult],
+        keyword_results: Optional[List[RetrievalResult]],
+        time_scores: Dict[int, float],
+        top_k: int,
+        **kwargs
+    ) -> List[RetrievalResult]:
+        """融合单个查询的向量、关键词与时间分数"""
+        keys = [self._result_key(result) for result in candidates]
+        positions = {key: i for i, key in enumerate(keys)}
+        
+        vector_scores: Dict[int, float] = {}
+        for result in vector_results:
+            vector_scores.setdefault(positions[self._result_key(result)], result.score)
+        
+        bm25_scores: Optional[Dict[int, float]] = None
+        if keyword_results is not None:
+            max_bm25 = max((result.score for result in keyword_results), default=0.0)
+            bm25_scores = {}
+            for result in keyword_results:
+                i = positions[self._result_key(result)]
+                bm25_scores.setdefault(i, result.score / max_bm25 if max_bm25 > 0 else 0.0)
+        
+        # 关键词匹配分数（BM25 或词重叠率，外加 keyword_boost）
         keyword_scores = self._calculate_keyword_scores(
             query, 
-            vector_results,
-            boost_keywords=kwargs.get("keyword_boost", [])
+            candidates,
+            boost_keywords=kwargs.get("keyword_boost", []),
+            bm25_scores=bm25_scores
         )
         
-        # 3. 时间衰减分数
-        time_scores = self._calculate_time_scores(
-            vector_results,
-            decay_days=kwargs.get("time_decay_days", 365)
+        # 融合分数：未被某通道召回（或没有时间戳）的文档不参与该通道的归一化
+        fused = fuse_scores(
+            {
+                "vector": {keys[i]: score for i, score in vector_scores.items()},
+                "keyword": {keys[i]: score for i, score in keyword_scores.items() if score > 0},
+                "time": {keys[i]: score for i, score in time_scores.items()}
+            },
+            weights={
+                "vector": self.vector_weight,
+                "keyword": self.keyword_weight,
+                "time": self.time_weight
+            },
+            method=self.fusion,
+            normalization=self.normalization,
+            rrf_k=self.rrf_k
         )
         
-        # 4. 融合分数
         final_results = []
-        for i, result in enumerate(vector_results):
-            vector_score = result.score
-            keyword_score = keyword_scores.get(i, 0.0)
-            time_score = time_scores.get(i, 0.5)
-            
-            # 加权融合
-            final_score = (
-                self.vector_weight * vector_score +
-                self.keyword_weight * keyword_score +
-                self.time_weight * time_score
-            )
-            
+        for i, result in enumerate(candidates):
             # 创建新的结果对象
             final_results.append(
                 RetrievalResult(
                     content=result.content,
                     metadata={
                         **result.metadata,
-                        "vector_score": vector_score,
-                        "keyword_score": keyword_score,
-                        "time_score": time_score
+                        "vector_score": vector_scores.get(i, 0.0),
+                        "keyword_score": keyword_scores.get(i, 0.0),
+                        "time_score": time_scores.get(i, 0.0)
                     },
-                    score=final_score,
-                    source="hybrid"
+                    score=fused[keys[i]],
+                    source="hybrid",
+                    doc_id=result.doc_id,
+                    features=result.features,
+                    embedding=result.embedding
                 )
             )
         
-        # 5. 按最终分数排序并返回 top_k
+        # 按最终分数排序并返回 top_k
         final_results.sort(key=lambda x: x.score, reverse=True)
         return final_results[:top_k]
     
+    def _record_timings(self, timings: Dict[str, float]) -> None:
+        self.last_timings = timings
+        for name, elapsed in timings.items():
+            self._timing_totals[name] += elapsed
+            self._timing_calls[name] += 1
+    
+    def get_channel_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        各通道耗时统计
+        
+        Returns:
+            {通道名: {"calls", "avg_ms", "last_ms"}}，
+            通道为 vector / keyword / recency，fusion 为融合本身的耗时
+        """
+        return {
+            name: {
+                "calls": self._timing_calls[name],
+                "avg_ms": round(self._timing_totals[name] / self._timing_calls[name], 3),
+                "last_ms": round(self.last_timings.get(name, 0.0), 3)
+            }
+            for name in self._timing_calls
+        }
+    
+    @staticmethod
+    def _result_key(result: RetrievalResult) -> str:
+        """文档去重键"""
+        return result.doc_id or result.content
+    
     def _calculate_keyword_scores(
         self,
         query: str,
         results: List[RetrievalResult],
-        boost_keywords: List[str] = None
+        boost_keywords: List[str] = None,
+        bm25_scores: Optional[Dict[int, float]] = None
     ) -> Dict[int, float]:
-        """计算关键词匹配分数"""
+        """
+        计算关键词匹配分数
+        
+        有 BM25 分数（已按最大值归一化）时用它代替词重叠率；
+        词重叠率基于文档的预计算词项 id，查询只分词一次
+        """
         scores = {}
-        query_lower = query.lower()
-        query_words = set(re.findall(r'\w+', query_lower))
+        query_ids = text_token_ids(tokenize(query))
         
         boost_keywords = boost_keywords or []
         boost_set = set(k.lower() for k in boost_keywords)
         
         for i, result in enumerate(results):
-            content_lower = result.content.lower()
-            content_words = set(re.findall(r'\w+', content_lower))
-            
-            # 计算词重叠率
-            overlap = len(query_words & content_words)
-            overlap_ratio = overlap / max(len(query_words), 1)
+            if bm25_scores is not None:
+                overlap_ratio = bm25_scores.get(i, 0.0)
+            else:
+                # 计算词重叠率
+                overlap = result.get_features().overlap(query_ids)
+                overlap_ratio = overlap / max(len(query_ids), 1)
             
             # 加权词加成
-            boost_score = sum(1 for word in boost_set if word in content_lower)
-            boost_ratio = boost_score / max(len(boost_set), 1) if boost_set else 0
+            boost_ratio = 0
+            if boost_set:
+                content_lower = result.content.lower()
+                boost_score = sum(1 for word in boost_set if word in content_lower)
+                boost_ratio = boost_score / len(boost_set)
             
             # 综合分数
             scores[i] = 0.7 * overlap_ratio + 0.3 * boost_ratio
@@ -148,29 +319,22 @@ class HybridRetriever(RetrieverBase):
         results: List[RetrievalResult],
         decay_days: int = 365
     ) -> Dict[int, float]:
-        """计算时间衰减分数（越新越高）"""
+        """
+        计算时间衰减分数（越新越高）
+        
+        使用预计算的时间戳；没有时间戳的文档不给分，由融合时按未召回处理
+        """
         scores = {}
-        now = datetime.now()
+        now = time.time()
         
         for i, result in enumerate(results):
-            timestamp_str = result.metadata.get("timestamp", "")
+            epoch = result.get_features().epoch
+            if epoch is None:
+                continue
             
-            try:
-                # 尝试解析时间戳
-                if timestamp_str:
-                    doc_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                    days_diff = (now - doc_time).days
-                    
-                    # 指数衰减：score = e^(-days/decay_days)
-                    import math
-                    score = math.exp(-days_diff / decay_days)
-                    scores[i] = score
-                else:
-                    # 没有时间戳，给中等分数
-                    scores[i] = 0.5
-            except:
-                # 解析失败，给中等分数
-                scores[i] = 0.5
+            # 指数衰减：score = e^(-days/decay_days)
+            days_diff = (now - epoch) // 86400
+            scores[i] = math.exp(-days_diff / decay_days)
         
         return scores
     
@@ -0,0 +1,75 @@
+"""
+关键词检索器 - 基于 BM25 倒排索引的检索
+"""
+
+from typing import List, Dict, Any, Optional
+from .base import RetrieverBase, RetrievalResult
+from ame.vector_store.base import VectorStoreBase
+
+
+class KeywordRetriever(RetrieverBase):
+    """关键词检索器"""
+    
+    def __init__(
+        self,
+        vector_store: VectorStoreBase,
+        include_features: bool = False,
+        include_embeddings: bool = False
+    ):
+        """
+        初始化关键词检索器
+        
+        Args:
+            vector_store: 向量存储实例（需提供 keyword_search）
+            include_features: 结果默认附带预计算特征（混合检索打分使用）
+            include_embeddings: 结果默认附带文档向量（之后做向量 MMR 重排时开启）
+        """
+        self.vector_store = vector_store
+        self.include_features = include_features
+        self.include_embeddings = include_embeddings
+    
+    @property
+    def available(self) -> bool:
+        """底层存储是否提供关键词检索"""
+        return self.vector_store.supports_keyword_search
+    
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> List[RetrievalResult]:
+        """
+        使用 BM25 检索
+        
+        Args:
+            query: 查询文本
+            top_k: 返回结果数量
+            filters: 过滤条件（同向量检索）
+            **kwargs: 其他参数
+                - include_features / include_embeddings: 覆盖实例默认值
+        """
+        results = await self.vector_store.keyword_search(
+            query=query,
+            limit=top_k,
+            filter=filters,
+            include_features=kwargs.get("include_features", self.include_features),
+            include_embeddings=kwargs.get("include_embeddings", self.include_embeddings)
+        )
+        
+        return [
+            RetrievalResult(
+                content=item.get("content", ""),
+                metadata=item.get("metadata", {}),
+                score=item.get("keyword_score", 0.0),
+                source="keyword",
+                doc_id=item.get("id", ""),
+                features=item.get("features"),
+                embedding=item.get("embedding")
+            )
+            for item in results
+        ]
+    
+    def get_name(self) -> str:
+        return "KeywordRetriever"
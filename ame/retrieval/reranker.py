@@ -3,9 +3,73 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 from .base import RetrievalResult
-import re
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    similarity: np.ndarray,
+    k: Optional[int] = None,
+    lambda_param: float = 0.7
+) -> List[int]:
+    """
+    MMR 选择顺序
+    
+    相似度矩阵只算一次；每选中一个文档，用它的相似度行更新"与已选文档的最大相似度"向量，
+    每轮只是一次向量运算加 argmax
+    
+    Args:
+        relevance: (n,) 与查询的相关性
+        similarity: (n, n) 文档两两相似度
+        k: 选择数量，None 表示全部
+        lambda_param: 相关性权重
+        
+    Returns:
+        选中文档的下标（按选择顺序）
+    """
+    n = len(relevance)
+    k = n if k is None else min(k, n)
+    if k <= 0:
+        return []
+    
+    relevance = np.asarray(relevance, dtype=np.float64)
+    first = int(np.argmax(relevance))
+    order = [first]
+    max_sim = similarity[first].astype(np.float64)
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+    
+    while len(order) < k:
+        mmr = lambda_param * relevance - (1 - lambda_param) * max_sim
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        order.append(pick)
+        available[pick] = False
+        np.maximum(max_sim, similarity[pick], out=max_sim)
+    
+    return order
+
+
+def embedding_similarity(embeddings: np.ndarray) -> np.ndarray:
+    """向量两两余弦相似度"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.maximum(norms, 1e-12)
+    return unit @ unit.T
+
+
+def jaccard_similarity(token_sets: List[np.ndarray]) -> np.ndarray:
+    """词项集合两两 Jaccard 相似度（文档-词项 0/1 矩阵相乘得到交集大小）"""
+    n = len(token_sets)
+    vocab, columns = np.unique(np.concatenate(token_sets), return_inverse=True)
+    incidence = np.zeros((n, len(vocab)), dtype=np.float32)
+    rows = np.repeat(np.arange(n), [len(tokens) for tokens in token_sets])
+    incidence[rows, columns] = 1.0
+    intersection = incidence @ incidence.T
+    sizes = incidence.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
 
 
 class RerankerBase(ABC):
@@ -35,7 +99,7 @@ class RerankerBase(ABC):
 class Reranker(RerankerBase):
     """基于规则的重排序器"""
     
-    def __init__(self, strategy: str = "diversity"):
+    def __init__(self, strategy: str = "diversity", lambda_param: float = 0.7):
         """
         初始化重排序器
         
@@ -44,8 +108,10 @@ class Reranker(RerankerBase):
                 - diversity: 多样性优先
                 - relevance: 相关性优先
                 - recency: 时效性优先
+            lambda_param: MMR 相关性权重（diversity）
         """
         self.strategy = strategy
+        self.lambda_param = lambda_param
     
     async def rerank(
         self,
@@ -58,7 +124,7 @@ class Reranker(RerankerBase):
             return results
         
         if self.strategy == "diversity":
-            reranked = await self._diversity_rerank(results)
+            reranked = await self._diversity_rerank(results, top_k)
         elif self.strategy == "recency":
             reranked = await self._recency_rerank(results)
         else:  # relevance
@@ -68,77 +134,45 @@ class Reranker(RerankerBase):
             return reranked[:top_k]
         return reranked
     
-    async def _diversity_rerank(self, results: List[RetrievalResult]) -> List[RetrievalResult]:
+    async def _diversity_rerank(
+        self,
+        results: List[RetrievalResult],
+        top_k: int = None
+    ) -> List[RetrievalResult]:
         """
         多样性重排序：避免内容重复
         使用 MMR (Maximal Marginal Relevance) 策略
+        
+        全部结果带有文档向量时按余弦相似度，否则按预计算词项集合的 Jaccard 相似度
         """
         if len(results) <= 1:
             return results
         
-        selected = [results[0]]  # 选择第一个（最相关的）
-        remaining = results[1:]
-        
-        lambda_param = 0.7  # 相关性权重
-        
-        while remaining and len(selected) < len(results):
-            max_mmr = -float('inf')
-            max_idx = 0
-            
-            for i, candidate in enumerate(remaining):
-                # 计算与查询的相关性
-                relevance = candidate.score
-                
-                # 计算与已选择文档的最大相似度
-                max_sim = 0
-                for selected_doc in selected:
-                    sim = self._calculate_similarity(candidate, selected_doc)
-                    max_sim = max(max_sim, sim)
-                
-                # MMR 分数
-                mmr = lambda_param * relevance - (1 - lambda_param) * max_sim
-                
-                if mmr > max_mmr:
-                    max_mmr = mmr
-                    max_idx = i
-            
-            # 选择 MMR 最高的文档
-            selected.append(remaining.pop(max_idx))
-        
-        return selected
+        relevance = np.array([result.score for result in results])
+        order = maximal_marginal_relevance(
+            relevance,
+            self._similarity_matrix(results),
+            top_k,
+            self.lambda_param
+        )
+        return [results[i] for i in order]
     
     async def _recency_rerank(self, results: List[RetrievalResult]) -> List[RetrievalResult]:
-        """时效性重排序：优先返回最新的文档"""
-        from datetime import datetime
-        
+        """时效性重排序：优先返回最新的文档（使用预计算时间戳，缺失的排在最后）"""
         def get_time_score(result: RetrievalResult) -> float:
-            timestamp_str = result.metadata.get("timestamp", "")
-            try:
-                if timestamp_str:
-                    doc_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                    return doc_time.timestamp()
-                return 0
-            except:
-                return 0
+            epoch = result.get_features().epoch
+            return epoch if epoch is not None else 0
         
         # 按时间戳排序（最新的在前）
         sorted_results = sorted(results, key=get_time_score, reverse=True)
         return sorted_results
     
-    def _calculate_similarity(self, doc1: RetrievalResult, doc2: RetrievalResult) -> float:
-        """
-        计算两个文档的相似度（简化版：基于词重叠）
-        """
-        words1 = set(re.findall(r'\w+', doc1.content.lower()))
-        words2 = set(re.findall(r'\w+', doc2.content.lower()))
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = len(words1 & words2)
-        union = len(words1 | words2)
-        
-        return intersection / union if union > 0 else 0.0
+    def _similarity_matrix(self, results: List[RetrievalResult]) -> np.ndarray:
+        """候选文档两两相似度"""
+        embeddings = [result.embedding for result in results]
+        if all(embedding is not None for embedding in embeddings):
+            return embedding_similarity(np.vstack(embeddings))
+        return jaccard_similarity([result.get_features().token_ids for result in results])
 
 
 class LLMReranker(RerankerBase):
@@ -10,14 +10,23 @@ from ame.vector_store.base import VectorStoreBase
 class VectorRetriever(RetrieverBase):
     """向量检索器"""
     
-    def __init__(self, vector_store: VectorStoreBase):
+    def __init__(
+        self,
+        vector_store: VectorStoreBase,
+        include_features: bool = False,
+        include_embeddings: bool = False
+    ):
         """
         初始化向量检索器
         
         Args:
             vector_store: 向量存储实例
+            include_features: 结果默认附带预计算特征（混合检索打分使用）
+            include_embeddings: 结果默认附带文档向量（之后做向量 MMR 重排时开启）
         """
         self.vector_store = vector_store
+        self.include_features = include_features
+        self.include_embeddings = include_embeddings
     
     async def retrieve(
         self,
@@ -36,15 +45,34 @@ class VectorRetriever(RetrieverBase):
             **kwargs: 其他参数
                 - min_score: 最小相似度阈值
                 - embedding_model: 自定义嵌入模型
+                - include_features / include_embeddings: 覆盖实例默认值
         """
+        results = await self.retrieve_batch([query], top_k=top_k, filters=filters, **kwargs)
+        return results[0]
+    
+    async def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> List[List[RetrievalResult]]:
+        """批量向量检索（向量存储一次批量搜索）"""
         # 从向量存储中搜索
-        results = await self.vector_store.search(
-            query=query,
+        batch = await self.vector_store.search_batch(
+            queries,
             limit=top_k,
-            filter=filters
+            filter=filters,
+            include_similarity=True,
+            include_features=kwargs.get("include_features", self.include_features),
+            include_embeddings=kwargs.get("include_embeddings", self.include_embeddings)
         )
         
-        # 转换为统一的检索结果格式
+        min_score = kwargs.get("min_score", 0.0)
+        return [self._to_results(results, min_score) for results in batch]
+    
+    def _to_results(self, results: List[Dict], min_score: float) -> List[RetrievalResult]:
+        """转换为统一的检索结果格式，并应用最小分数过滤"""
         retrieval_results = []
         for item in results:
             retrieval_results.append(
@@ -52,12 +80,13 @@ class VectorRetriever(RetrieverBase):
                     content=item.get("content", ""),
                     metadata=item.get("metadata", {}),
                     score=item.get("similarity", 0.0),
-                    source="vector"
+                    source="vector",
+                    doc_id=item.get("id", ""),
+                    features=item.get("features"),
+                    embedding=item.get("embedding")
                 )
             )
         
-        # 应用最小分数过滤
-        min_score = kwargs.get("min_score", 0.0)
         if min_score > 0:
             retrieval_results = [r for r in retrieval_results if r.score >= min_score]
         
@@ -0,0 +1,444 @@
+"""
+近似最近邻索引
+为 MemuVectorStore 提供可插拔的候选召回：纯 NumPy IVF-Flat，或基于 hnswlib 的 HNSW（可选依赖）
+
+索引只负责返回候选行号，最终分数由存储用原始向量精确重算。
+行号与 MemuVectorStore 的文档下标一致，删除后随之前移。
+"""
+
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from .embedding_buffer import EmbeddingBuffer, GrowableArray
+
+logger = logging.getLogger(__name__)
+
+
+class ANNIndexBase(ABC):
+    """近似最近邻索引抽象基类"""
+
+    name = "base"
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """已索引的行数"""
+        pass
+
+    @abstractmethod
+    def reset(self, embeddings: EmbeddingBuffer) -> None:
+        """
+        基于全部向量重建索引
+
+        Args:
+            embeddings: 存储的向量缓冲区
+        """
+        pass
+
+    @abstractmethod
+    def add(self, embeddings: EmbeddingBuffer, start: int) -> None:
+        """
+        增量索引新追加的行 [start, len(embeddings))
+
+        Args:
+            embeddings: 存储的向量缓冲区
+            start: 新行起始行号
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, indices: Sequence[int]) -> None:
+        """
+        删除行（之后的行号前移）
+
+        Args:
+            indices: 被删除的行号
+        """
+        pass
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        """
+        召回候选
+
+        Args:
+            query: 查询向量
+            k: 需要的结果数
+
+        Returns:
+            候选行号；返回 None 表示索引尚不可用，调用方应回退到暴力检索
+        """
+        pass
+
+    @abstractmethod
+    def save(self, path: str) -> None:
+        """保存到 path（前缀，扩展名由实现决定）"""
+        pass
+
+    @abstractmethod
+    def load(self, path: str, expected_rows: int) -> bool:
+        """
+        从 path 加载
+
+        Args:
+            path: 路径前缀
+            expected_rows: 期望行数，不一致时视为失效
+
+        Returns:
+            是否加载成功
+        """
+        pass
+
+
+class IVFFlatIndex(ANNIndexBase):
+    """
+    IVF-Flat 索引（纯 NumPy）
+
+    - 球面 k-means 训练 nlist 个聚类中心
+    - 每行记录所属聚类；新增行直接分配到最近中心
+    - 查询时只扫描最近的 nprobe 个聚类
+    - 倒排表（按聚类排序的行号 + 偏移）延迟构建；新增行较少时单独扫描，不触发重建
+    - 数据量相对上次训练增长 retrain_growth 倍后重新训练
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 4096,
+        retrain_growth: float = 4.0,
+        kmeans_iters: int = 10,
+        seed: int = 0
+    ):
+        """
+        初始化 IVF 索引
+
+        Args:
+            embedding_dim: 向量维度
+            nlist: 聚类数（默认训练时取 sqrt(N)）
+            nprobe: 查询时扫描的聚类数
+            min_train_size: 达到该行数才训练，之前回退到暴力检索
+            retrain_growth: 行数增长到上次训练的多少倍时重新训练
+            kmeans_iters: k-means 迭代次数
+            seed: 随机种子
+        """
+        self.embedding_dim = embedding_dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self._assign = np.empty(0, dtype=np.int32)
+        self._size = 0
+        # 倒排表 (按聚类排序的行号, 各聚类起始偏移, 覆盖的行数 n)，覆盖 [0, n) 行；
+        # 检索线程可能并发重建，整体替换该元组以保证读取方看到一致的三项
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray, int]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def assignments(self) -> np.ndarray:
+        """每行所属聚类（未训练时为 -1）"""
+        return self._assign[:self._size]
+
+    # ---------- 构建 ----------
+
+    def reset(self, embeddings: EmbeddingBuffer) -> None:
+        self.centroids = None
+        self.trained_size = 0
+        self._assign = np.empty(0, dtype=np.int32)
+        self._size = 0
+        self.add(embeddings, 0)
+
+    def add(self, embeddings: EmbeddingBuffer, start: int) -> None:
+        total = len(embeddings)
+        if total <= start:
+            return
+
+        if self.centroids is None:
+            if total >= self.min_train_size:
+                self._train(embeddings)
+            else:
+                self._append_assignments(np.full(total - start, -1, dtype=np.int32))
+            return
+
+        if total >= self.trained_size * self.retrain_growth:
+            self._train(embeddings)
+            return
+
+        new_rows = embeddings.take(np.arange(start, total))
+        self._append_assignments(self._nearest(new_rows, self.centroids))
+
+    def _append_assignments(self, assign: np.ndarray) -> None:
+        n = len(assign)
+        if self._size + n > len(self._assign):
+            capacity = max(1024, len(self._assign))
+            while capacity < self._size + n:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=np.int32)
+            grown[:self._size] = self._assign[:self._size]
+            self._assign = grown
+        self._assign[self._size:self._size + n] = assign
+        self._size += n
+
+    def _invalidate_lists(self) -> None:
+        self._lists = None
+
+    def _build_lists(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """按聚类构建倒排表（构建完成后一次性发布）"""
+        size = self._size
+        assign = self._assign[:size]
+        counts = np.bincount(assign, minlength=len(self.centroids))
+        lists = (
+            np.argsort(assign, kind='stable').astype(np.int64),
+            np.concatenate([[0], np.cumsum(counts)]),
+            size
+        )
+        self._lists = lists
+        return lists
+
+    def _train(self, embeddings: EmbeddingBuffer) -> None:
+        """训练聚类中心并重新分配全部行"""
+        total = len(embeddings)
+        nlist = self.nlist or max(1, int(np.sqrt(total)))
+        nlist = min(nlist, total)
+        rng = np.random.default_rng(self.seed)
+
+        sample_size = min(total, nlist * 64)
+        sample_rows = np.sort(rng.choice(total, sample_size, replace=False))
+        sample = embeddings.take(sample_rows)
+        self.centroids = self._kmeans(sample, nlist, rng)
+
+        self._size = 0
+        for _, block in embeddings.blocks(65536):
+            self._append_assignments(self._nearest(block, self.centroids))
+        self.trained_size = total
+        self._invalidate_lists()
+        logger.info(f"Trained IVF index: {nlist} lists over {total} vectors")
+
+    def _kmeans(self, x: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+        """球面 k-means（中心归一化，按内积分配）"""
+        centroids = x[rng.choice(len(x), k, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assign = self._nearest(x, centroids)
+            order = np.argsort(assign, kind='stable')
+            counts = np.bincount(assign, minlength=k)
+            nonempty = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.add.reduceat(x[order], starts[nonempty], axis=0)
+            centroids[nonempty] = sums
+            # 空聚类重新随机初始化
+            empty = np.flatnonzero(~nonempty)
+            if len(empty):
+                centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.maximum(norms, 1e-12)
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """最近中心（分块避免大中间矩阵）"""
+        out = np.empty(len(x), dtype=np.int32)
+        for start in range(0, len(x), 8192):
+            out[start:start + 8192] = np.argmax(x[start:start + 8192] @ centroids.T, axis=1)
+        return out
+
+    # ---------- 查询 ----------
+
+    def delete(self, indices: Sequence[int]) -> None:
+        remaining = np.delete(self.assignments, list(indices))
+        self._size = 0
+        self._append_assignments(remaining)
+        self._invalidate_lists()
+
+    def search(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return None
+
+        # 倒排表之外的新增行超过 1/8 时重建
+        lists = self._lists
+        if lists is None or (self._size - lists[2]) * 8 > self._size:
+            lists = self._build_lists()
+        list_rows, list_offsets, lists_rows = lists
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        recent = self._assign[lists_rows:self._size]
+        while True:
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            parts = [list_rows[list_offsets[c]:list_offsets[c + 1]] for c in probes]
+            parts.append(lists_rows + np.flatnonzero(np.isin(recent, probes)))
+            candidates = np.concatenate(parts)
+            # 候选不足时扩大探测范围
+            if len(candidates) >= k or nprobe >= len(self.centroids):
+                return candidates
+            nprobe = min(nprobe * 2, len(self.centroids))
+
+    # ---------- 持久化 ----------
+
+    def save(self, path: str) -> None:
+        if self.centroids is None:
+            return
+        np.savez(
+            path + ".npz",
+            centroids=self.centroids,
+            assignments=self.assignments,
+            trained_size=self.trained_size
+        )
+
+    def load(self, path: str, expected_rows: int) -> bool:
+        if not os.path.exists(path + ".npz"):
+            return False
+        data = np.load(path + ".npz")
+        if len(data["assignments"]) != expected_rows or data["centroids"].shape[1] != self.embedding_dim:
+            return False
+        self.centroids = data["centroids"]
+        self.trained_size = int(data["trained_size"])
+        self._size = 0
+        self._append_assignments(data["assignments"])
+        self._invalidate_lists()
+        return True
+
+
+class HNSWIndex(ANNIndexBase):
+    """
+    HNSW 索引（需要安装 hnswlib）
+
+    hnswlib 的 label 固定不变，这里维护 行号 -> label 映射以适配行号前移；
+    两个映射都是容量倍增的数组，追加时只写入新增部分
+    """
+
+    name = "hnsw"
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64
+    ):
+        """
+        初始化 HNSW 索引
+
+        Args:
+            embedding_dim: 向量维度
+            M: 图中每个节点的连接数
+            ef_construction: 构建时的候选队列长度
+            ef_search: 查询时的候选队列长度
+        """
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("HNSW index requires hnswlib: pip install hnswlib") from e
+
+        self._hnswlib = hnswlib
+        self.embedding_dim = embedding_dim
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._new_index(1024)
+
+    def _new_index(self, capacity: int) -> None:
+        self._index = self._hnswlib.Index(space='ip', dim=self.embedding_dim)
+        self._index.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.M)
+        self._row_labels = GrowableArray(np.int64)
+        self._label_rows = GrowableArray(np.int64)
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._row_labels)
+
+    def reset(self, embeddings: EmbeddingBuffer) -> None:
+        self._new_index(max(1024, len(embeddings)))
+        self.add(embeddings, 0)
+
+    def add(self, embeddings: EmbeddingBuffer, start: int) -> None:
+        total = len(embeddings)
+        if total <= start:
+            return
+        n = total - start
+        labels = np.arange(self._next_label, self._next_label + n, dtype=np.int64)
+
+        needed = self._next_label + n
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+        for offset in range(0, n, 65536):
+            rows = np.arange(start + offset, min(start + offset + 65536, total))
+            self._index.add_items(embeddings.take(rows), labels[offset:offset + len(rows)])
+
+        # 新 label 连续分配，对应的行号接在现有行之后
+        first_row = len(self._row_labels)
+        self._next_label += n
+        self._row_labels.extend(labels)
+        self._label_rows.extend(np.arange(first_row, first_row + n, dtype=np.int64))
+
+    def _rebuild_label_rows(self) -> None:
+        label_rows = np.full(self._next_label, -1, dtype=np.int64)
+        label_rows[self._row_labels.values] = np.arange(len(self._row_labels))
+        self._label_rows.replace(label_rows)
+
+    def delete(self, indices: Sequence[int]) -> None:
+        indices = list(indices)
+        for label in self._row_labels.values[indices]:
+            self._index.mark_deleted(int(label))
+        self._row_labels.delete(indices)
+        self._rebuild_label_rows()
+
+    def search(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        live = len(self._row_labels)
+        if live == 0:
+            return None
+        k = min(k, live)
+        self._index.set_ef(max(self.ef_search, k))
+        labels, _ = self._index.knn_query(query.reshape(1, -1), k=k)
+        rows = self._label_rows.values[labels[0]]
+        return rows[rows >= 0]
+
+    def save(self, path: str) -> None:
+        self._index.save_index(path + ".bin")
+        np.savez(path + ".npz", row_labels=self._row_labels.values, next_label=self._next_label)
+
+    def load(self, path: str, expected_rows: int) -> bool:
+        if not (os.path.exists(path + ".bin") and os.path.exists(path + ".npz")):
+            return False
+        data = np.load(path + ".npz")
+        if len(data["row_labels"]) != expected_rows:
+            return False
+        self._index = self._hnswlib.Index(space='ip', dim=self.embedding_dim)
+        self._index.load_index(path + ".bin")
+        self._row_labels = GrowableArray(np.int64)
+        self._row_labels.extend(data["row_labels"])
+        self._next_label = int(data["next_label"])
+        self._rebuild_label_rows()
+        return True
+
+
+def create_ann_index(index_type: str, embedding_dim: int, **params) -> Optional[ANNIndexBase]:
+    """
+    创建近似最近邻索引
+
+    Args:
+        index_type: 'flat'（不使用索引，暴力检索）、'ivf' 或 'hnsw'
+        embedding_dim: 向量维度
+        **params: 索引参数
+
+    Returns:
+        索引实例；flat 返回 None
+    """
+    index_type = (index_type or "flat").lower()
+    if index_type == "flat":
+        return None
+    if index_type == "ivf":
+        return IVFFlatIndex(embedding_dim, **params)
+    if index_type == "hnsw":
+        return HNSWIndex(embedding_dim, **params)
+    raise ValueError(f"Unsupported ANN index type: {index_type}")
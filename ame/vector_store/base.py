@@ -3,13 +3,25 @@
 支持多种向量数据库实现
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 
 
 class VectorStoreBase(ABC):
     """向量存储抽象基类"""
     
+    # 写入代数：每次增删或清空后加一，上层缓存以此判断结果是否过期
+    _write_generation: int = 0
+    
+    @property
+    def generation(self) -> int:
+        """当前写入代数"""
+        return self._write_generation
+    
+    def _bump_generation(self) -> None:
+        self._write_generation += 1
+    
     @abstractmethod
     async def add_documents(self, documents: List[Dict]) -> bool:
         """
@@ -43,6 +55,55 @@ class VectorStoreBase(ABC):
         """
         pass
     
+    async def search_batch(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        **kwargs
+    ) -> List[List[Dict]]:
+        """
+        批量语义搜索
+        
+        默认逐个并发调用 search，实现可覆盖为一次批量计算
+        
+        Args:
+            queries: 查询文本列表
+            limit: 每个查询的返回数量
+            **kwargs: 其他参数（同 search）
+            
+        Returns:
+            与 queries 对齐的结果列表
+        """
+        return list(await asyncio.gather(
+            *(self.search(query, limit=limit, **kwargs) for query in queries)
+        ))
+    
+    async def keyword_search(
+        self,
+        query: str,
+        limit: int = 5,
+        **kwargs
+    ) -> List[Dict]:
+        """
+        关键词检索（BM25）
+        
+        默认不支持，返回空列表；混合检索据此退回到只对向量结果做关键词打分
+        
+        Args:
+            query: 查询文本
+            limit: 返回数量
+            **kwargs: 过滤参数（同 search）
+            
+        Returns:
+            相关文档列表，每个文档带 keyword_score
+        """
+        return []
+    
+    @property
+    def supports_keyword_search(self) -> bool:
+        """是否提供关键词检索通道"""
+        return False
+    
     @abstractmethod
     async def delete_documents(self, ids: List[str]) -> bool:
         """
@@ -75,3 +136,38 @@ class VectorStoreBase(ABC):
             是否清空成功
         """
         pass
+
+
+class PrecomputedEmbeddingsMixin(ABC):
+    """
+    支持先生成向量再写入的存储
+    
+    导入流水线检测到该接口时，向量化与写入两个阶段并行执行
+    """
+    
+    @abstractmethod
+    async def embed_documents(self, documents: List[Dict]) -> Any:
+        """
+        为文档生成向量（不写入）
+        
+        Args:
+            documents: 文档列表
+            
+        Returns:
+            向量矩阵
+        """
+        pass
+    
+    @abstractmethod
+    async def add_embedded_documents(self, documents: List[Dict], embeddings: Any) -> bool:
+        """
+        写入已生成向量的文档
+        
+        Args:
+            documents: 文档列表
+            embeddings: embed_documents 返回的向量矩阵
+            
+        Returns:
+            是否添加成功
+        """
+        pass
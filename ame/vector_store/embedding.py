@@ -0,0 +1,168 @@
+"""
+批量向量生成
+使用 AsyncOpenAI 的多输入 embeddings 请求，按数量和 token 预算分批并发发送
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# 中日韩字符大致按 1 字 1 token 估算，其余字符按 4 字符 1 token
+_CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本 token 数（不依赖 tokenizer）"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4 + 1
+
+
+class OpenAIEmbedder:
+    """
+    OpenAI 兼容接口的批量向量生成器
+
+    特性：
+    - 单个请求携带多条输入（list input）
+    - 按条数与 token 预算切分批次
+    - 多个批次并发请求，限制同时在途数量
+    - 失败批次指数退避重试
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        batch_size: int = 256,
+        max_batch_tokens: int = 100000,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        timeout: float = 60.0,
+        http_client=None
+    ):
+        """
+        初始化向量生成器
+
+        Args:
+            api_key: API Key（默认读取 OPENAI_API_KEY）
+            base_url: API Base URL（默认读取 OPENAI_BASE_URL，可指向本地桩服务）
+            model: 向量模型
+            batch_size: 单个请求最多包含的文本条数
+            max_batch_tokens: 单个请求的 token 预算（估算值）
+            max_concurrency: 同时在途的请求数
+            max_retries: 每个批次的最大尝试次数
+            timeout: 请求超时时间（秒）
+            http_client: 共享的 httpx.AsyncClient（与对话请求复用连接池），默认单独创建
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        self.model = model
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.http_client = http_client
+        self._client = None
+
+    def _get_client(self):
+        """延迟初始化异步客户端"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,  # 手动处理重试
+                http_client=self.http_client
+            )
+        return self._client
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        按条数与 token 预算切分批次
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            每个批次包含的文本下标
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= self.batch_size or
+                current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        批量生成向量
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            (len(texts), dim) float32 矩阵，行顺序与输入一致
+
+        Raises:
+            Exception: 某个批次重试后仍失败
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # 空字符串会被接口拒绝
+        inputs = [text if text.strip() else " " for text in texts]
+        batches = self.make_batches(inputs)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(indices: List[int]) -> np.ndarray:
+            async with semaphore:
+                return await self._embed_batch([inputs[i] for i in indices])
+
+        results = await asyncio.gather(*(run(indices) for indices in batches))
+
+        dim = results[0].shape[1]
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for indices, vectors in zip(batches, results):
+            embeddings[indices] = vectors
+
+        logger.debug(f"Embedded {len(texts)} texts in {len(batches)} requests")
+        return embeddings
+
+    async def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        """发送单个批次请求（带重试）"""
+        client = self._get_client()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries):
+            try:
+                response = await client.embeddings.create(model=self.model, input=batch)
+                data = sorted(response.data, key=lambda item: item.index)
+                return np.array([item.embedding for item in data], dtype=np.float32)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Embedding batch attempt {attempt + 1} failed: {str(e)}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep((2 ** attempt) * 0.5)
+
+        raise Exception(f"Embedding failed after {self.max_retries} attempts: {str(last_error)}")
@@ -0,0 +1,211 @@
+"""
+向量缓冲区
+预分配、按容量倍增的 float32 矩阵，替代逐行 np.vstack
+"""
+
+from typing import Iterator, Optional, Sequence, Tuple
+import numpy as np
+
+
+def _is_mapped(array: np.ndarray) -> bool:
+    """
+    是否真正映射到文件
+
+    对 np.memmap 做花式索引、运算得到的拷贝在部分 NumPy 版本中仍是 np.memmap 子类，
+    但 filename 为空、数据在堆上，不能按映射计
+    """
+    return isinstance(array, np.memmap) and getattr(array, "filename", None) is not None
+
+
+class EmbeddingBuffer:
+    """
+    向量缓冲区
+
+    由两段组成：
+        - 快照段：只读，可以是内存映射（np.memmap）
+        - 追加段：预分配的 float32 缓冲区，容量不足时翻倍，逻辑行数单独记录
+
+    追加 n 行的摊销代价为 O(n)，不会像 np.vstack 那样每次复制整个矩阵。
+    """
+
+    def __init__(self, embedding_dim: int, initial_capacity: int = 1024, dtype=np.float32):
+        """
+        初始化缓冲区
+
+        Args:
+            embedding_dim: 向量维度
+            initial_capacity: 追加段初始容量（行）
+            dtype: 元素类型（量化存储时为 float16 / int8）
+        """
+        self.embedding_dim = embedding_dim
+        self.initial_capacity = initial_capacity
+        self.dtype = np.dtype(dtype)
+        self._base = self._empty()
+        self._data = self._empty()
+        self._size = 0
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros((0, self.embedding_dim), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self._base) + self._size
+
+    @property
+    def capacity(self) -> int:
+        """追加段容量（行）"""
+        return len(self._data)
+
+    @property
+    def base(self) -> np.ndarray:
+        """快照段"""
+        return self._base
+
+    @property
+    def tail(self) -> np.ndarray:
+        """追加段的有效行（视图）"""
+        return self._data[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """常驻内存字节数（不含内存映射）"""
+        return (0 if _is_mapped(self._base) else self._base.nbytes) + self._data.nbytes
+
+    def reset(self, base: Optional[np.ndarray] = None, tail: Optional[np.ndarray] = None) -> None:
+        """
+        重置内容
+
+        Args:
+            base: 快照段（保持原样引用，不拷贝）
+            tail: 追加段初始内容（拷贝进缓冲区）
+        """
+        self._base = base if base is not None else self._empty()
+        self._data = self._empty()
+        self._size = 0
+        if tail is not None and len(tail) > 0:
+            self.append(tail)
+
+    def reserve(self, rows: int) -> None:
+        """确保追加段至少能容纳 rows 行"""
+        if rows <= len(self._data):
+            return
+        capacity = max(len(self._data), self.initial_capacity)
+        while capacity < rows:
+            capacity *= 2
+        data = np.empty((capacity, self.embedding_dim), dtype=self.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, rows: np.ndarray) -> None:
+        """
+        追加向量
+
+        Args:
+            rows: (n, dim) 或 (dim,) 向量
+        """
+        rows = np.asarray(rows, dtype=self.dtype).reshape(-1, self.embedding_dim)
+        n = len(rows)
+        if n == 0:
+            return
+        self.reserve(self._size + n)
+        self._data[self._size:self._size + n] = rows
+        self._size += n
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """
+        删除指定行（整体行号）
+
+        删除后全部数据收拢到追加段（快照段若是内存映射会被拷贝进内存）
+        """
+        remaining = np.delete(self.to_array(), list(indices), axis=0)
+        self.reset(tail=remaining)
+
+    def take(self, rows: Sequence[int]) -> np.ndarray:
+        """
+        按行号取向量（只读取所需行，快照段为内存映射时不会读入整段）
+
+        Args:
+            rows: 整体行号
+
+        Returns:
+            (len(rows), dim) 向量
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        base_count = len(self._base)
+        if base_count == 0:
+            return self._data[rows]
+        if self._size == 0:
+            return np.asarray(self._base[rows])
+        out = np.empty((len(rows), self.embedding_dim), dtype=self.dtype)
+        in_base = rows < base_count
+        out[in_base] = self._base[rows[in_base]]
+        out[~in_base] = self._data[rows[~in_base] - base_count]
+        return out
+
+    def to_array(self) -> np.ndarray:
+        """
+        完整矩阵
+
+        只有一段非空时返回视图；两段都非空时拼接拷贝
+        """
+        if self._size == 0:
+            return self._base
+        if len(self._base) == 0:
+            return self.tail
+        return np.concatenate([self._base, self.tail], axis=0)
+
+    def blocks(self, block_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        分块遍历
+
+        Yields:
+            (起始行号, 向量块)
+        """
+        offset = 0
+        for part in (self._base, self.tail):
+            for start in range(0, len(part), block_size):
+                yield offset + start, part[start:start + block_size]
+            offset += len(part)
+
+
+class GrowableArray:
+    """
+    容量倍增的一维数组
+
+    供元数据列、倒排索引等按行追加的结构使用
+    """
+
+    def __init__(self, dtype, initial_capacity: int = 1024):
+        self._data = np.empty(initial_capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        """有效部分（视图）"""
+        return self._data[:self._size]
+
+    def extend(self, values) -> None:
+        """追加"""
+        values = np.asarray(values, dtype=self._data.dtype)
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            capacity = max(len(self._data), 1)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=self._data.dtype)
+            grown[:self._size] = self.values
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    def replace(self, values) -> None:
+        """整体替换内容"""
+        values = np.array(values, dtype=self._data.dtype)
+        self._size = 0
+        self.extend(values)
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """删除指定下标"""
+        self.replace(np.delete(self.values, list(indices)))
@@ -0,0 +1,215 @@
+"""
+向量缓存
+按 (模型, sha256(文本)) 内容寻址，SQLite 持久化 + 内存 LRU，RAG 与 MEM 存储共享
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, Any
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    向量缓存
+
+    - 内存 LRU 作为前端，命中时不访问磁盘
+    - SQLite（WAL 模式）作为持久层，多进程可共享同一文件
+    - path 为 None 时仅使用内存
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 10000):
+        """
+        初始化向量缓存
+
+        Args:
+            path: SQLite 文件路径
+            max_memory_entries: 内存 LRU 最大条目数
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, digest))"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        """文本摘要"""
+        return hashlib.sha256(text.encode('utf-8')).digest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        批量查询
+
+        Args:
+            model: 向量模型名
+            texts: 文本列表
+
+        Returns:
+            与 texts 对齐的向量列表，未命中为 None
+        """
+        digests = [self.digest(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        pending: Dict[bytes, List[int]] = {}
+
+        with self._lock:
+            for i, digest in enumerate(digests):
+                key = (model, digest)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(digest, []).append(i)
+
+            if pending and self._conn is not None:
+                found = self._select(model, list(pending))
+                for digest, vector in found.items():
+                    for i in pending.pop(digest):
+                        results[i] = vector
+                        self.disk_hits += 1
+                    self._remember((model, digest), vector)
+
+            self.misses += sum(len(indices) for indices in pending.values())
+
+        return results
+
+    def put_many(self, model: str, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        批量写入
+
+        Args:
+            model: 向量模型名
+            texts: 文本列表
+            vectors: 与 texts 对齐的向量矩阵
+        """
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                digest = self.digest(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember((model, digest), vector)
+                rows.append((model, digest, vector.tobytes()))
+
+            if rows and self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, digest, vector) VALUES (?, ?, ?)",
+                        rows
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist embeddings to cache: {e}")
+
+    def _select(self, model: str, digests: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """从 SQLite 查询（分批避免超出参数上限）"""
+        found: Dict[bytes, np.ndarray] = {}
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            try:
+                rows = self._conn.execute(
+                    f"SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN ({placeholders})",
+                    [model, *chunk]
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                return found
+            for digest, blob in rows:
+                found[bytes(digest)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _remember(self, key: Tuple[str, bytes], vector: np.ndarray) -> None:
+        """写入内存 LRU"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_ratio": hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+            "path": self.path
+        }
+
+
+# 进程内按路径共享的缓存实例
+_caches: Dict[Optional[str], EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Optional[str] = None) -> EmbeddingCache:
+    """
+    获取共享的向量缓存实例
+
+    同一路径在进程内只打开一次，RAG 与 MEM 存储传入同一路径即可共享
+    """
+    key = os.path.abspath(path) if path else None
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(path=key)
+        return _caches[key]
+
+
+class CachedEmbeddingFunction:
+    """
+    带缓存的 ChromaDB embedding function 包装
+
+    ChromaDB 会对 add / query 的文本调用 embedding function，
+    这里先查缓存，只把未命中的文本交给底层函数
+    """
+
+    def __init__(self, embedding_function, cache: EmbeddingCache, model_name: str):
+        """
+        Args:
+            embedding_function: 底层 ChromaDB embedding function
+            cache: 向量缓存
+            model_name: 缓存键中的模型名
+        """
+        self.embedding_function = embedding_function
+        self.cache = cache
+        self.model_name = model_name
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        cached = self.cache.get_many(self.model_name, input)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+
+        if missing:
+            texts = [input[i] for i in missing]
+            vectors = np.asarray(self.embedding_function(texts), dtype=np.float32)
+            self.cache.put_many(self.model_name, texts, vectors)
+            for i, vector in zip(missing, vectors):
+                cached[i] = vector
+
+        return [vector.tolist() for vector in cached]
@@ -0,0 +1,141 @@
+"""
+向量存储的后台执行
+- 专用线程池：相似度计算、索引维护、快照写盘等 CPU / 磁盘工作不在事件循环线程上执行
+- 读写锁：检索可并发，写入（增删、合并快照）独占
+- 事件循环延迟监控：定时休眠并测量实际唤醒的滞后，用于确认流式响应不被阻塞
+"""
+
+import asyncio
+import logging
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_store_executor(max_workers: int = 4) -> ThreadPoolExecutor:
+    """进程内共享的向量存储线程池（首次创建时的参数生效）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-store")
+        return _executor
+
+
+async def run_in_store_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """在向量存储线程池中执行同步函数"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_store_executor(), functools.partial(func, *args, **kwargs))
+
+
+class ReadWriteLock:
+    """读写锁（写优先：有写入等待时新的读取排队，避免写入饿死）"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class LoopLagMonitor:
+    """
+    事件循环延迟监控
+
+    每隔 interval 秒休眠一次，实际唤醒时间与预期之差即为事件循环被阻塞的时长
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        """
+        Args:
+            interval: 采样间隔（秒）
+            window: 统计分位数时保留的最近样本数
+        """
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag = 0.0
+        self.total_samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """在当前事件循环中开始采样"""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self._samples.clear()
+        self.max_lag = 0.0
+        self.total_samples = 0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self.total_samples += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """延迟统计（毫秒）"""
+        samples = np.asarray(self._samples, dtype=np.float64) * 1000
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.total_samples,
+            "last_ms": float(samples[-1]) if len(samples) else 0.0,
+            "mean_ms": float(samples.mean()) if len(samples) else 0.0,
+            "p99_ms": float(np.percentile(samples, 99)) if len(samples) else 0.0,
+            "max_ms": self.max_lag * 1000
+        }
@@ -5,8 +5,9 @@
 
 from typing import Optional
 from .base import VectorStoreBase
-from .store import ChromaVectorStore
 from .memu_store import MemuVectorStore
+from .embedding import OpenAIEmbedder, DEFAULT_EMBEDDING_MODEL
+from .embedding_cache import get_embedding_cache
 
 
 class VectorStoreFactory:
@@ -25,15 +26,58 @@ class VectorStoreFactory:
             store_type: 存储类型 ('chroma' 或 'memu')
             db_path: 数据库路径
             **kwargs: 其他参数
+                - embedding_dim: 向量维度（memu）
+                - use_mmap: 内存映射向量快照（memu）
+                - use_openai_embedding: 使用 OpenAI Embedding API（memu）
+                - embedding_model / embedding_api_key / embedding_base_url: 向量接口配置（memu）
+                - embedding_batch_size: 单个请求最多文本条数（memu）
+                - embedding_max_batch_tokens: 单个请求 token 预算（memu）
+                - embedding_concurrency: 同时在途的向量请求数（memu）
+                - http_client: 向量请求使用的共享 httpx.AsyncClient（memu）
+                - embedding_cache_path: 向量缓存 SQLite 路径，同一路径的存储共享缓存
+                - index: 检索索引 'flat' / 'ivf' / 'hnsw'（memu）
+                - index_params: 索引参数字典（memu）
+                - quantization: 常驻向量量化 'none' / 'float16' / 'int8'（memu）
+                - rescore_multiplier: 量化粗排候选倍数（memu）
+                - keyword_index: 维护 BM25 关键词索引（memu）
+                - offload: 计算与写盘放到存储专用线程池（memu）
             
         Returns:
             向量存储实例
         """
+        embedding_cache = None
+        if kwargs.get("embedding_cache_path"):
+            embedding_cache = get_embedding_cache(kwargs["embedding_cache_path"])
+        
         if store_type.lower() == "memu":
             embedding_dim = kwargs.get("embedding_dim", 1536)
-            return MemuVectorStore(db_path=db_path, embedding_dim=embedding_dim)
+            embedder = OpenAIEmbedder(
+                api_key=kwargs.get("embedding_api_key"),
+                base_url=kwargs.get("embedding_base_url"),
+                model=kwargs.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+                batch_size=kwargs.get("embedding_batch_size", 256),
+                max_batch_tokens=kwargs.get("embedding_max_batch_tokens", 100000),
+                max_concurrency=kwargs.get("embedding_concurrency", 4),
+                http_client=kwargs.get("http_client")
+            )
+            return MemuVectorStore(
+                db_path=db_path,
+                embedding_dim=embedding_dim,
+                use_openai_embedding=kwargs.get("use_openai_embedding", False),
+                use_mmap=kwargs.get("use_mmap", False),
+                embedder=embedder,
+                embedding_cache=embedding_cache,
+                index=kwargs.get("index", "flat"),
+                index_params=kwargs.get("index_params"),
+                quantization=kwargs.get("quantization", "none"),
+                rescore_multiplier=kwargs.get("rescore_multiplier", 4),
+                keyword_index=kwargs.get("keyword_index", True),
+                offload=kwargs.get("offload", True)
+            )
         elif store_type.lower() == "chroma":
-            return ChromaVectorStore(db_path=db_path)
+            # chromadb 为可选依赖，按需导入
+            from .store import ChromaVectorStore
+            return ChromaVectorStore(db_path=db_path, embedding_cache=embedding_cache)
         else:
             raise ValueError(f"Unsupported vector store type: {store_type}")
 
@@ -0,0 +1,51 @@
+"""
+文档特征
+检索后的打分（关键词重叠、时间衰减、多样性重排）所需的预计算特征，
+由存储在写入时生成并随检索结果返回，避免每次查询对候选文本重新分词、解析时间
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from .keyword_index import tokenize, term_id
+from .metadata_index import parse_epoch, MISSING_EPOCH
+
+
+@dataclass(frozen=True)
+class DocumentFeatures:
+    """单个文档的紧凑特征"""
+    token_ids: np.ndarray  # 去重升序的词项 id（uint32，与 BM25 索引一致）
+    epoch: Optional[float]  # 时间戳（秒），缺失时为 None
+    length: int  # 词项数
+
+    @classmethod
+    def from_text(cls, content: str, timestamp=None) -> "DocumentFeatures":
+        """由原始文本计算（存储未提供预计算特征时的回退）"""
+        tokens = tokenize(content)
+        return cls(
+            token_ids=text_token_ids(tokens),
+            epoch=epoch_seconds(parse_epoch(timestamp)),
+            length=len(tokens)
+        )
+
+    def overlap(self, token_ids: np.ndarray) -> int:
+        """与另一组去重词项 id 的交集大小"""
+        return int(np.intersect1d(self.token_ids, token_ids, assume_unique=True).size)
+
+    def jaccard(self, other: "DocumentFeatures") -> float:
+        """词项集合的 Jaccard 相似度"""
+        intersection = self.overlap(other.token_ids)
+        union = len(self.token_ids) + len(other.token_ids) - intersection
+        return intersection / union if union > 0 else 0.0
+
+
+def text_token_ids(tokens) -> np.ndarray:
+    """词项列表转为去重升序的 id 数组"""
+    return np.unique(np.fromiter((term_id(token) for token in tokens), dtype=np.uint32))
+
+
+def epoch_seconds(epoch_us: int) -> Optional[float]:
+    """metadata_index 的微秒时间戳转为秒（缺失为 None）"""
+    if epoch_us == MISSING_EPOCH:
+        return None
+    return epoch_us / 1_000_000
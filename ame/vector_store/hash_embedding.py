@@ -0,0 +1,120 @@
+"""
+本地哈希向量
+字符 n-gram 特征哈希（hashing trick），整批文本在 NumPy 中一次完成，无需网络
+
+共享子串越多的文本向量越接近：中文的字 / 双字、英文的词片段都能产生有意义的相似度，
+用于测试、离线部署以及远程向量接口失败时的回退。
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# n-gram 哈希的乘数与按长度区分的盐
+_PRIME = np.uint64(0x100000001B3)
+_SALTS = np.array(
+    [0x9E3779B97F4A7C15 * i % 2**64 for i in range(1, 9)], dtype=np.uint64
+)
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """64 位整数混合（murmur3 finalizer）"""
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xFF51AFD7ED558CCD)
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xC4CEB9FE1A85EC53)
+    return h ^ (h >> np.uint64(33))
+
+
+class HashingEmbedder:
+    """
+    字符 n-gram 哈希向量生成器
+
+    - 文本小写、空白折叠后按 Unicode 码点拼接为一个数组
+    - 对每个 n 用滚动乘法一次算出全部 n-gram 的哈希，跨文本边界的 n-gram 被屏蔽
+    - 哈希决定维度和符号（signed hashing），按 (文本, 维度) 累加到输出矩阵
+    - 逐行 L2 归一化，内积即余弦相似度
+    """
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        ngram_range: Tuple[int, int] = (1, 3),
+        ngram_weights: Optional[Dict[int, float]] = None,
+        batch_size: int = 1024
+    ):
+        """
+        初始化哈希向量生成器
+
+        Args:
+            embedding_dim: 向量维度
+            ngram_range: n-gram 长度范围（闭区间）
+            ngram_weights: 各长度 n-gram 的权重（默认单字 0.5，其余 1.0）
+            batch_size: 每批处理的文本数（限制 n-gram 临时数组大小）
+        """
+        self.embedding_dim = embedding_dim
+        self.ngram_range = ngram_range
+        self.ngram_weights = ngram_weights or {1: 0.5}
+        self.batch_size = batch_size
+
+    @property
+    def model(self) -> str:
+        """模型标识（记录在存储 manifest 中，变化时需重新生成向量）"""
+        lo, hi = self.ngram_range
+        return f"hash-ngram-v1-{lo}{hi}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        批量生成向量
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            (len(texts), embedding_dim) float32 矩阵
+        """
+        out = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            self._embed_batch(batch, out[start:start + len(batch)])
+        return out
+
+    def _embed_batch(self, texts: List[str], out: np.ndarray) -> None:
+        """生成一批向量，写入 out（已清零的 (len(texts), dim) 视图）"""
+        n = len(texts)
+        dim = self.embedding_dim
+        normalized = [' '.join((text or '').replace('\x00', ' ').lower().split()) for text in texts]
+
+        # 码点数组，文本之间以 0 分隔
+        joined = '\x00'.join(normalized)
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter((len(text) for text in normalized), dtype=np.int64, count=n)
+        doc_ids = np.repeat(np.arange(n, dtype=np.int64), lengths + 1)[:len(codes)]
+
+        # 窗口内分隔符个数为 0 才是有效 n-gram
+        separators = np.concatenate([[0], np.cumsum(codes == 0)])
+
+        keys, weights = [], []
+        lo, hi = self.ngram_range
+        for size in range(lo, hi + 1):
+            windows = len(codes) - size + 1
+            if windows <= 0:
+                continue
+            h = codes[:windows].copy()
+            for offset in range(1, size):
+                h = h * _PRIME + codes[offset:offset + windows]
+            h = _mix(h ^ _SALTS[size % len(_SALTS)])
+
+            valid = separators[size:size + windows] == separators[:windows]
+            h = h[valid]
+            keys.append(doc_ids[:windows][valid] * dim + (h % np.uint64(dim)).astype(np.int64))
+            weight = self.ngram_weights.get(size, 1.0)
+            weights.append(np.where(h >> np.uint64(63), np.float32(-weight), np.float32(weight)))
+
+        # 按 (文本, 维度) 直接累加到输出矩阵
+        if keys:
+            np.add.at(out.reshape(-1), np.concatenate(keys), np.concatenate(weights))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
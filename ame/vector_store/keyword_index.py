@@ -0,0 +1,251 @@
+"""
+BM25 倒排索引
+为 MemuVectorStore 提供关键词检索通道，随 add_documents / delete_documents 增量维护
+
+- 分词：拉丁字母 / 数字按词切分，中日韩文字输出单字 + 相邻双字（bigram）
+- 词项以 crc32 哈希为 uint32 id，不维护词典
+- 词项-文档记录以扁平数组存储，查询时延迟构建按词项排序的倒排表，
+  新增记录较少时单独扫描，不触发重建
+- 检索在共享读锁下并发执行，倒排表在局部变量中构建完成后整体替换为一个元组，
+  读取方只读取一次该属性，不会看到新旧混杂的状态
+"""
+
+import os
+import re
+import zlib
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .embedding_buffer import GrowableArray
+from .topk import top_k
+
+logger = logging.getLogger(__name__)
+
+_CJK_RANGES = '぀-ヿ㐀-䶿一-鿿가-힯'
+_TOKEN_PATTERN = re.compile(f'[{_CJK_RANGES}]+|[^\\W_{_CJK_RANGES}]+')
+_CJK_PATTERN = re.compile(f'[{_CJK_RANGES}]')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    中英文混合分词
+
+    Args:
+        text: 文本
+
+    Returns:
+        词项列表（英文词小写；中文为单字与双字）
+    """
+    tokens: List[str] = []
+    for run in _TOKEN_PATTERN.findall((text or '').lower()):
+        if _CJK_PATTERN.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def term_id(token: str) -> int:
+    """词项 id（crc32）"""
+    return zlib.crc32(token.encode('utf-8'))
+
+
+class BM25Index:
+    """
+    BM25 倒排索引
+
+    行号与 MemuVectorStore 的文档下标一致，删除后随之前移
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        初始化索引
+
+        Args:
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+        self._terms = GrowableArray(np.uint32)
+        self._rows = GrowableArray(np.int64)
+        self._tfs = GrowableArray(np.float32)
+        self._doc_lengths = GrowableArray(np.float32)
+        self._total_length = 0.0
+        self._invalidate()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def _invalidate(self) -> None:
+        # 倒排表 (排序后的词项, 对应记录下标, 覆盖的记录数 n)，覆盖前 n 条记录
+        self._postings: Optional[Tuple[np.ndarray, np.ndarray, int]] = None
+
+    # ---------- 维护 ----------
+
+    def reset(self, documents: List[Dict]) -> None:
+        """基于全部文档重建"""
+        self.__init__(self.k1, self.b)
+        self.add(documents)
+
+    def add(self, documents: List[Dict]) -> None:
+        """追加文档（行号接在现有文档之后）"""
+        first_row = len(self)
+        terms, rows, tfs, lengths = [], [], [], []
+        for offset, doc in enumerate(documents):
+            tokens = tokenize(doc.get("content", ""))
+            counts = Counter(term_id(token) for token in tokens)
+            terms.extend(counts.keys())
+            tfs.extend(counts.values())
+            rows.extend([first_row + offset] * len(counts))
+            lengths.append(len(tokens))
+
+        self._terms.extend(terms)
+        self._rows.extend(rows)
+        self._tfs.extend(tfs)
+        self._doc_lengths.extend(lengths)
+        self._total_length += float(sum(lengths))
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """删除行（之后的行号前移）"""
+        deleted = np.unique(np.asarray(list(indices), dtype=np.int64))
+        if len(deleted) == 0:
+            return
+        rows = self._rows.values
+        keep = ~np.isin(rows, deleted)
+        kept_rows = rows[keep]
+        # 行号减去其前面被删除的行数
+        self._rows.replace(kept_rows - np.searchsorted(deleted, kept_rows))
+        self._terms.replace(self._terms.values[keep])
+        self._tfs.replace(self._tfs.values[keep])
+
+        lengths = np.delete(self._doc_lengths.values, deleted)
+        self._doc_lengths.replace(lengths)
+        self._total_length = float(lengths.sum())
+        self._invalidate()
+
+    def _build_postings(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """构建倒排表（构建完成后一次性发布）"""
+        terms = self._terms.values
+        order = np.argsort(terms, kind='stable')
+        postings = (terms[order], order, len(terms))
+        self._postings = postings
+        return postings
+
+    def _entries(
+        self,
+        term: int,
+        postings: Tuple[np.ndarray, np.ndarray, int],
+        terms: np.ndarray
+    ) -> np.ndarray:
+        """某个词项的记录下标"""
+        posting_terms, posting_order, indexed_count = postings
+        lo = np.searchsorted(posting_terms, term, side='left')
+        hi = np.searchsorted(posting_terms, term, side='right')
+        indexed = posting_order[lo:hi]
+        recent = terms[indexed_count:]
+        if len(recent) == 0:
+            return indexed
+        return np.concatenate([indexed, indexed_count + np.flatnonzero(recent == term)])
+
+    def row_terms(self, row: int) -> np.ndarray:
+        """某行文档的去重升序词项 id（记录按行号顺序存放，二分定位）"""
+        rows = self._rows.values
+        lo = np.searchsorted(rows, row, side='left')
+        hi = np.searchsorted(rows, row, side='right')
+        return np.sort(self._terms.values[lo:hi])
+
+    def row_length(self, row: int) -> int:
+        """某行文档的词项数"""
+        return int(self._doc_lengths.values[row])
+
+    # ---------- 查询 ----------
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            limit: 返回数量
+            rows: 只在这些行中检索（元数据过滤结果），None 表示全部
+
+        Returns:
+            (行号数组, BM25 分数数组)，按分数降序；没有命中时为空
+        """
+        n = len(self)
+        query_terms = sorted(set(term_id(token) for token in tokenize(query)))
+        if n == 0 or not query_terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # 新增记录超过 1/8 时重建倒排表
+        postings = self._postings
+        terms = self._terms.values
+        if postings is None or (len(terms) - postings[2]) * 8 > len(terms):
+            postings = self._build_postings()
+
+        avg_length = self._total_length / n if n else 0.0
+        doc_lengths = self._doc_lengths.values
+        all_rows, all_scores = [], []
+        for term in query_terms:
+            entries = self._entries(term, postings, terms)
+            if len(entries) == 0:
+                continue
+            df = len(entries)
+            idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            term_rows = self._rows.values[entries]
+            tf = self._tfs.values[entries]
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[term_rows] / max(avg_length, 1e-9))
+            all_rows.append(term_rows)
+            all_scores.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        candidate_rows, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores)).astype(np.float32)
+        if rows is not None:
+            mask = np.isin(candidate_rows, rows, assume_unique=True)
+            candidate_rows, scores = candidate_rows[mask], scores[mask]
+
+        order, top_scores = top_k(scores, limit)
+        return candidate_rows[order], top_scores
+
+    # ---------- 持久化 ----------
+
+    def save(self, path: str) -> None:
+        """保存到 {path}.npz"""
+        np.savez(
+            path + ".npz",
+            terms=self._terms.values,
+            rows=self._rows.values,
+            tfs=self._tfs.values,
+            doc_lengths=self._doc_lengths.values
+        )
+
+    def load(self, path: str, expected_rows: int) -> bool:
+        """
+        从 {path}.npz 加载
+
+        Returns:
+            文档数一致时返回 True
+        """
+        if not os.path.exists(path + ".npz"):
+            return False
+        data = np.load(path + ".npz")
+        if len(data["doc_lengths"]) != expected_rows:
+            return False
+        self._terms.replace(data["terms"])
+        self._rows.replace(data["rows"])
+        self._tfs.replace(data["tfs"])
+        self._doc_lengths.replace(data["doc_lengths"])
+        self._total_length = float(self._doc_lengths.values.sum())
+        self._invalidate()
+        return True
@@ -4,17 +4,28 @@ Memu 向量存储实现
 """
 
 import os
-import json
 from typing import List, Dict, Optional
 from datetime import datetime
 import numpy as np
 import logging
-from .base import VectorStoreBase
+from .base import VectorStoreBase, PrecomputedEmbeddingsMixin
+from .segment_storage import SegmentStorage
+from .embedding_buffer import EmbeddingBuffer
+from .embedding import OpenAIEmbedder
+from .embedding_cache import EmbeddingCache
+from .hash_embedding import HashingEmbedder
+from .ann import ANNIndexBase, create_ann_index
+from .metadata_index import MetadataColumns
+from .keyword_index import BM25Index, tokenize
+from .features import DocumentFeatures, epoch_seconds, text_token_ids
+from .quantization import QuantizedMatrix, create_quantizer
+from .topk import top_k, blockwise_top_k, blockwise_top_k_batch, streaming_top_k_batch
+from .executor import ReadWriteLock, run_in_store_executor
 
 logger = logging.getLogger(__name__)
 
 
-class MemuVectorStore(VectorStoreBase):
+class MemuVectorStore(VectorStoreBase, PrecomputedEmbeddingsMixin):
     """
     Memu 向量存储实现
     
@@ -22,7 +33,22 @@ class MemuVectorStore(VectorStoreBase):
     这里提供一个简化的实现，实际使用时需要安装 memu 库
     """
     
-    def __init__(self, db_path: str, embedding_dim: int = 1536, use_openai_embedding: bool = False):
+    def __init__(
+        self,
+        db_path: str,
+        embedding_dim: int = 1536,
+        use_openai_embedding: bool = False,
+        use_mmap: bool = False,
+        search_block_size: int = 65536,
+        embedder: Optional[OpenAIEmbedder] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        index: str = "flat",
+        index_params: Optional[Dict] = None,
+        quantization: str = "none",
+        rescore_multiplier: int = 4,
+        keyword_index: bool = True,
+        offload: bool = True
+    ):
         """
         初始化 Memu 向量存储
         
@@ -30,149 +56,352 @@ class MemuVectorStore(VectorStoreBase):
             db_path: 数据库路径
             embedding_dim: 向量维度
             use_openai_embedding: 是否使用OpenAI Embedding API
+            use_mmap: 以只读内存映射打开向量快照，多个 worker 共享页缓存，启动无需读入整个矩阵
+            search_block_size: 检索时每块扫描的行数
+            embedder: 批量向量生成器（use_openai_embedding 时使用，默认按环境变量创建）
+            embedding_cache: 向量缓存（按模型+文本摘要寻址，可在多个存储间共享）
+            index: 检索索引类型，'flat'（暴力检索）、'ivf'（纯 NumPy IVF-Flat）或 'hnsw'（需要 hnswlib）
+            index_params: 索引参数（如 ivf 的 nlist / nprobe，hnsw 的 M / ef_search）
+            quantization: 常驻向量的量化方式 'none' / 'float16' / 'int8'；
+                启用后全精度向量只保留内存映射快照，用于重排
+            rescore_multiplier: 量化粗排取 limit * rescore_multiplier 个候选做全精度重排
+            keyword_index: 维护 BM25 倒排索引，提供 keyword_search 关键词检索通道
+            offload: 相似度计算、索引维护与写盘放到专用线程池执行，不阻塞事件循环
         """
         self.db_path = db_path
         self.embedding_dim = embedding_dim
         self.use_openai_embedding = use_openai_embedding
+        # 量化模式下全精度快照以内存映射打开，不常驻内存
+        self.quantization = (quantization or "none").lower()
+        self.use_mmap = use_mmap or self.quantization != "none"
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self.search_block_size = search_block_size
+        self.offload = offload
+        # 检索并发读，增删与合并快照独占
+        self._rw_lock = ReadWriteLock()
         os.makedirs(db_path, exist_ok=True)
         
-        # 数据存储文件
-        self.data_file = os.path.join(db_path, "documents.json")
-        self.index_file = os.path.join(db_path, "index.npy")
+        # 追加写分段存储（WAL + 向量段，定期合并）
+        self._storage = SegmentStorage(
+            db_path=db_path,
+            embedding_dim=embedding_dim,
+            use_mmap=self.use_mmap
+        )
+        
+        # 向量缓冲区（容量倍增，避免逐行 vstack）
+        self._embeddings = EmbeddingBuffer(embedding_dim)
+        
+        # 列式元数据（来源 / 时间 / 上下文过滤）
+        self._metadata = MetadataColumns()
+        
+        # BM25 倒排索引（关键词检索通道）
+        self._keywords: Optional[BM25Index] = BM25Index() if keyword_index else None
+        
+        # 近似最近邻索引（flat 时为 None）
+        self.index_type = index
+        self._ann: Optional[ANNIndexBase] = create_ann_index(index, embedding_dim, **(index_params or {}))
+        
+        # 量化常驻矩阵（none 时为 None）
+        self._quantized: Optional[QuantizedMatrix] = create_quantizer(self.quantization, embedding_dim)
+        
+        # OpenAI 批量向量生成器（客户端延迟初始化）
+        self.embedder = embedder or OpenAIEmbedder()
+        self.embedding_cache = embedding_cache
+        
+        # 本地哈希向量（离线 / 远程失败时使用）
+        self.hash_embedder = HashingEmbedder(embedding_dim)
         
         # 加载或初始化数据
         self._load_data()
+        self._check_embedding_model()
+    
+    @property
+    def data_file(self) -> str:
+        """当前文档快照文件"""
+        return self._storage.data_file
+    
+    @property
+    def index_file(self) -> str:
+        """当前向量快照文件"""
+        return self._storage.index_file
+    
+    @property
+    def embedding_model(self) -> str:
+        """当前配置下生成向量所用的模型"""
+        return self.embedder.model if self.use_openai_embedding else self.hash_embedder.model
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """
+        完整向量矩阵
         
-        # OpenAI客户端（延迟初始化）
-        self._openai_client = None
+        内部表示为 EmbeddingBuffer：快照段（use_mmap 时为只读映射）+ 预分配追加段。
+        两段都非空时这里会拼接拷贝，检索路径请使用 _iter_embedding_blocks。
+        """
+        return self._embeddings.to_array()
+    
+    def _iter_embedding_blocks(self):
+        """
+        分块遍历向量
+        
+        Yields:
+            (起始行号, 向量块)
+        """
+        return self._embeddings.blocks(self.search_block_size)
     
     def _load_data(self) -> None:
-        """加载数据"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.documents = json.load(f)
-                logger.info(f"Loaded {len(self.documents)} documents")
-            except Exception as e:
-                logger.error(f"Failed to load documents: {e}")
-                self.documents = []
-        else:
+        """加载数据（快照 + 日志重放）"""
+        try:
+            self.documents, base, tail = self._storage.load()
+            if self.use_mmap:
+                self._embeddings.reset(base=base, tail=tail)
+            else:
+                self._embeddings.reserve(len(base) + len(tail))
+                self._embeddings.append(base)
+                self._embeddings.append(tail)
+            self._metadata.reset(self.documents)
+            self._load_keywords(len(base))
+            self._load_ann(len(base))
+            self._load_quantized(len(base))
+            logger.info(f"Loaded {len(self.documents)} documents")
+        except Exception as e:
+            logger.error(f"Failed to load vector store: {e}")
             self.documents = []
+            self._embeddings.reset()
+            self._metadata.reset(self.documents)
+            if self._keywords is not None:
+                self._keywords.reset(self.documents)
+            if self._ann is not None:
+                self._ann.reset(self._embeddings)
+            if self._quantized is not None:
+                self._quantized.reset(self._embeddings)
+    
+    def _check_embedding_model(self) -> None:
+        """
+        校验已有向量的模型
         
-        if os.path.exists(self.index_file):
-            try:
-                self.embeddings = np.load(self.index_file)
-                logger.info(f"Loaded {len(self.embeddings)} embeddings")
-            except Exception as e:
-                logger.error(f"Failed to load embeddings: {e}")
-                self.embeddings = np.array([]).reshape(0, self.embedding_dim)
+        本地哈希模型与 manifest 记录不一致（包括旧版 sha256 哈希向量）时，本地重新生成全部向量；
+        远程模型不一致时只告警，不自动重新请求接口
+        """
+        recorded = self._storage.embedding_model
+        current = self.embedding_model
+        if recorded == current:
+            return
+        
+        if not self.documents or (recorded is None and self.use_openai_embedding):
+            self._storage.set_embedding_model(current)
+        elif not self.use_openai_embedding:
+            logger.info(f"Re-embedding {len(self.documents)} documents: {recorded} -> {current}")
+            self._reembed_documents()
         else:
-            self.embeddings = np.array([]).reshape(0, self.embedding_dim)
+            logger.warning(
+                f"Stored vectors were built with {recorded}, current model is {current}; "
+                f"re-index the store to avoid mixing embedding spaces"
+            )
+    
+    def _reembed_documents(self) -> None:
+        """用本地哈希模型重新生成全部向量并合并快照"""
+        embeddings = self.hash_embedder.embed([doc.get("content", "") for doc in self.documents])
+        self._embeddings.reset()
+        self._embeddings.append(embeddings)
+        if self._ann is not None:
+            self._ann.reset(self._embeddings)
+        if self._quantized is not None:
+            self._quantized.reset(self._embeddings, self.search_block_size)
+        self._storage.embedding_model = self.embedding_model
+        self._save_data()
+    
+    def _load_keywords(self, base_count: int) -> None:
+        """恢复 BM25 索引（同代文件有效时加载并补入日志新增文档，否则重新分词）"""
+        if self._keywords is None:
+            return
+        try:
+            if self._keywords.load(self._storage.sidecar_path("bm25"), base_count):
+                self._keywords.add(self.documents[base_count:])
+                return
+        except Exception as e:
+            logger.warning(f"Failed to load keyword index, rebuilding: {e}")
+        self._keywords.reset(self.documents)
+    
+    def _load_ann(self, base_count: int) -> None:
+        """
+        恢复 ANN 索引
+        
+        快照同代的索引文件行数与快照一致时直接加载并补入日志新增行，否则重建
+        """
+        if self._ann is None:
+            return
+        try:
+            if self._ann.load(self._storage.sidecar_path("ann"), base_count):
+                self._ann.add(self._embeddings, base_count)
+                return
+        except Exception as e:
+            logger.warning(f"Failed to load ANN index, rebuilding: {e}")
+        self._ann.reset(self._embeddings)
+    
+    def _load_quantized(self, base_count: int) -> None:
+        """恢复量化矩阵（与 ANN 索引相同：同代文件有效时加载并补入新增行，否则重新编码）"""
+        if self._quantized is None:
+            return
+        try:
+            if self._quantized.load(self._storage.sidecar_path("quantized"), base_count):
+                self._quantized.append(self._embeddings.tail)
+                return
+        except Exception as e:
+            logger.warning(f"Failed to load quantized embeddings, re-encoding: {e}")
+        self._quantized.reset(self._embeddings, self.search_block_size)
     
     def _save_data(self) -> None:
-        """保存数据"""
+        """全量保存（合并为新快照）"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.documents, f, ensure_ascii=False, indent=2)
-            
-            if len(self.embeddings) > 0:
-                np.save(self.index_file, self.embeddings)
-            
+            sidecars = {}
+            if self._keywords is not None:
+                sidecars["bm25"] = self._keywords.save
+            if self._ann is not None:
+                sidecars["ann"] = self._ann.save
+            if self._quantized is not None:
+                if self._quantized.needs_refit:
+                    # 按当前全部数据重新拟合 int8 参数
+                    self._quantized.reset(self._embeddings, self.search_block_size)
+                sidecars["quantized"] = self._quantized.save
+            self._storage.compact(self.documents, self.embeddings, sidecars=sidecars)
+            if self.use_mmap:
+                # 重新映射新快照，释放追加段内存
+                self._embeddings.reset(base=self._storage.open_index())
             logger.debug(f"Saved {len(self.documents)} documents")
         except Exception as e:
             logger.error(f"Failed to save data: {e}")
             raise
     
-    def _generate_embedding(self, text: str) -> np.ndarray:
+    def _maybe_compact(self) -> None:
+        """日志过大时合并"""
+        if self._storage.needs_compaction():
+            self._save_data()
+    
+    async def _offload(self, func, *args, **kwargs):
+        """在向量存储线程池中执行同步工作（offload=False 时直接在当前线程执行）"""
+        if self.offload:
+            return await run_in_store_executor(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    
+    async def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
-        生成文本向量
+        批量生成文本向量
         
         Args:
-            text: 输入文本
+            texts: 输入文本列表
             
         Returns:
-            文本向量
+            (len(texts), embedding_dim) 向量矩阵
         """
+        if not texts:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        
         if self.use_openai_embedding:
-            return self._generate_openai_embedding(text)
-        else:
-            return self._generate_hash_embedding(text)
-    
-    def _generate_openai_embedding(self, text: str) -> np.ndarray:
-        """使用OpenAI API生成嵌入向量"""
-        if self._openai_client is None:
             try:
-                from openai import OpenAI
-                self._openai_client = OpenAI(
-                    api_key=os.getenv("OPENAI_API_KEY"),
-                    base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-                )
+                return await self._generate_remote_embeddings(texts)
             except Exception as e:
-                logger.error(f"Failed to initialize OpenAI client: {e}")
-                return self._generate_hash_embedding(text)
+                logger.warning(f"OpenAI embedding failed, using hash: {e}")
         
-        try:
-            response = self._openai_client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
-            )
-            embedding = np.array(response.data[0].embedding, dtype=np.float32)
-            return embedding
-        except Exception as e:
-            logger.warning(f"OpenAI embedding failed, using hash: {e}")
-            return self._generate_hash_embedding(text)
+        return await self._offload(self.hash_embedder.embed, texts)
     
-    def _generate_hash_embedding(self, text: str) -> np.ndarray:
+    async def _generate_remote_embeddings(self, texts: List[str]) -> np.ndarray:
         """
-        使用哈希方法生成向量（fallback）
+        调用向量接口，先查缓存，只请求未命中且去重后的文本
         
-        注意: 这是一个简单的fallback方案，仅用于测试
-        生产环境应使用真实的embedding模型
+        本地哈希向量计算比查缓存更快，因此只缓存远程向量
         """
-        import hashlib
-        hash_obj = hashlib.sha256(text.encode())
-        hash_bytes = hash_obj.digest()
+        if self.embedding_cache is None:
+            return self._check_dim(await self.embedder.embed(texts))
+        
+        model = self.embedder.model
+        vectors = await self._offload(self.embedding_cache.get_many, model, texts)
         
-        # 扩展到指定维度
-        vector = np.frombuffer(hash_bytes, dtype=np.uint8)
-        vector = np.tile(vector, (self.embedding_dim // len(vector) + 1))[:self.embedding_dim]
+        missing: Dict[str, List[int]] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(texts[i], []).append(i)
         
-        # 归一化
-        vector = vector.astype(np.float32)
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector = vector / norm
+        if missing:
+            unique_texts = list(missing)
+            embedded = self._check_dim(await self.embedder.embed(unique_texts))
+            await self._offload(self.embedding_cache.put_many, model, unique_texts, embedded)
+            for text, vector in zip(unique_texts, embedded):
+                for i in missing[text]:
+                    vectors[i] = vector
         
-        return vector
+        return np.vstack(vectors)
+    
+    def _check_dim(self, embeddings: np.ndarray) -> np.ndarray:
+        """校验接口返回的向量维度"""
+        if embeddings.shape[1] != self.embedding_dim:
+            raise ValueError(
+                f"Embedding dim {embeddings.shape[1]} does not match store dim {self.embedding_dim}"
+            )
+        return embeddings
     
     async def add_documents(self, documents: List[Dict]) -> bool:
-        """添加文档"""
+        """
+        添加文档
+        
+        先为整批文档生成向量，再一次性写日志并追加到缓冲区
+        """
         try:
-            for doc in documents:
-                # 生成向量
-                content = doc.get("content", "")
-                embedding = self._generate_embedding(content)
-                
-                # 添加文档
-                doc_with_id = {
-                    "id": f"doc_{len(self.documents)}_{datetime.now().timestamp()}",
-                    **doc
-                }
-                self.documents.append(doc_with_id)
-                
-                # 添加向量
-                if len(self.embeddings) == 0:
-                    self.embeddings = embedding.reshape(1, -1)
-                else:
-                    self.embeddings = np.vstack([self.embeddings, embedding])
+            if not documents:
+                return True
             
-            # 保存
-            self._save_data()
+            # 批量生成向量
+            embeddings = await self.embed_documents(documents)
+            
+            await self._offload(self._append_documents, documents, embeddings)
             return True
         except Exception as e:
             print(f"Error adding documents: {e}")
             return False
     
+    async def embed_documents(self, documents: List[Dict]) -> np.ndarray:
+        """为文档批量生成向量（不写入）"""
+        return await self._generate_embeddings([doc.get("content", "") for doc in documents])
+    
+    async def add_embedded_documents(self, documents: List[Dict], embeddings: np.ndarray) -> bool:
+        """写入已由 embed_documents 生成向量的文档"""
+        try:
+            if not documents:
+                return True
+            self._check_dim(embeddings)
+            if len(embeddings) != len(documents):
+                raise ValueError(f"Got {len(embeddings)} embeddings for {len(documents)} documents")
+            await self._offload(self._append_documents, documents, embeddings)
+            return True
+        except Exception as e:
+            print(f"Error adding documents: {e}")
+            return False
+    
+    def _append_documents(self, documents: List[Dict], embeddings: np.ndarray) -> None:
+        """写日志并更新内存结构（持有写锁）"""
+        with self._rw_lock.write_lock():
+            base_index = len(self.documents)
+            now = datetime.now().timestamp()
+            new_docs = [
+                {"id": f"doc_{base_index + i}_{now}", **doc}
+                for i, doc in enumerate(documents)
+            ]
+            
+            # 先追加写日志，再更新内存
+            self._storage.append(new_docs, embeddings)
+            self._bump_generation()
+            self.documents.extend(new_docs)
+            self._embeddings.append(embeddings)
+            self._metadata.extend(new_docs)
+            if self._keywords is not None:
+                self._keywords.add(new_docs)
+            if self._quantized is not None:
+                self._quantized.append(embeddings)
+            if self._ann is not None:
+                self._ann.add(self._embeddings, base_index)
+            
+            self._maybe_compact()
+    
     async def search(
         self,
         query: str,
@@ -182,66 +411,314 @@ class MemuVectorStore(VectorStoreBase):
         include_similarity: bool = False,
         **kwargs
     ) -> List[Dict]:
-        """语义搜索"""
-        if len(self.documents) == 0:
-            return []
+        """
+        语义搜索
+        
+        Args:
+            query: 查询文本
+            limit: 返回数量
+            filter_context: 只检索 metadata.context 等于该值的文档
+            time_filter: 时间范围 {"start": ISO 时间, "end": ISO 时间}（闭区间）
+            include_similarity: 结果中包含相似度
+            **kwargs: 其他参数
+                - filter: 过滤条件字典，支持 source（字符串或列表）、context、start、end
+                - filter_by_source: 来源列表
+                - include_features: 结果中包含预计算特征 features（DocumentFeatures）
+                - include_embeddings: 结果中包含文档向量 embedding（float32 数组）
+        """
+        results = await self.search_batch(
+            [query],
+            limit=limit,
+            filter_context=filter_context,
+            time_filter=time_filter,
+            include_similarity=include_similarity,
+            **kwargs
+        )
+        return results[0]
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter_context: Optional[str] = None,
+        time_filter: Optional[Dict] = None,
+        include_similarity: bool = False,
+        **kwargs
+    ) -> List[List[Dict]]:
+        """
+        批量语义搜索
+        
+        一次生成全部查询向量；暴力检索时每个向量块与全部查询做一次矩阵乘。
+        有过滤条件时先由元数据列得到候选行，只对这些行计算相似度（参数同 search）
+        """
+        if len(self.documents) == 0 or not queries:
+            return [[] for _ in queries]
         
         # 生成查询向量
-        query_embedding = self._generate_embedding(query)
+        query_embeddings = await self._generate_embeddings(queries)
         
-        # 计算余弦相似度
-        similarities = np.dot(self.embeddings, query_embedding)
+        return await self._offload(
+            self._search_embedded,
+            query_embeddings,
+            limit,
+            filter_context,
+            time_filter,
+            include_similarity,
+            kwargs
+        )
+    
+    def _search_embedded(
+        self,
+        query_embeddings: np.ndarray,
+        limit: int,
+        filter_context: Optional[str],
+        time_filter: Optional[Dict],
+        include_similarity: bool,
+        kwargs: Dict
+    ) -> List[List[Dict]]:
+        """按查询向量检索（持有读锁，过滤行号与打分基于同一份数据）"""
+        with self._rw_lock.read_lock():
+            if len(self.documents) == 0:
+                return [[] for _ in query_embeddings]
+            
+            rows = self._select_rows(filter_context, time_filter, kwargs)
+            if rows is not None and len(rows) == 0:
+                return [[] for _ in query_embeddings]
+            
+            if rows is not None:
+                # 过滤下推：只扫描候选行（ANN 候选与过滤条件无关，此时不使用）
+                positions, top_scores = blockwise_top_k_batch(
+                    self._iter_row_blocks(rows), query_embeddings, limit
+                )
+                top_indices = rows[positions]
+            elif self._ann is None and self._quantized is not None:
+                top_indices, top_scores = self._search_quantized(query_embeddings, limit)
+            elif self._ann is None:
+                # 分块计算余弦相似度并逐块保留 top-k（mmap 模式下按块流式读取）
+                top_indices, top_scores = blockwise_top_k_batch(
+                    self._iter_embedding_blocks(), query_embeddings, limit
+                )
+            else:
+                top_indices, top_scores = zip(*(
+                    self._search_vector(query_embedding, limit)
+                    for query_embedding in query_embeddings
+                ))
+            
+            # 构建结果
+            include_features = kwargs.get("include_features", False)
+            include_embeddings = kwargs.get("include_embeddings", False)
+            return [
+                self._build_results(indices, scores, include_similarity, include_features, include_embeddings)
+                for indices, scores in zip(top_indices, top_scores)
+            ]
+    
+    @property
+    def supports_keyword_search(self) -> bool:
+        return self._keywords is not None
+    
+    async def keyword_search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter_context: Optional[str] = None,
+        time_filter: Optional[Dict] = None,
+        **kwargs
+    ) -> List[Dict]:
+        """
+        BM25 关键词检索（过滤参数同 search）
         
-        # 获取 top-k
-        top_indices = np.argsort(similarities)[::-1][:limit]
+        Returns:
+            相关文档列表，每个文档带 keyword_score
+        """
+        if self._keywords is None or len(self.documents) == 0:
+            return []
+        return await self._offload(self._keyword_search, query, limit, filter_context, time_filter, kwargs)
+    
+    def _keyword_search(
+        self,
+        query: str,
+        limit: int,
+        filter_context: Optional[str],
+        time_filter: Optional[Dict],
+        kwargs: Dict
+    ) -> List[Dict]:
+        """BM25 检索（持有读锁）"""
+        with self._rw_lock.read_lock():
+            rows = self._select_rows(filter_context, time_filter, kwargs)
+            if rows is not None and len(rows) == 0:
+                return []
+            
+            indices, scores = self._keywords.search(query, limit, rows)
+            results = self._build_results(
+                indices,
+                scores,
+                include_similarity=False,
+                include_features=kwargs.get("include_features", False),
+                include_embeddings=kwargs.get("include_embeddings", False)
+            )
+        for doc, score in zip(results, scores):
+            doc["keyword_score"] = float(score)
+        return results
+    
+    def _search_quantized(self, query_embeddings: np.ndarray, limit: int):
+        """
+        量化粗排 + 全精度重排
         
-        # 构建结果
+        在量化矩阵上取 limit * rescore_multiplier 个候选，再从全精度向量（内存映射）读取这些行精确打分
+        """
+        candidates, _ = streaming_top_k_batch(
+            self._quantized.score_blocks(query_embeddings, self.search_block_size),
+            len(query_embeddings),
+            limit * self.rescore_multiplier
+        )
+        top_indices, top_scores = [], []
+        for rows, query_embedding in zip(candidates, query_embeddings):
+            order, scores = top_k(self._embeddings.take(rows) @ query_embedding, limit)
+            top_indices.append(rows[order])
+            top_scores.append(scores)
+        return top_indices, top_scores
+    
+    def _select_rows(
+        self,
+        filter_context: Optional[str],
+        time_filter: Optional[Dict],
+        kwargs: Dict
+    ) -> Optional[np.ndarray]:
+        """
+        合并各种过滤参数并查询元数据列
+        
+        Returns:
+            升序候选行号；没有过滤条件时返回 None
+        """
+        filters = dict(kwargs.get("filter") or {})
+        time_filter = time_filter or {}
+        
+        sources = filters.get("source", kwargs.get("filter_by_source"))
+        if isinstance(sources, str):
+            sources = [sources]
+        
+        context = filter_context if filter_context is not None else filters.get("context")
+        contexts = [context] if context is not None else None
+        
+        start = time_filter.get("start") or filters.get("start")
+        end = time_filter.get("end") or filters.get("end")
+        
+        return self._metadata.select(sources=sources, contexts=contexts, start=start, end=end)
+    
+    def _iter_row_blocks(self, rows: np.ndarray):
+        """按块取指定行的向量"""
+        for start in range(0, len(rows), self.search_block_size):
+            yield start, self._embeddings.take(rows[start:start + self.search_block_size])
+    
+    def _build_results(
+        self,
+        indices: np.ndarray,
+        scores: np.ndarray,
+        include_similarity: bool,
+        include_features: bool = False,
+        include_embeddings: bool = False
+    ) -> List[Dict]:
+        """按行号构建结果文档"""
+        embeddings = self._embeddings.take(indices) if include_embeddings and len(indices) else None
         results = []
-        for idx in top_indices:
+        for i, (idx, score) in enumerate(zip(indices, scores)):
             doc = self.documents[idx].copy()
             if include_similarity:
-                doc["similarity"] = float(similarities[idx])
+                doc["similarity"] = float(score)
+            if include_features:
+                doc["features"] = self._document_features(idx)
+            if embeddings is not None:
+                doc["embedding"] = embeddings[i]
             results.append(doc)
-        
         return results
     
+    def _document_features(self, idx: int) -> DocumentFeatures:
+        """
+        某行文档的预计算特征
+        
+        词项来自 BM25 索引，时间来自元数据列，均在写入时计算；未启用关键词索引时由文本计算词项
+        """
+        epoch = epoch_seconds(int(self._metadata.epochs.values[idx]))
+        if self._keywords is None:
+            tokens = tokenize(self.documents[idx].get("content", ""))
+            return DocumentFeatures(token_ids=text_token_ids(tokens), epoch=epoch, length=len(tokens))
+        return DocumentFeatures(
+            token_ids=self._keywords.row_terms(idx),
+            epoch=epoch,
+            length=self._keywords.row_length(idx)
+        )
+    
+    def _search_vector(self, query_embedding: np.ndarray, limit: int):
+        """
+        单个查询的向量检索
+        
+        有 ANN 索引时只对候选行精确重算相似度，否则分块暴力扫描
+        
+        Returns:
+            (行号数组, 相似度数组)，按相似度降序
+        """
+        candidates = self._ann.search(query_embedding, limit) if self._ann is not None else None
+        
+        if candidates is not None:
+            similarities = self._embeddings.take(candidates) @ query_embedding
+            order, scores = top_k(similarities, limit)
+            return candidates[order], scores
+        
+        # 分块计算余弦相似度并逐块保留 top-k（mmap 模式下按块流式读取）
+        return blockwise_top_k(self._iter_embedding_blocks(), query_embedding, limit)
+    
     async def delete_documents(self, ids: List[str]) -> bool:
         """删除文档"""
         try:
-            indices_to_delete = []
-            for i, doc in enumerate(self.documents):
-                if doc.get("id") in ids:
-                    indices_to_delete.append(i)
+            await self._offload(self._delete_documents, ids)
+            return True
+        except Exception as e:
+            print(f"Error deleting documents: {e}")
+            return False
+    
+    def _delete_documents(self, ids: List[str]) -> None:
+        """删除文档和向量（持有写锁）"""
+        with self._rw_lock.write_lock():
+            id_set = set(ids)
+            indices_to_delete = [
+                i for i, doc in enumerate(self.documents) if doc.get("id") in id_set
+            ]
+            
+            if not indices_to_delete:
+                return
+            
+            self._storage.delete([self.documents[i]["id"] for i in indices_to_delete])
+            self._bump_generation()
             
             # 删除文档和向量
             for idx in sorted(indices_to_delete, reverse=True):
                 del self.documents[idx]
-                self.embeddings = np.delete(self.embeddings, idx, axis=0)
+            self._embeddings.delete(indices_to_delete)
+            self._metadata.delete(indices_to_delete)
+            if self._keywords is not None:
+                self._keywords.delete(indices_to_delete)
+            if self._quantized is not None:
+                self._quantized.delete(indices_to_delete)
+            if self._ann is not None:
+                self._ann.delete(indices_to_delete)
             
-            self._save_data()
-            return True
-        except Exception as e:
-            print(f"Error deleting documents: {e}")
-            return False
+            # 删除已记入日志；use_mmap 时矩阵暂时拷贝在内存中，到合并阈值时再重新映射
+            self._maybe_compact()
     
     async def get_documents_by_date_range(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None
     ) -> List[Dict]:
-        """获取时间范围内的文档"""
-        results = []
-        for doc in self.documents:
-            timestamp = doc.get("timestamp", "")
-            
-            if start_date and timestamp < start_date:
-                continue
-            if end_date and timestamp > end_date:
-                continue
-            
-            results.append(doc)
-        
-        return results
+        """获取时间范围内的文档（时间排序索引上二分查找）"""
+        if not start_date and not end_date:
+            return self.documents.copy()
+        return await self._offload(self._documents_in_range, start_date, end_date)
+    
+    def _documents_in_range(self, start_date: Optional[str], end_date: Optional[str]) -> List[Dict]:
+        with self._rw_lock.read_lock():
+            rows = self._metadata.time_range(start_date, end_date)
+            return [self.documents[i] for i in rows]
     
     async def get_all_documents(self) -> List[Dict]:
         """获取所有文档"""
@@ -249,25 +726,41 @@ class MemuVectorStore(VectorStoreBase):
     
     async def get_statistics(self) -> Dict:
         """获取统计信息"""
-        sources = {}
-        for doc in self.documents:
-            source = doc.get("source", "unknown")
-            sources[source] = sources.get(source, 0) + 1
-        
-        return {
+        stats = {
             "count": len(self.documents),
-            "sources": sources,
+            "sources": self._metadata.source_counts(),
             "last_updated": datetime.now().isoformat(),
-            "embedding_dim": self.embedding_dim
+            "embedding_dim": self.embedding_dim,
+            "index": self.index_type,
+            "quantization": self.quantization,
+            "memory_bytes": self._embeddings.nbytes + (
+                self._quantized.nbytes if self._quantized is not None else 0
+            )
         }
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedding_cache.get_stats()
+        return stats
     
     async def clear(self) -> bool:
         """清空向量库"""
         try:
-            self.documents = []
-            self.embeddings = np.array([]).reshape(0, self.embedding_dim)
-            self._save_data()
+            await self._offload(self._clear)
             return True
         except Exception as e:
             print(f"Error clearing database: {e}")
             return False
+    
+    def _clear(self) -> None:
+        """清空内存结构并写入空快照（持有写锁）"""
+        with self._rw_lock.write_lock():
+            self._bump_generation()
+            self.documents = []
+            self._embeddings.reset()
+            self._metadata.reset(self.documents)
+            if self._keywords is not None:
+                self._keywords.reset(self.documents)
+            if self._ann is not None:
+                self._ann.reset(self._embeddings)
+            if self._quantized is not None:
+                self._quantized.reset(self._embeddings)
+            self._save_data()
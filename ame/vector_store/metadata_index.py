@@ -0,0 +1,180 @@
+"""
+列式元数据索引
+将 source / timestamp / metadata.context 存为 NumPy 列，过滤条件在计算相似度之前变成行号集合
+
+- 来源、上下文：字符串字典编码为 int32，按编码排序得到倒排表
+- 时间：解析为 int64 微秒时间戳，排序后范围查询为两次二分
+
+延迟构建的索引可能在多个检索线程（只持有共享读锁）中同时重建，
+因此先构建到局部变量，再以单个元组属性一次性发布；读取方也只读取该属性一次
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .embedding_buffer import GrowableArray
+
+logger = logging.getLogger(__name__)
+
+# 缺失或无法解析的时间戳，小于任何真实时间
+MISSING_EPOCH = np.iinfo(np.int64).min
+
+
+def parse_epoch(value) -> int:
+    """
+    ISO 时间字符串 / datetime 转为微秒时间戳
+
+    无时区的时间按本地时间解释（与文档写入时的 datetime.now().isoformat() 一致）
+    """
+    if not value:
+        return MISSING_EPOCH
+    try:
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        return int(round(value.timestamp() * 1_000_000))
+    except (ValueError, TypeError, OverflowError, OSError):
+        return MISSING_EPOCH
+
+
+class _CategoricalColumn:
+    """字典编码的字符串列，带延迟构建的倒排表"""
+
+    def __init__(self):
+        self.codes = GrowableArray(np.int32)
+        self.vocab: Dict[str, int] = {}
+        self.names: List[str] = []
+        # (按编码排序的行号, 各编码的起始偏移)
+        self._postings: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def encode(self, value: str) -> int:
+        code = self.vocab.get(value)
+        if code is None:
+            code = len(self.names)
+            self.vocab[value] = code
+            self.names.append(value)
+        return code
+
+    def extend(self, values: Iterable[str]) -> None:
+        self.codes.extend([self.encode(value) for value in values])
+        self._postings = None
+
+    def delete(self, indices: Sequence[int]) -> None:
+        self.codes.delete(indices)
+        self._postings = None
+
+    def counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.codes.values, minlength=len(self.names))
+        return {name: int(count) for name, count in zip(self.names, counts) if count}
+
+    def rows(self, values: Iterable[str]) -> np.ndarray:
+        """取值属于 values 的行号（升序）"""
+        codes = [self.vocab[value] for value in values if value in self.vocab]
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        postings = self._postings
+        if postings is None:
+            codes_column = self.codes.values
+            postings = (
+                np.argsort(codes_column, kind='stable').astype(np.int64),
+                np.concatenate([[0], np.cumsum(np.bincount(codes_column, minlength=len(self.names)))])
+            )
+            self._postings = postings
+        rows, offsets = postings
+        parts = [rows[offsets[c]:offsets[c + 1]] for c in codes]
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+
+class MetadataColumns:
+    """
+    文档元数据列
+
+    行号与 MemuVectorStore 的文档下标一致，随增删同步维护
+    """
+
+    def __init__(self):
+        self.sources = _CategoricalColumn()
+        self.contexts = _CategoricalColumn()
+        self.epochs = GrowableArray(np.int64)
+        # 时间排序索引（延迟构建）：(排序后的行号, 排序后的时间戳)
+        self._time_index: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def reset(self, documents: List[Dict]) -> None:
+        """基于全部文档重建"""
+        self.__init__()
+        self.extend(documents)
+
+    def extend(self, documents: List[Dict]) -> None:
+        """追加文档"""
+        self.sources.extend([str(doc.get("source", "unknown")) for doc in documents])
+        self.contexts.extend([
+            str((doc.get("metadata") or {}).get("context", "")) for doc in documents
+        ])
+        self.epochs.extend([parse_epoch(doc.get("timestamp")) for doc in documents])
+        self._time_index = None
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """删除行（之后的行号前移）"""
+        self.sources.delete(indices)
+        self.contexts.delete(indices)
+        self.epochs.delete(indices)
+        self._time_index = None
+
+    def source_counts(self) -> Dict[str, int]:
+        """各来源文档数"""
+        return self.sources.counts()
+
+    def time_range(self, start=None, end=None) -> np.ndarray:
+        """
+        时间范围内的行号（闭区间，升序）
+
+        Args:
+            start: 起始时间（ISO 字符串或 datetime）
+            end: 结束时间
+        """
+        time_index = self._time_index
+        if time_index is None:
+            epochs = self.epochs.values
+            order = np.argsort(epochs, kind='stable').astype(np.int64)
+            time_index = (order, epochs[order])
+            self._time_index = time_index
+        order, sorted_epochs = time_index
+
+        lo = 0
+        hi = len(sorted_epochs)
+        if start:
+            lo = np.searchsorted(sorted_epochs, parse_epoch(start), side='left')
+        if end:
+            hi = np.searchsorted(sorted_epochs, parse_epoch(end), side='right')
+        return np.sort(order[lo:hi])
+
+    def select(
+        self,
+        sources: Optional[Iterable[str]] = None,
+        contexts: Optional[Iterable[str]] = None,
+        start=None,
+        end=None
+    ) -> Optional[np.ndarray]:
+        """
+        满足全部条件的行号
+
+        Returns:
+            升序行号；没有任何条件时返回 None（表示全部行）
+        """
+        selected: Optional[np.ndarray] = None
+
+        def narrow(rows: np.ndarray) -> np.ndarray:
+            if selected is None:
+                return rows
+            return np.intersect1d(selected, rows, assume_unique=True)
+
+        if sources is not None:
+            selected = narrow(self.sources.rows(sources))
+        if contexts is not None:
+            selected = narrow(self.contexts.rows(contexts))
+        if start or end:
+            selected = narrow(self.time_range(start, end))
+        return selected
@@ -0,0 +1,179 @@
+"""
+标量量化向量存储
+为 MemuVectorStore 提供 float16 / int8 常驻矩阵，粗排后用全精度向量重排
+
+- float16：直接转换，内存减半
+- int8：逐维 min/max 线性量化（scale / offset），内存为 float32 的 1/4
+"""
+
+import os
+import logging
+from typing import Iterator, Optional, Sequence, Tuple
+import numpy as np
+from .embedding_buffer import EmbeddingBuffer
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_TYPES = ("none", "float16", "int8")
+
+
+class QuantizedMatrix:
+    """
+    量化向量矩阵
+
+    行号与全精度 EmbeddingBuffer 一致。int8 的量化参数在 reset 时按全部数据拟合，
+    之后新增的行按已有参数编码（超出范围的值截断），合并快照时重新拟合。
+    """
+
+    def __init__(self, embedding_dim: int, kind: str = "int8"):
+        """
+        初始化量化矩阵
+
+        Args:
+            embedding_dim: 向量维度
+            kind: 'float16' 或 'int8'
+        """
+        if kind not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantization: {kind}")
+        self.embedding_dim = embedding_dim
+        self.kind = kind
+        self.codes = EmbeddingBuffer(embedding_dim, dtype=np.float16 if kind == "float16" else np.int8)
+        # int8 反量化: x ≈ offset + scale * code
+        self.scale = np.ones(embedding_dim, dtype=np.float32)
+        self.offset = np.zeros(embedding_dim, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """常驻内存字节数"""
+        return self.codes.nbytes + self.scale.nbytes + self.offset.nbytes
+
+    @property
+    def needs_refit(self) -> bool:
+        """合并快照时是否需要重新拟合量化参数"""
+        return self.kind == "int8"
+
+    # ---------- 编码 ----------
+
+    def _fit(self, embeddings: EmbeddingBuffer, block_size: int) -> None:
+        """按全部数据拟合逐维 min/max"""
+        low = np.full(self.embedding_dim, np.inf, dtype=np.float32)
+        high = np.full(self.embedding_dim, -np.inf, dtype=np.float32)
+        for _, block in embeddings.blocks(block_size):
+            low = np.minimum(low, block.min(axis=0))
+            high = np.maximum(high, block.max(axis=0))
+        if not np.isfinite(low).all():
+            low[:] = -1.0
+            high[:] = 1.0
+        scale = (high - low) / 255.0
+        self.scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+        # code 取值 [-128, 127]，对应 low + scale * (code + 128)
+        self.offset = (low + 128.0 * self.scale).astype(np.float32)
+
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        """全精度向量 -> 量化编码"""
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, self.embedding_dim)
+        if self.kind == "float16":
+            return rows.astype(np.float16)
+        codes = np.rint((rows - self.offset) / self.scale)
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """量化编码 -> 近似向量"""
+        if self.kind == "float16":
+            return codes.astype(np.float32)
+        return self.offset + self.scale * codes.astype(np.float32)
+
+    def reset(self, embeddings: EmbeddingBuffer, block_size: int = 65536) -> None:
+        """
+        基于全精度向量重建（int8 会重新拟合量化参数）
+
+        Args:
+            embeddings: 全精度向量缓冲区
+            block_size: 分块编码的行数
+        """
+        if self.kind == "int8":
+            self._fit(embeddings, block_size)
+        self.codes.reset()
+        self.codes.reserve(len(embeddings))
+        for _, block in embeddings.blocks(block_size):
+            self.codes.append(self.encode(block))
+
+    def append(self, rows: np.ndarray) -> None:
+        """追加全精度向量"""
+        self.codes.append(self.encode(rows))
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """删除行（之后的行号前移）"""
+        self.codes.delete(indices)
+
+    # ---------- 检索 ----------
+
+    def score_blocks(
+        self,
+        queries: np.ndarray,
+        block_size: int
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        分块计算近似内积
+
+        int8: q·x ≈ q·offset + (q * scale)·code，只在块内把 code 转为 float32
+
+        Yields:
+            (起始行号, (查询数, 块行数) 分数矩阵)
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.kind == "int8":
+            weights = (queries * self.scale).T
+            bias = (queries @ self.offset)[:, None]
+        for offset, block in self.codes.blocks(block_size):
+            block = block.astype(np.float32)
+            if self.kind == "int8":
+                yield offset, (block @ weights).T + bias
+            else:
+                yield offset, queries @ block.T
+
+    # ---------- 持久化 ----------
+
+    def save(self, path: str) -> None:
+        """保存到 {path}.npz"""
+        np.savez(path + ".npz", codes=self.codes.to_array(), scale=self.scale, offset=self.offset)
+
+    def load(self, path: str, expected_rows: int) -> bool:
+        """
+        从 {path}.npz 加载
+
+        Returns:
+            行数与类型一致时返回 True
+        """
+        if not os.path.exists(path + ".npz"):
+            return False
+        data = np.load(path + ".npz")
+        codes = data["codes"]
+        if len(codes) != expected_rows or codes.dtype != self.codes.dtype or codes.shape[1] != self.embedding_dim:
+            return False
+        self.scale = data["scale"]
+        self.offset = data["offset"]
+        self.codes.reset(tail=codes)
+        return True
+
+
+def create_quantizer(kind: str, embedding_dim: int) -> Optional[QuantizedMatrix]:
+    """
+    创建量化矩阵
+
+    Args:
+        kind: 'none'、'float16' 或 'int8'
+        embedding_dim: 向量维度
+
+    Returns:
+        量化矩阵；none 返回 None
+    """
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind not in QUANTIZATION_TYPES:
+        raise ValueError(f"Unsupported quantization: {kind}")
+    return QuantizedMatrix(embedding_dim, kind)
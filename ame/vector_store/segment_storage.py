@@ -0,0 +1,437 @@
+"""
+追加写分段存储
+为 MemuVectorStore 提供 WAL + 向量段的持久化格式，写入代价与库大小无关
+"""
+
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Tuple, Optional, Callable, Set
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 2
+
+# 各类分代文件的扩展名
+KIND_EXTENSIONS = {"documents": "json", "index": "npy", "wal": "jsonl", "vectors": "f32"}
+
+# 分代文件名：{前缀}-{6 位代数}{后缀}
+_GENERATION_FILE = re.compile(r"^(\w+)-(\d{6})(\..+)$")
+
+# 旧版全量格式（向后兼容，首次加载时迁移）
+LEGACY_DATA_FILE = "documents.json"
+LEGACY_INDEX_FILE = "index.npy"
+
+
+class SegmentStorage:
+    """
+    分段存储
+
+    目录结构（gen 为快照代数）:
+        manifest.json          当前代数及元信息，原子替换
+        documents-{gen}.json   文档快照
+        index-{gen}.npy        向量快照 (float32)
+        wal-{gen}.jsonl        追加写日志：新增 / 删除记录
+        vectors-{gen}.f32      追加写向量段：裸 float32 行
+
+    写入只追加 WAL 和向量段；日志增长到与快照同量级时合并（compaction）
+    生成新一代快照，因此单次写入 I/O 为常数，整体摊销也是线性的。
+
+    崩溃恢复：
+        - 向量先于日志落盘，日志行引用向量段中的行号
+        - 加载时丢弃不完整的日志尾行，以及引用了不存在向量的记录
+        - 截断没有日志引用的孤立向量
+        - 合并时先写完新一代文件，再原子替换 manifest，旧代数据始终可用
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        embedding_dim: int,
+        compact_min_ops: int = 1024,
+        compact_ratio: float = 1.0,
+        fsync: bool = True,
+        use_mmap: bool = False
+    ):
+        """
+        初始化分段存储
+
+        Args:
+            db_path: 数据目录
+            embedding_dim: 向量维度
+            compact_min_ops: 触发合并的最少日志记录数
+            compact_ratio: 日志记录数超过 快照文档数 * ratio 时合并
+            fsync: 是否在每次追加后 fsync（关闭后更快，但掉电可能丢失最近写入）
+            use_mmap: 以只读内存映射方式打开向量快照（多进程共享页缓存）
+        """
+        self.db_path = db_path
+        self.embedding_dim = embedding_dim
+        self.compact_min_ops = compact_min_ops
+        self.compact_ratio = compact_ratio
+        self.fsync = fsync
+        self.use_mmap = use_mmap
+
+        self.manifest_file = os.path.join(db_path, MANIFEST_NAME)
+        # 生成快照向量所用的模型（记录在 manifest 中）
+        self.embedding_model: Optional[str] = None
+        self.generation = 0
+        self.base_count = 0
+        self.wal_ops = 0
+        self.segment_rows = 0
+        # 已知的附属文件名称（清理旧代文件时只匹配这些前缀）
+        self._sidecar_names: Set[str] = set()
+
+    # ---------- 路径 ----------
+
+    def _path(self, kind: str, generation: Optional[int] = None) -> str:
+        gen = self.generation if generation is None else generation
+        ext = KIND_EXTENSIONS[kind]
+        return os.path.join(self.db_path, f"{kind}-{gen:06d}.{ext}")
+
+    @property
+    def data_file(self) -> str:
+        """当前文档快照路径"""
+        return self._path("documents")
+
+    @property
+    def index_file(self) -> str:
+        """当前向量快照路径"""
+        return self._path("index")
+
+    def sidecar_path(self, name: str, generation: Optional[int] = None) -> str:
+        """
+        当前代附属文件的路径前缀（如 ANN 索引），由写入方自行添加扩展名
+
+        附属文件与快照同代生成，合并后旧代附属文件一并删除
+        """
+        gen = self.generation if generation is None else generation
+        self._sidecar_names.add(name)
+        return os.path.join(self.db_path, f"{name}-{gen:06d}")
+
+    @property
+    def wal_file(self) -> str:
+        return self._path("wal")
+
+    @property
+    def vectors_file(self) -> str:
+        return self._path("vectors")
+
+    # ---------- 加载 ----------
+
+    def load(self) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        """
+        加载快照并重放日志
+
+        Returns:
+            (文档列表, 快照向量, 日志新增向量)
+            快照向量在 use_mmap 时为只读内存映射
+        """
+        if not os.path.exists(self.manifest_file):
+            documents, embeddings = self._migrate_legacy()
+            if self.use_mmap:
+                embeddings = self.open_index()
+            return documents, embeddings, self._empty()
+
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.generation = int(manifest.get("generation", 0))
+        self.embedding_model = manifest.get("embedding_model")
+
+        documents, embeddings = self._load_snapshot()
+        self.base_count = len(documents)
+
+        return self._replay_wal(documents, embeddings)
+
+    def open_index(self) -> np.ndarray:
+        """打开当前向量快照（use_mmap 时不读入内存）"""
+        if not os.path.exists(self.index_file):
+            return self._empty()
+        mmap_mode = 'r' if self.use_mmap else None
+        embeddings = np.load(self.index_file, mmap_mode=mmap_mode)
+        if embeddings.dtype != np.float32:
+            embeddings = embeddings.astype(np.float32)
+        return embeddings
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros((0, self.embedding_dim), dtype=np.float32)
+
+    def _load_snapshot(self) -> Tuple[List[Dict], np.ndarray]:
+        """加载当前代快照"""
+        documents: List[Dict] = []
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                documents = json.load(f)
+
+        embeddings = self.open_index()
+
+        if len(documents) != len(embeddings):
+            logger.error(
+                f"Snapshot mismatch: {len(documents)} documents vs {len(embeddings)} embeddings, truncating"
+            )
+            n = min(len(documents), len(embeddings))
+            documents, embeddings = documents[:n], embeddings[:n]
+
+        return documents, embeddings
+
+    def _replay_wal(
+        self,
+        documents: List[Dict],
+        embeddings: np.ndarray
+    ) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        """重放日志，丢弃崩溃遗留的不完整记录"""
+        row_bytes = self.embedding_dim * 4
+        segment_size = os.path.getsize(self.vectors_file) if os.path.exists(self.vectors_file) else 0
+        available_rows = segment_size // row_bytes
+
+        records = []
+        valid_bytes = 0
+        if os.path.exists(self.wal_file):
+            with open(self.wal_file, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get("op") == "add" and record.get("row", -1) >= available_rows:
+                        break
+                    records.append(record)
+                    valid_bytes += len(line)
+
+            if valid_bytes < os.path.getsize(self.wal_file):
+                logger.warning(f"Truncating incomplete WAL tail in {self.wal_file}")
+                with open(self.wal_file, 'r+b') as f:
+                    f.truncate(valid_bytes)
+
+        used_rows = max((r["row"] + 1 for r in records if r.get("op") == "add"), default=0)
+        if used_rows < available_rows or segment_size % row_bytes:
+            logger.warning(f"Truncating {available_rows - used_rows} orphan vectors in {self.vectors_file}")
+            with open(self.vectors_file, 'r+b') as f:
+                f.truncate(used_rows * row_bytes)
+        self.segment_rows = used_rows
+        self.wal_ops = len(records)
+
+        if not records:
+            return documents, embeddings, self._empty()
+
+        if used_rows:
+            segment = np.fromfile(self.vectors_file, dtype=np.float32, count=used_rows * self.embedding_dim)
+            segment = segment.reshape(used_rows, self.embedding_dim)
+        else:
+            segment = np.zeros((0, self.embedding_dim), dtype=np.float32)
+
+        # 按顺序重放：删除只作用于其之前出现的文档
+        entries = [(doc, ("base", i)) for i, doc in enumerate(documents)]
+        alive = [True] * len(entries)
+        positions: Dict[str, List[int]] = {}
+        for pos, (doc, _) in enumerate(entries):
+            positions.setdefault(doc.get("id"), []).append(pos)
+
+        for record in records:
+            if record.get("op") == "add":
+                doc = record["doc"]
+                positions.setdefault(doc.get("id"), []).append(len(entries))
+                entries.append((doc, ("segment", record["row"])))
+                alive.append(True)
+            elif record.get("op") == "delete":
+                for doc_id in record.get("ids", []):
+                    for pos in positions.pop(doc_id, []):
+                        alive[pos] = False
+
+        kept = [entry for entry, ok in zip(entries, alive) if ok]
+        base_rows = [loc[1] for _, loc in kept if loc[0] == "base"]
+        segment_rows = [loc[1] for _, loc in kept if loc[0] == "segment"]
+        # 快照行始终位于日志新增行之前，两段顺序与文档顺序一致
+        if len(base_rows) < len(embeddings):
+            # 快照中有行被删除，只能拷贝出存活行（下次合并后恢复映射）
+            embeddings = embeddings[base_rows]
+
+        logger.info(f"Replayed {len(records)} WAL records on generation {self.generation}")
+        return [doc for doc, _ in kept], embeddings, segment[segment_rows]
+
+    def _migrate_legacy(self) -> Tuple[List[Dict], np.ndarray]:
+        """迁移旧版 documents.json + index.npy 格式"""
+        legacy_data = os.path.join(self.db_path, LEGACY_DATA_FILE)
+        legacy_index = os.path.join(self.db_path, LEGACY_INDEX_FILE)
+
+        documents: List[Dict] = []
+        embeddings = np.zeros((0, self.embedding_dim), dtype=np.float32)
+        if os.path.exists(legacy_data):
+            with open(legacy_data, 'r', encoding='utf-8') as f:
+                documents = json.load(f)
+        if os.path.exists(legacy_index):
+            embeddings = np.load(legacy_index).astype(np.float32, copy=False)
+
+        if len(documents) != len(embeddings):
+            n = min(len(documents), len(embeddings))
+            logger.error(f"Legacy store mismatch, keeping first {n} documents")
+            documents, embeddings = documents[:n], embeddings[:n]
+
+        self.compact(documents, embeddings)
+
+        for path in (legacy_data, legacy_index):
+            if os.path.exists(path):
+                os.remove(path)
+        if documents:
+            logger.info(f"Migrated {len(documents)} documents to segment format")
+
+        return documents, embeddings
+
+    # ---------- 写入 ----------
+
+    def append(self, documents: List[Dict], embeddings: np.ndarray) -> None:
+        """
+        追加文档
+
+        Args:
+            documents: 新文档（已带 id）
+            embeddings: 对应向量 (n, dim)
+        """
+        if not documents:
+            return
+
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(documents), self.embedding_dim)
+        with open(self.vectors_file, 'ab') as f:
+            f.write(vectors.tobytes())
+            self._sync(f)
+
+        lines = []
+        for i, doc in enumerate(documents):
+            record = {"op": "add", "row": self.segment_rows + i, "doc": doc}
+            lines.append(json.dumps(record, ensure_ascii=False))
+        self._append_wal(lines)
+
+        self.segment_rows += len(documents)
+        self.wal_ops += len(documents)
+
+    def delete(self, ids: List[str]) -> None:
+        """记录删除"""
+        if not ids:
+            return
+        self._append_wal([json.dumps({"op": "delete", "ids": list(ids)}, ensure_ascii=False)])
+        self.wal_ops += 1
+
+    def _append_wal(self, lines: List[str]) -> None:
+        with open(self.wal_file, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+            self._sync(f)
+
+    def _sync(self, f) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    # ---------- 合并 ----------
+
+    def needs_compaction(self) -> bool:
+        """日志是否已经大到值得合并"""
+        return self.wal_ops >= max(self.compact_min_ops, self.base_count * self.compact_ratio)
+
+    def compact(
+        self,
+        documents: List[Dict],
+        embeddings: np.ndarray,
+        sidecars: Optional[Dict[str, Callable[[str], None]]] = None
+    ) -> None:
+        """
+        将内存状态写成新一代快照并清空日志
+
+        Args:
+            documents: 全部文档
+            embeddings: 全部向量
+            sidecars: 附属文件写入函数 {名称: writer(路径前缀)}，在切换 manifest 前写入
+        """
+        old_generation = self.generation if os.path.exists(self.manifest_file) else None
+        new_generation = self.generation + 1 if old_generation is not None else 1
+
+        data_file = self._path("documents", new_generation)
+        index_file = self._path("index", new_generation)
+
+        self._write_atomic(
+            data_file,
+            lambda f: f.write(json.dumps(documents, ensure_ascii=False).encode('utf-8'))
+        )
+        self._write_atomic(
+            index_file,
+            lambda f: np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        )
+        for kind in ("wal", "vectors"):
+            open(self._path(kind, new_generation), 'wb').close()
+        for name, writer in (sidecars or {}).items():
+            try:
+                writer(self.sidecar_path(name, new_generation))
+            except Exception as e:
+                # 附属文件可由数据重建，写入失败不影响快照
+                logger.warning(f"Failed to write sidecar {name}: {e}")
+
+        self._write_manifest(new_generation, len(documents))
+
+        self.generation = new_generation
+        self.base_count = len(documents)
+        self.wal_ops = 0
+        self.segment_rows = 0
+
+        self._remove_stale_generations()
+        logger.debug(f"Compacted {len(documents)} documents into generation {new_generation}")
+
+    def set_embedding_model(self, model: str) -> None:
+        """记录向量模型（立即改写 manifest）"""
+        self.embedding_model = model
+        self._write_manifest(self.generation, self.base_count)
+
+    def _write_manifest(self, generation: int, count: int) -> None:
+        manifest = {
+            "version": FORMAT_VERSION,
+            "generation": generation,
+            "count": count,
+            "embedding_dim": self.embedding_dim
+        }
+        if self.embedding_model:
+            manifest["embedding_model"] = self.embedding_model
+        self._write_atomic(
+            self.manifest_file,
+            lambda f: f.write(json.dumps(manifest).encode('utf-8'))
+        )
+
+    def _write_atomic(self, path: str, writer) -> None:
+        """写入临时文件后原子替换"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+            self._sync(f)
+        os.replace(tmp_path, path)
+
+    def _remove_stale_generations(self) -> None:
+        """删除非当前代的文件（含附属文件），目录中的其他文件不受影响"""
+        for name in os.listdir(self.db_path):
+            generation = self._file_generation(name)
+            if generation is None or generation == self.generation:
+                continue
+            path = os.path.join(self.db_path, name)
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to remove stale file {path}: {e}")
+
+    def _file_generation(self, name: str) -> Optional[int]:
+        """
+        本存储写入的分代文件返回其代数，其他文件返回 None
+
+        快照 / 日志 / 向量段只匹配各自扩展名（含原子写入遗留的 .tmp）；
+        附属文件匹配已登记的名称，扩展名由写入方决定
+        """
+        match = _GENERATION_FILE.match(name)
+        if match is None:
+            return None
+        prefix, generation, suffix = match.groups()
+        if prefix in KIND_EXTENSIONS:
+            ext = "." + KIND_EXTENSIONS[prefix]
+            if suffix not in (ext, ext + ".tmp"):
+                return None
+        elif prefix not in self._sidecar_names:
+            return None
+        return int(generation)
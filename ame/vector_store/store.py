@@ -5,24 +5,30 @@
 
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 import os
 from typing import List, Dict, Optional
 from datetime import datetime
+import numpy as np
 from .base import VectorStoreBase
+from .embedding_cache import EmbeddingCache, CachedEmbeddingFunction
 
 # 默认配置
 DEFAULT_VECTOR_DB_PATH = "./data/vector_store"
+# ChromaDB 默认 embedding function 使用的模型（缓存键）
+CHROMA_DEFAULT_EMBEDDING_MODEL = "chroma-all-MiniLM-L6-v2"
 
 
 class ChromaVectorStore(VectorStoreBase):
     """ChromaDB 向量存储实现"""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, embedding_cache: Optional[EmbeddingCache] = None):
         """
         初始化 ChromaDB 向量存储
         
         Args:
             db_path: 数据库路径
+            embedding_cache: 向量缓存（包装 ChromaDB 默认 embedding function）
         """
         # 初始化 ChromaDB (可替换为 Memu)
         path = db_path or os.getenv("VECTOR_DB_PATH", DEFAULT_VECTOR_DB_PATH)
@@ -32,9 +38,27 @@ class ChromaVectorStore(VectorStoreBase):
             path=path,
             settings=Settings(anonymized_telemetry=False)
         )
-        self.collection = self.client.get_or_create_collection(
+        
+        self.embedding_cache = embedding_cache
+        self._embedding_function = None
+        if embedding_cache is not None:
+            self._embedding_function = CachedEmbeddingFunction(
+                embedding_functions.DefaultEmbeddingFunction(),
+                cache=embedding_cache,
+                model_name=CHROMA_DEFAULT_EMBEDDING_MODEL
+            )
+        
+        self.collection = self._get_or_create_collection()
+    
+    def _get_or_create_collection(self):
+        """获取或创建集合"""
+        kwargs = {}
+        if self._embedding_function is not None:
+            kwargs["embedding_function"] = self._embedding_function
+        return self.client.get_or_create_collection(
             name="another_me_memories",
-            metadata={"description": "用户记忆向量库"}
+            metadata={"description": "用户记忆向量库"},
+            **kwargs
         )
     
     async def add_documents(self, documents: List[Dict]) -> bool:
@@ -60,6 +84,7 @@ class ChromaVectorStore(VectorStoreBase):
             documents=texts,
             metadatas=metadatas
         )
+        self._bump_generation()
         
         return True
     
@@ -74,6 +99,31 @@ class ChromaVectorStore(VectorStoreBase):
         **kwargs
     ) -> List[Dict]:
         """语义搜索"""
+        results = await self.search_batch(
+            [query],
+            limit=limit,
+            filter_context=filter_context,
+            filter_by_source=filter_by_source,
+            time_filter=time_filter,
+            include_similarity=include_similarity,
+            **kwargs
+        )
+        return results[0]
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter_context: Optional[str] = None,
+        filter_by_source: Optional[List[str]] = None,
+        time_filter: Optional[Dict] = None,
+        include_similarity: bool = False,
+        **kwargs
+    ) -> List[List[Dict]]:
+        """批量语义搜索（单次 collection.query）"""
+        if not queries:
+            return []
+        
         # 构建过滤条件
         where = {}
         if filter_by_source:
@@ -82,35 +132,47 @@ class ChromaVectorStore(VectorStoreBase):
         # TODO: 添加时间过滤逻辑
         
         # 执行查询
+        include = ["documents", "metadatas", "distances"]
+        if kwargs.get("include_embeddings"):
+            include.append("embeddings")
         results = self.collection.query(
-            query_texts=[query],
+            query_texts=queries,
             n_results=limit,
-            where=where if where else None
+            where=where if where else None,
+            include=include
         )
         
         # 格式化结果
-        documents = []
-        if results["documents"] and results["documents"][0]:
-            for i, doc in enumerate(results["documents"][0]):
-                metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-                doc_dict = {
-                    "content": doc,
-                    "source": metadata.get("source", "unknown"),
-                    "timestamp": metadata.get("timestamp", ""),
-                    "metadata": metadata
-                }
-                
-                if include_similarity and results["distances"]:
-                    doc_dict["similarity"] = 1 - results["distances"][0][i]  # 转换距离为相似度
-                
-                documents.append(doc_dict)
+        batch = []
+        for q in range(len(queries)):
+            documents = []
+            if results["documents"] and results["documents"][q]:
+                for i, doc in enumerate(results["documents"][q]):
+                    metadata = results["metadatas"][q][i] if results["metadatas"] else {}
+                    doc_dict = {
+                        "id": results["ids"][q][i],
+                        "content": doc,
+                        "source": metadata.get("source", "unknown"),
+                        "timestamp": metadata.get("timestamp", ""),
+                        "metadata": metadata
+                    }
+                    
+                    if include_similarity and results["distances"]:
+                        doc_dict["similarity"] = 1 - results["distances"][q][i]  # 转换距离为相似度
+                    
+                    if results.get("embeddings") is not None:
+                        doc_dict["embedding"] = np.asarray(results["embeddings"][q][i], dtype=np.float32)
+                    
+                    documents.append(doc_dict)
+            batch.append(documents)
         
-        return documents
+        return batch
     
     async def delete_documents(self, ids: List[str]) -> bool:
         """删除文档"""
         try:
             self.collection.delete(ids=ids)
+            self._bump_generation()
             return True
         except Exception as e:
             print(f"Error deleting documents: {e}")
@@ -120,10 +182,8 @@ class ChromaVectorStore(VectorStoreBase):
         """清空向量库"""
         try:
             self.client.delete_collection(name="another_me_memories")
-            self.collection = self.client.get_or_create_collection(
-                name="another_me_memories",
-                metadata={"description": "用户记忆向量库"}
-            )
+            self.collection = self._get_or_create_collection()
+            self._bump_generation()
             return True
         except Exception as e:
             print(f"Error clearing database: {e}")
@@ -185,8 +245,11 @@ class ChromaVectorStore(VectorStoreBase):
             source = metadata.get("source", "unknown")
             sources[source] = sources.get(source, 0) + 1
         
-        return {
+        stats = {
             "count": count,
             "sources": sources,
             "last_updated": datetime.now().isoformat()
         }
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedding_cache.get_stats()
+        return stats
@@ -0,0 +1,139 @@
+"""
+Top-k 选择
+argpartition 只做 O(N) 的部分选择，再对 k 个幸存者排序，替代 O(N log N) 的全量 argsort
+"""
+
+from typing import Iterable, Tuple
+import numpy as np
+
+
+def top_k_batch(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    逐行取分数最高的 k 个
+
+    Args:
+        scores: (查询数, N) 分数矩阵
+        k: 每行返回数量
+
+    Returns:
+        (下标矩阵, 分数矩阵)，形状 (查询数, min(k, N))，每行按分数降序；分数相同时下标小的在前
+    """
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return (
+            np.empty((len(scores), 0), dtype=np.int64),
+            np.empty((len(scores), 0), dtype=scores.dtype)
+        )
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+
+    # 幸存者按 (分数降序, 下标升序) 排序
+    order = np.lexsort((candidates, -candidate_scores), axis=-1)
+    indices = np.take_along_axis(candidates, order, axis=1).astype(np.int64)
+    return indices, np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    取分数最高的 k 个
+
+    Args:
+        scores: 一维分数数组
+        k: 返回数量
+
+    Returns:
+        (下标数组, 分数数组)，按分数降序；分数相同时下标小的在前
+    """
+    indices, values = top_k_batch(scores.reshape(1, -1), k)
+    return indices[0], values[0]
+
+
+def merge_top_k_batch(
+    indices_a: np.ndarray,
+    scores_a: np.ndarray,
+    indices_b: np.ndarray,
+    scores_b: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """逐行合并两组 top-k 结果"""
+    indices = np.concatenate([indices_a, indices_b], axis=1)
+    scores = np.concatenate([scores_a, scores_b], axis=1)
+    positions, merged_scores = top_k_batch(scores, k)
+    return np.take_along_axis(indices, positions, axis=1), merged_scores
+
+
+def streaming_top_k_batch(
+    score_blocks: Iterable[Tuple[int, np.ndarray]],
+    num_queries: int,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    对逐块产生的分数做 top-k
+
+    Args:
+        score_blocks: (起始行号, (查询数, 块行数) 分数矩阵) 迭代器
+        num_queries: 查询数
+        k: 每个查询返回数量
+
+    Returns:
+        (行号矩阵, 分数矩阵)，每行按分数降序
+    """
+    best_indices = np.empty((num_queries, 0), dtype=np.int64)
+    best_scores = np.empty((num_queries, 0), dtype=np.float32)
+    for offset, scores in score_blocks:
+        block_indices, block_scores = top_k_batch(scores, k)
+        best_indices, best_scores = merge_top_k_batch(
+            best_indices, best_scores, block_indices + offset, block_scores, k
+        )
+    return best_indices, best_scores
+
+
+def blockwise_top_k_batch(
+    blocks: Iterable[Tuple[int, np.ndarray]],
+    queries: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    分块内积 top-k（多查询）
+
+    每块与全部查询做一次矩阵乘，只保留块内 top-k 再与当前结果合并，
+    临时内存与 块大小 x 查询数 成正比，不随总行数增长
+
+    Args:
+        blocks: (起始行号, 向量块) 迭代器，见 EmbeddingBuffer.blocks
+        queries: (查询数, dim) 查询向量
+        k: 每个查询返回数量
+
+    Returns:
+        (行号矩阵, 相似度矩阵)，每行按相似度降序
+    """
+    return streaming_top_k_batch(
+        ((offset, queries @ block.T) for offset, block in blocks),
+        len(queries),
+        k
+    )
+
+
+def blockwise_top_k(
+    blocks: Iterable[Tuple[int, np.ndarray]],
+    query: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    分块内积 top-k
+
+    Args:
+        blocks: (起始行号, 向量块) 迭代器，见 EmbeddingBuffer.blocks
+        query: 查询向量
+        k: 返回数量
+
+    Returns:
+        (行号数组, 相似度数组)，按相似度降序
+    """
+    indices, scores = blockwise_top_k_batch(blocks, query.reshape(1, -1), k)
+    return indices[0], scores[0]
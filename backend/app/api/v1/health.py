@@ -4,6 +4,7 @@
 from fastapi import APIRouter
 from app.models.responses import HealthResponse
 from app.core.config import get_settings
+from app.core.loop_monitor import get_loop_monitor
 from datetime import datetime
 
 router = APIRouter()
@@ -22,5 +23,6 @@ async def health_check():
     return HealthResponse(
         status="ok",
         version=settings.APP_VERSION,
-        timestamp=datetime.now()
+        timestamp=datetime.now(),
+        event_loop_lag=get_loop_monitor().get_stats()
     )
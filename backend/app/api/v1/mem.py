@@ -3,7 +3,7 @@ MEM 对话 API
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from typing import List
+from typing import List, Dict, Any
 
 from app.services.mem_service import MEMService, get_mem_service
 from app.models.requests import ChatRequest, LearnRequest
@@ -220,3 +220,49 @@ async def delete_memory(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Delete failed: {str(e)}"
         )
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(
+    service: MEMService = Depends(get_mem_service)
+) -> Dict[str, Any]:
+    """
+    获取 LLM 响应缓存统计
+    
+    Args:
+        service: MEM 服务实例
+        
+    Returns:
+        精确响应缓存与语义缓存的命中统计
+    """
+    try:
+        return service.get_cache_stats()
+        
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+
+@router.get("/rate-limit-stats")
+async def get_rate_limit_stats(
+    service: MEMService = Depends(get_mem_service)
+) -> Dict[str, Any]:
+    """
+    获取 LLM 准入控制统计
+    
+    Args:
+        service: MEM 服务实例
+        
+    Returns:
+        在途请求数、排队等待时间与上游限流次数
+    """
+    try:
+        return service.get_rate_limit_stats()
+        
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
@@ -2,19 +2,22 @@
 RAG 知识库 API
 """
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 import shutil
 from pathlib import Path
 import uuid
 
 from app.services.rag_service import RAGService, get_rag_service
+from ame.rag.ingestion import IngestionQueueFull
 from app.models.requests import SearchRequest
 from app.models.responses import (
     UploadResponse,
     SearchResponse,
     RAGStats,
     DocumentInfo,
-    BaseResponse
+    BaseResponse,
+    IngestionJobInfo
 )
 from app.core.config import get_settings
 from app.core.logger import get_logger
@@ -31,12 +34,14 @@ async def upload_document(
     """
     上传文档到知识库
     
+    文件保存后登记后台导入任务并立即返回，进度通过 GET /jobs/{job_id} 查询
+    
     Args:
         file: 上传的文件
         service: RAG 服务实例
         
     Returns:
-        上传结果
+        上传结果（含任务 ID）
     """
     settings = get_settings()
     
@@ -53,11 +58,10 @@ async def upload_document(
     file_path = settings.UPLOADS_DIR / f"{file_id}{file_ext}"
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await run_in_threadpool(_save_upload, file, file_path)
         
-        # 处理文档
-        result = await service.upload_document(
+        # 登记后台导入任务
+        result = await service.submit_document(
             file_path=str(file_path),
             filename=file.filename
         )
@@ -65,8 +69,17 @@ async def upload_document(
         return UploadResponse(
             success=True,
             document_id=result["document_id"],
+            job_id=result["job_id"],
             filename=file.filename,
-            message="Document uploaded successfully"
+            message="Document queued for ingestion"
+        )
+        
+    except IngestionQueueFull as e:
+        if file_path.exists():
+            file_path.unlink()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
         )
         
     except Exception as e:
@@ -80,6 +93,12 @@ async def upload_document(
         )
 
 
+def _save_upload(file: UploadFile, file_path: Path) -> None:
+    """保存上传文件（在线程池中执行）"""
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+
 @router.post("/search", response_model=SearchResponse)
 async def search_knowledge(
     request: SearchRequest,
@@ -190,3 +209,27 @@ async def get_stats(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get stats: {str(e)}"
         )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobInfo)
+async def get_job(
+    job_id: str,
+    service: RAGService = Depends(get_rag_service)
+):
+    """
+    查询后台导入任务
+    
+    Args:
+        job_id: 任务 ID
+        service: RAG 服务实例
+        
+    Returns:
+        任务阶段、进度、吞吐与错误信息
+    """
+    job = service.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return job
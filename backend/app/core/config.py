@@ -4,7 +4,7 @@
 """
 import os
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -26,6 +26,21 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
     OPENAI_MODEL: str = "gpt-3.5-turbo"
+    LLM_CACHE_BACKEND: str = "memory"  # 精确响应缓存：memory（进程内 LRU）/ sqlite（多 worker 共享）
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_CACHE_TTL: float = 86400.0  # 秒，0 为不过期
+    LLM_CACHE_PATH: Optional[Path] = None
+    LLM_MAX_CONCURRENCY: int = 8  # 进程内最大在途 LLM 请求数（所有 LLMCaller 共享）
+    LLM_REQUESTS_PER_MINUTE: float = 0  # 每分钟请求数预算，0 为不限制
+    LLM_TOKENS_PER_MINUTE: float = 0  # 每分钟 token 预算，0 为不限制
+    HTTP_MAX_CONNECTIONS: int = 100  # 共享连接池（对话与向量请求共用）最大连接数
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20  # 最大空闲保活连接数
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # 空闲连接保活时间（秒）
+    HTTP2: bool = False  # 启用 HTTP/2（需要安装 h2）
+    LLM_SEMANTIC_CACHE: bool = False  # 语义响应缓存：改写过的相同提问直接返回缓存回复
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.95  # 命中所需的最小余弦相似度
+    LLM_SEMANTIC_CACHE_PATH: Optional[Path] = None
     
     # 数据路径配置
     DATA_DIR: Path = Field(default_factory=lambda: Path(__file__).parent.parent.parent.parent / "data")
@@ -37,11 +52,28 @@ class Settings(BaseSettings):
     # 向量数据库配置
     VECTOR_STORE_TYPE: str = "memu"
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    VECTOR_STORE_MMAP: bool = False  # 内存映射向量快照，多 worker 共享页缓存
+    USE_OPENAI_EMBEDDING: bool = False
+    EMBEDDING_BATCH_SIZE: int = 256  # 单个 embeddings 请求最多文本条数
+    EMBEDDING_MAX_BATCH_TOKENS: int = 100000  # 单个请求 token 预算
+    EMBEDDING_CONCURRENCY: int = 4  # 同时在途的 embeddings 请求数
+    EMBEDDING_CACHE_PATH: Optional[Path] = None  # 向量缓存（RAG 与 MEM 共享）
+    VECTOR_STORE_INDEX: str = "flat"  # 检索索引：flat / ivf / hnsw（需要 hnswlib）
+    VECTOR_STORE_NPROBE: int = 8  # IVF 查询扫描的聚类数
+    VECTOR_STORE_QUANTIZATION: str = "none"  # 常驻向量量化：none / float16 / int8
+    VECTOR_STORE_KEYWORD_INDEX: bool = True  # 维护 BM25 关键词索引（混合检索的关键词通道）
+    VECTOR_STORE_OFFLOAD: bool = True  # 相似度计算与写盘放到存储线程池，不阻塞事件循环
     
     # RAG 配置
     RAG_TOP_K: int = 5
-    RAG_CHUNK_SIZE: int = 500
-    RAG_CHUNK_OVERLAP: int = 50
+    RAG_CHUNK_SIZE: int = 500  # 分块 token 数上限，0 为按空行切分段落
+    RAG_CHUNK_OVERLAP: int = 50  # 相邻分块重叠的 token 数
+    RAG_QUERY_CACHE_SIZE: int = 256  # 检索结果缓存条目数，0 为禁用
+    RAG_QUERY_CACHE_TTL: float = 300.0  # 检索结果缓存有效期（秒）
+    RAG_INGEST_WORKERS: int = 2  # 后台导入同时处理的任务数
+    RAG_INGEST_MAX_PENDING: int = 100  # 排队与处理中的导入任务上限，超出时拒绝上传
+    RAG_INGEST_BATCH_SIZE: int = 64  # 每次向量化与写入的分块数
+    RAG_JOBS_DB_PATH: Optional[Path] = None  # 导入任务状态（重启后续跑）
     
     # MEM 配置
     MEM_TOP_K: int = 10
@@ -79,10 +111,71 @@ class Settings(BaseSettings):
             self.UPLOADS_DIR = self.DATA_DIR / "uploads"
             self.UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
         
+        if not self.EMBEDDING_CACHE_PATH:
+            self.EMBEDDING_CACHE_PATH = self.DATA_DIR / "cache" / "embeddings.db"
+            self.EMBEDDING_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        
+        if not self.LLM_CACHE_PATH:
+            self.LLM_CACHE_PATH = self.DATA_DIR / "cache" / "llm_responses.db"
+            self.LLM_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        
+        if not self.LLM_SEMANTIC_CACHE_PATH:
+            self.LLM_SEMANTIC_CACHE_PATH = self.DATA_DIR / "cache" / "llm_semantic_cache.db"
+            self.LLM_SEMANTIC_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        
+        if not self.RAG_JOBS_DB_PATH:
+            self.RAG_JOBS_DB_PATH = self.DATA_DIR / "rag_jobs.db"
+        
         if not self.CONFIG_DIR:
             self.CONFIG_DIR = self.DATA_DIR / "config"
             self.CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     
+    def get_vector_store_options(self) -> Dict[str, Any]:
+        """向量存储参数（传递给 VectorStoreFactory）"""
+        return {
+            "use_mmap": self.VECTOR_STORE_MMAP,
+            "use_openai_embedding": self.USE_OPENAI_EMBEDDING,
+            "embedding_model": self.EMBEDDING_MODEL,
+            "embedding_api_key": self.OPENAI_API_KEY,
+            "embedding_base_url": self.OPENAI_BASE_URL,
+            "embedding_batch_size": self.EMBEDDING_BATCH_SIZE,
+            "embedding_max_batch_tokens": self.EMBEDDING_MAX_BATCH_TOKENS,
+            "embedding_concurrency": self.EMBEDDING_CONCURRENCY,
+            "embedding_cache_path": str(self.EMBEDDING_CACHE_PATH),
+            "index": self.VECTOR_STORE_INDEX,
+            "index_params": {"nprobe": self.VECTOR_STORE_NPROBE} if self.VECTOR_STORE_INDEX == "ivf" else None,
+            "quantization": self.VECTOR_STORE_QUANTIZATION,
+            "keyword_index": self.VECTOR_STORE_KEYWORD_INDEX,
+            "offload": self.VECTOR_STORE_OFFLOAD,
+        }
+    
+    def get_llm_cache_options(self) -> Dict[str, Any]:
+        """LLM 精确响应缓存参数（传递给 get_response_cache）"""
+        return {
+            "backend": self.LLM_CACHE_BACKEND,
+            "path": str(self.LLM_CACHE_PATH) if self.LLM_CACHE_BACKEND == "sqlite" else None,
+            "max_entries": self.LLM_CACHE_MAX_ENTRIES,
+            "max_bytes": self.LLM_CACHE_MAX_BYTES,
+            "ttl_seconds": self.LLM_CACHE_TTL,
+        }
+    
+    def get_llm_rate_limit_options(self) -> Dict[str, Any]:
+        """LLM 准入控制参数（传递给 get_rate_limiter）"""
+        return {
+            "max_concurrency": self.LLM_MAX_CONCURRENCY,
+            "requests_per_minute": self.LLM_REQUESTS_PER_MINUTE,
+            "tokens_per_minute": self.LLM_TOKENS_PER_MINUTE,
+        }
+    
+    def get_http_pool_options(self) -> Dict[str, Any]:
+        """共享 HTTP 连接池参数（传递给 get_http_client）"""
+        return {
+            "max_connections": self.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": self.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": self.HTTP_KEEPALIVE_EXPIRY,
+            "http2": self.HTTP2,
+        }
+    
     @property
     def is_configured(self) -> bool:
         """检查是否已配置 API Key"""
@@ -0,0 +1,14 @@
+"""
+事件循环延迟监控
+应用启动时开始采样，健康检查接口返回统计，用于确认导入等重负载期间流式响应不被阻塞
+"""
+from ame.vector_store.executor import LoopLagMonitor
+
+
+# 全局监控实例
+loop_monitor = LoopLagMonitor(interval=0.1)
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """获取事件循环延迟监控实例"""
+    return loop_monitor
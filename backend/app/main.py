@@ -10,6 +10,9 @@ from app.middleware.logging import LoggingMiddleware
 from app.middleware.error_handler import ErrorHandlerMiddleware
 from app.core.config import get_settings
 from app.core.logger import setup_logging, get_logger
+from app.core.loop_monitor import get_loop_monitor
+from app.services.rag_service import get_rag_service
+from ame.llm_caller.http_pool import close_http_clients
 
 
 # 初始化日志
@@ -26,11 +29,24 @@ async def lifespan(app: FastAPI):
     logger.info(f"Version: {settings.APP_VERSION}")
     logger.info(f"Debug Mode: {settings.DEBUG}")
     logger.info(f"Data Directory: {settings.DATA_DIR}")
+    get_loop_monitor().start()
+    
+    # 恢复上次未完成的导入任务
+    try:
+        await get_rag_service().ingestion.start()
+    except Exception as e:
+        logger.error(f"Failed to start ingestion workers: {e}")
     
     yield
     
     # 关闭时
     logger.info("Shutting down Another Me API...")
+    await get_loop_monitor().stop()
+    try:
+        await get_rag_service().ingestion.stop()
+    except Exception as e:
+        logger.error(f"Failed to stop ingestion workers: {e}")
+    await close_http_clients()
 
 
 # 创建 FastAPI 应用
@@ -18,6 +18,7 @@ class HealthResponse(BaseModel):
     status: str = Field("ok", description="服务状态")
     version: str = Field("1.0.0", description="API 版本")
     timestamp: datetime = Field(default_factory=datetime.now, description="时间戳")
+    event_loop_lag: Optional[Dict[str, Any]] = Field(None, description="事件循环延迟统计（毫秒）")
 
 
 class ChatResponse(BaseModel):
@@ -41,6 +42,25 @@ class UploadResponse(BaseModel):
     document_id: str = Field(..., description="文档 ID")
     filename: str
     message: str = "Document uploaded successfully"
+    job_id: Optional[str] = Field(None, description="后台导入任务 ID")
+
+
+class IngestionJobInfo(BaseModel):
+    """导入任务状态"""
+    id: str = Field(..., description="任务 ID")
+    filename: str
+    status: str = Field(..., description="queued / running / completed / failed")
+    stage: str = Field(..., description="当前阶段：parse（解析与分块）/ embed / index")
+    chunks_total: int = Field(0, description="已解析分块数（解析结束后为分块总数）")
+    chunks_done: int = Field(0, description="已写入分块数")
+    bytes_total: int = Field(0, description="文件大小（字节）")
+    bytes_done: int = Field(0, description="已写入分块在文件中的字节位置")
+    progress: float = Field(0.0, description="进度（0-1），按 bytes_done / bytes_total 计算")
+    chunks_per_second: float = Field(0.0, description="写入吞吐（分块/秒）")
+    error: Optional[str] = Field(None, description="失败原因")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 
 class SearchResult(BaseModel):
@@ -62,6 +82,9 @@ class RAGStats(BaseModel):
     document_count: int = Field(0, description="文档总数")
     total_chunks: int = Field(0, description="总分块数")
     total_size: int = Field(0, description="总大小（字节）")
+    query_cache_hit_ratio: float = Field(0.0, description="检索结果缓存命中率")
+    query_cache: Dict[str, Any] = Field(default_factory=dict, description="检索结果缓存统计")
+    ingestion: Dict[str, Any] = Field(default_factory=dict, description="后台导入队列统计")
 
 
 class Memory(BaseModel):
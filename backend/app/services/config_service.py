@@ -105,12 +105,14 @@ class ConfigService:
         
         try:
             from ame.llm_caller.caller import LLMCaller
+            from ame.llm_caller.http_pool import get_http_client
             
-            # 创建测试 LLM Caller
+            # 创建测试 LLM Caller（复用共享连接池）
             llm_caller = LLMCaller(
                 api_key=config.get('api_key', ''),
                 base_url=config.get('base_url', 'https://api.openai.com/v1'),
-                model=config.get('model', 'gpt-3.5-turbo')
+                model=config.get('model', 'gpt-3.5-turbo'),
+                http_client=get_http_client(**get_settings().get_http_pool_options())
             )
             
             # 测试调用
@@ -13,6 +13,11 @@ sys.path.append(str(Path(__file__).parent.parent.parent.parent / "ame"))
 
 from ame.mem.mimic_engine import MimicEngine
 from ame.llm_caller.caller import LLMCaller
+from ame.llm_caller.cache import get_response_cache
+from ame.llm_caller.rate_limiter import get_rate_limiter
+from ame.llm_caller.http_pool import get_http_client
+from ame.llm_caller.semantic_cache import SemanticCache
+from ame.vector_store.embedding import OpenAIEmbedder
 from app.core.config import get_settings
 from app.core.logger import get_logger
 from app.models.responses import Memory
@@ -35,17 +40,25 @@ class MEMService:
         
         # 初始化 LLM Caller
         try:
+            # 对话与向量请求共用进程内连接池，重新加载服务时继续复用
+            http_client = get_http_client(**settings.get_http_pool_options())
             llm_caller = LLMCaller(
                 api_key=settings.OPENAI_API_KEY,
                 base_url=settings.OPENAI_BASE_URL,
-                model=settings.OPENAI_MODEL
+                model=settings.OPENAI_MODEL,
+                semantic_cache=self._create_semantic_cache(settings, http_client),
+                cache=get_response_cache(**settings.get_llm_cache_options()),
+                rate_limiter=get_rate_limiter(**settings.get_llm_rate_limit_options()),
+                http_client=http_client
             )
             
             # 初始化模仿引擎
             self.engine = MimicEngine(
                 llm_caller=llm_caller,
                 vector_store_type=settings.VECTOR_STORE_TYPE,
-                db_path=str(settings.MEM_VECTOR_STORE_PATH)
+                db_path=str(settings.MEM_VECTOR_STORE_PATH),
+                http_client=http_client,
+                **settings.get_vector_store_options()
             )
             
             logger.info("MEM Service initialized")
@@ -55,6 +68,25 @@ class MEMService:
             self.engine = None
             raise
     
+    @staticmethod
+    def _create_semantic_cache(settings, http_client=None) -> Optional[SemanticCache]:
+        """语义响应缓存（未启用时返回 None；未启用远程向量时使用本地哈希向量）"""
+        if not settings.LLM_SEMANTIC_CACHE:
+            return None
+        embedder = None
+        if settings.USE_OPENAI_EMBEDDING:
+            embedder = OpenAIEmbedder(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                model=settings.EMBEDDING_MODEL,
+                http_client=http_client
+            )
+        return SemanticCache(
+            embedder=embedder,
+            path=str(settings.LLM_SEMANTIC_CACHE_PATH),
+            threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD
+        )
+    
     def _check_engine(self):
         """检查引擎是否初始化"""
         if self.engine is None:
@@ -209,6 +241,26 @@ class MEMService:
         except Exception as e:
             logger.error(f"Failed to delete memory {memory_id}: {e}")
             raise
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        LLM 响应缓存统计
+        
+        Returns:
+            命中、未命中、淘汰、节省字节数等
+        """
+        self._check_engine()
+        return self.engine.llm_caller.get_cache_stats()
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """
+        LLM 准入控制统计
+        
+        Returns:
+            在途请求数、排队等待时间、限流次数等
+        """
+        self._check_engine()
+        return self.engine.llm_caller.get_rate_limit_stats()
 
 
 # 全局服务实例
@@ -13,9 +13,11 @@ from datetime import datetime
 sys.path.append(str(Path(__file__).parent.parent.parent.parent / "ame"))
 
 from ame.rag.knowledge_base import KnowledgeBase
+from ame.rag.ingestion import IngestionQueue
+from ame.llm_caller.http_pool import get_http_client
 from app.core.config import get_settings
 from app.core.logger import get_logger
-from app.models.responses import DocumentInfo, SearchResult, RAGStats
+from app.models.responses import DocumentInfo, SearchResult, RAGStats, IngestionJobInfo
 
 logger = get_logger(__name__)
 
@@ -29,14 +31,78 @@ class RAGService:
         
         self.kb = KnowledgeBase(
             vector_store_type=settings.VECTOR_STORE_TYPE,
-            db_path=str(settings.RAG_VECTOR_STORE_PATH)
+            db_path=str(settings.RAG_VECTOR_STORE_PATH),
+            query_cache_size=settings.RAG_QUERY_CACHE_SIZE,
+            query_cache_ttl=settings.RAG_QUERY_CACHE_TTL,
+            chunk_size=settings.RAG_CHUNK_SIZE,
+            chunk_overlap=settings.RAG_CHUNK_OVERLAP,
+            http_client=get_http_client(**settings.get_http_pool_options()),
+            **settings.get_vector_store_options()
         )
         
         self.uploads_dir = settings.UPLOADS_DIR
         self.uploads_dir.mkdir(parents=True, exist_ok=True)
         
+        # 后台导入任务队列（worker 在首次提交或应用启动时开始运行）
+        self.ingestion = IngestionQueue(
+            knowledge_base=self.kb,
+            db_path=str(settings.RAG_JOBS_DB_PATH),
+            workers=settings.RAG_INGEST_WORKERS,
+            max_pending=settings.RAG_INGEST_MAX_PENDING,
+            batch_size=settings.RAG_INGEST_BATCH_SIZE
+        )
+        
         logger.info("RAG Service initialized")
     
+    async def submit_document(
+        self,
+        file_path: str,
+        filename: str
+    ) -> Dict[str, Any]:
+        """
+        登记后台导入任务（立即返回）
+        
+        Args:
+            file_path: 文件路径
+            filename: 文件名
+            
+        Returns:
+            文档 ID 与任务 ID
+            
+        Raises:
+            IngestionQueueFull: 待处理任务已达上限
+        """
+        doc_id = str(uuid.uuid4())
+        job = await self.ingestion.submit(
+            file_path=file_path,
+            filename=filename,
+            metadata={
+                "document_id": doc_id,
+                "filename": filename,
+                "upload_time": datetime.now().isoformat()
+            }
+        )
+        
+        logger.info(f"Document queued for ingestion: {filename} (job {job.id})")
+        
+        return {
+            "document_id": doc_id,
+            "job_id": job.id
+        }
+    
+    def get_job(self, job_id: str) -> Optional[IngestionJobInfo]:
+        """
+        查询导入任务
+        
+        Args:
+            job_id: 任务 ID
+            
+        Returns:
+            任务状态，不存在时返回 None
+        """
+        job = self.ingestion.get(job_id)
+        return IngestionJobInfo(**job.to_dict()) if job else None
+    
     async def upload_document(
         self,
         file_path: str,
@@ -179,11 +245,15 @@ class RAGService:
         
         try:
             stats = await self.kb.get_statistics()
+            query_cache = stats.get("query_cache") or {}
             
             return RAGStats(
                 document_count=stats.get("total_documents", 0),
                 total_chunks=0,  # TODO: 从 stats 获取
-                total_size=0     # TODO: 计算总大小
+                total_size=0,    # TODO: 计算总大小
+                query_cache_hit_ratio=query_cache.get("hit_ratio", 0.0),
+                query_cache=query_cache,
+                ingestion=self.ingestion.get_stats()
             )
             
         except Exception as e:
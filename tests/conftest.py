@@ -0,0 +1,9 @@
+"""
+测试公共配置
+"""
+
+import sys
+from pathlib import Path
+
+# 与 test_optimization.py 一致，从仓库根目录导入 ame
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,105 @@
+"""
+近似最近邻索引：IVF / HNSW 的召回率对照暴力检索，以及增量新增、删除后的行号映射
+"""
+
+import numpy as np
+import pytest
+
+from ame.vector_store.ann import HNSWIndex, IVFFlatIndex
+from ame.vector_store.embedding_buffer import EmbeddingBuffer
+
+DIM = 32
+K = 10
+
+
+def _clustered(n, seed=0, centers=20):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, DIM))
+    x = means[rng.integers(0, centers, n)] + 0.3 * rng.normal(size=(n, DIM))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _buffer(x):
+    buffer = EmbeddingBuffer(DIM)
+    buffer.append(x)
+    return buffer
+
+
+def _recall(index, x, queries):
+    hits = 0
+    for q in queries:
+        exact = set(np.argsort(-(x @ q))[:K])
+        candidates = index.search(q, K)
+        top = candidates[np.argsort(-(x[candidates] @ q))[:K]]
+        hits += len(exact & set(top.tolist()))
+    return hits / (K * len(queries))
+
+
+def test_ivf_recall_against_flat():
+    x = _clustered(3000)
+    queries = _clustered(50, seed=1)
+    index = IVFFlatIndex(DIM, nprobe=8, min_train_size=1000)
+    index.reset(_buffer(x))
+
+    assert index.centroids is not None
+    assert _recall(index, x, queries) >= 0.9
+
+
+def test_ivf_incremental_add_and_delete():
+    x = _clustered(3000)
+    buffer = _buffer(x[:2000])
+    index = IVFFlatIndex(DIM, nprobe=8, min_train_size=1000)
+    index.reset(buffer)
+    buffer.append(x[2000:])
+    index.add(buffer, 2000)
+    assert len(index) == 3000
+
+    # 删除前 500 行，行号整体前移
+    buffer.delete(range(500))
+    index.delete(range(500))
+    rest = x[500:]
+    assert len(index) == len(rest)
+    assert _recall(index, rest, _clustered(50, seed=1)) >= 0.9
+
+
+def test_ivf_untrained_falls_back_to_flat():
+    index = IVFFlatIndex(DIM, min_train_size=4096)
+    index.reset(_buffer(_clustered(100)))
+    assert index.search(_clustered(1, seed=1)[0], K) is None
+
+
+def test_hnsw_recall_against_flat():
+    pytest.importorskip("hnswlib")
+    x = _clustered(2000)
+    index = HNSWIndex(DIM)
+    index.reset(_buffer(x))
+    assert _recall(index, x, _clustered(50, seed=1)) >= 0.9
+
+
+def test_hnsw_incremental_add_and_delete():
+    pytest.importorskip("hnswlib")
+    x = _clustered(1500)
+    buffer = _buffer(x[:500])
+    index = HNSWIndex(DIM)
+    index.reset(buffer)
+    for start in range(500, 1500, 250):
+        buffer.append(x[start:start + 250])
+        index.add(buffer, start)
+    assert len(index) == 1500
+
+    # 每一行用自身向量查询都应命中自己的行号
+    for row in (0, 499, 500, 1499):
+        assert row in index.search(x[row], K).tolist()
+
+    buffer.delete(range(0, 1500, 3))
+    index.delete(range(0, 1500, 3))
+    rest = np.delete(x, range(0, 1500, 3), axis=0)
+    assert len(index) == len(rest)
+    for row in (0, len(rest) // 2, len(rest) - 1):
+        assert row in index.search(rest[row], K).tolist()
+
+    # 删除后继续追加，新行号接在剩余行之后
+    extra = _clustered(10, seed=2)
+    buffer.append(extra)
+    index.add(buffer, len(rest))
+    assert len(rest) + 9 in index.search(extra[9], K).tolist()
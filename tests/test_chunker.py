@@ -0,0 +1,82 @@
+"""
+TextChunker：token 上限、重叠、短段落合并、硬切与分块大小无关的结果
+"""
+
+import re
+
+import pytest
+
+from ame.data_processor import chunker as chunker_module
+from ame.data_processor.chunker import TextChunker
+from ame.vector_store.embedding import estimate_tokens
+
+
+def _paragraphs(count=40):
+    return [
+        f"第{i}段的第一句话。Sentence {i} in English, with 3.14 inside! 第{i}段的最后一句？"
+        for i in range(count)
+    ]
+
+
+def _squash(text):
+    return re.sub(r"\s+", "", text)
+
+
+def test_chunks_respect_token_limit():
+    chunker = TextChunker(chunk_size=30, chunk_overlap=0)
+    chunks = list(chunker.iter_chunks(_paragraphs()))
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 30 for chunk in chunks)
+    # 无重叠时拼接后与原文一致（忽略空白）
+    assert _squash("".join(chunks)) == _squash("".join(_paragraphs()))
+
+
+def test_adjacent_chunks_overlap_by_whole_sentences():
+    chunker = TextChunker(chunk_size=40, chunk_overlap=15)
+    chunks = chunker.split("".join(f"这是第{i}句话。" for i in range(60)))
+    assert len(chunks) > 2
+    for previous, current in zip(chunks, chunks[1:]):
+        first_sentence = current.split("。")[0] + "。"
+        assert first_sentence in previous
+        shared = [s + "。" for s in current.split("。") if s and s + "。" in previous]
+        assert 0 < sum(estimate_tokens(s) for s in shared) <= 15
+
+
+def test_short_paragraphs_are_merged_not_dropped():
+    chunker = TextChunker(chunk_size=100, chunk_overlap=0)
+    paragraphs = [f"短{i}" for i in range(20)]
+    chunks = list(chunker.iter_chunks(paragraphs))
+    assert len(chunks) < len(paragraphs)
+    joined = "".join(chunks)
+    assert all(paragraph in joined for paragraph in paragraphs)
+
+
+def test_long_sentence_is_hard_split():
+    chunker = TextChunker(chunk_size=20, chunk_overlap=0)
+    text = "无标点的超长句子" * 30
+    chunks = chunker.split(text)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 20 for chunk in chunks)
+    assert "".join(chunks) == text
+
+
+def test_empty_input():
+    chunker = TextChunker(chunk_size=20, chunk_overlap=5)
+    assert chunker.split("") == []
+    assert chunker.split(" \n\n\t") == []
+    assert list(chunker.iter_chunks([])) == []
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(0, 0), (-1, 0), (10, -1), (10, 10), (10, 20)])
+def test_invalid_arguments_raise(chunk_size, chunk_overlap):
+    with pytest.raises(ValueError):
+        TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+@pytest.mark.parametrize("block_chars", [1, 50, 333, 4096])
+def test_result_does_not_depend_on_block_size(monkeypatch, block_chars):
+    chunker = TextChunker(chunk_size=35, chunk_overlap=10)
+    paragraphs = _paragraphs() + ["无标点的超长句子" * 20] + _paragraphs(5)
+    expected = list(chunker.iter_chunks(paragraphs))
+    monkeypatch.setattr(chunker_module, "BLOCK_CHARS", block_chars)
+    assert list(chunker.iter_chunks(paragraphs)) == expected
@@ -0,0 +1,94 @@
+"""
+OpenAIEmbedder：按条数 / token 预算分批、并发批次结果与逐条请求一致、失败批次重试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ame.vector_store.embedding import OpenAIEmbedder, estimate_tokens
+
+DIM = 8
+
+
+def fake_vector(text):
+    rng = np.random.default_rng(sum(text.encode("utf-8")) + len(text))
+    return rng.normal(size=DIM).tolist()
+
+
+class FakeEmbeddings:
+    """返回顺序打乱的 data，模拟接口按 index 对齐的约定"""
+
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, input):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("temporary failure")
+            self.batches.append(list(input))
+            data = [SimpleNamespace(index=i, embedding=fake_vector(text)) for i, text in enumerate(input)]
+            return SimpleNamespace(data=data[::-1])
+        finally:
+            self.in_flight -= 1
+
+
+def make_embedder(fake, **kwargs):
+    embedder = OpenAIEmbedder(api_key="test", **kwargs)
+    embedder._client = SimpleNamespace(embeddings=fake)
+    return embedder
+
+
+def test_make_batches_respects_count_and_token_budget():
+    embedder = OpenAIEmbedder(api_key="test", batch_size=3, max_batch_tokens=50)
+    texts = ["短文本"] * 7 + ["x" * 400] + ["中" * 30, "中" * 30]
+
+    batches = embedder.make_batches(texts)
+
+    assert [i for batch in batches for i in batch] == list(range(len(texts)))
+    for batch in batches:
+        assert len(batch) <= 3
+        tokens = sum(estimate_tokens(texts[i]) for i in batch)
+        # 单条超出预算时独占一个批次
+        assert tokens <= 50 or len(batch) == 1
+
+
+def test_batched_embeddings_match_single_requests():
+    texts = [f"文档 {i} content {i * 7}" for i in range(23)] + ["", "   "]
+    fake = FakeEmbeddings()
+    embedder = make_embedder(fake, batch_size=4, max_concurrency=2)
+
+    batched = asyncio.run(embedder.embed(texts))
+
+    single = np.array([fake_vector(text if text.strip() else " ") for text in texts], dtype=np.float32)
+    assert batched.shape == (len(texts), DIM)
+    assert np.array_equal(batched, single)
+    assert len(fake.batches) == 7
+    assert max(len(batch) for batch in fake.batches) == 4
+    assert fake.max_in_flight <= 2
+
+
+def test_failed_batch_is_retried(monkeypatch):
+    async def no_sleep(_):
+        return None
+
+    fake = FakeEmbeddings(fail_times=2)
+    embedder = make_embedder(fake, max_retries=3)
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+
+    result = asyncio.run(embedder.embed(["a", "b"]))
+    assert result.shape == (2, DIM)
+
+    fake = FakeEmbeddings(fail_times=3)
+    embedder = make_embedder(fake, max_retries=3)
+    with pytest.raises(Exception, match="after 3 attempts"):
+        asyncio.run(embedder.embed(["a"]))
@@ -0,0 +1,85 @@
+"""
+EmbeddingBuffer / GrowableArray：容量倍增、删除后行号前移、内存映射快照的字节统计
+"""
+
+import numpy as np
+
+from ame.vector_store.embedding_buffer import EmbeddingBuffer, GrowableArray
+
+DIM = 4
+
+
+def vectors(n, start=0):
+    return np.arange(start, start + n * DIM, dtype=np.float32).reshape(n, DIM)
+
+
+def test_append_doubles_capacity():
+    buffer = EmbeddingBuffer(DIM, initial_capacity=4)
+    capacities = []
+    for i in range(10):
+        buffer.append(vectors(1, i * DIM))
+        capacities.append(buffer.capacity)
+
+    assert len(buffer) == 10
+    assert capacities == [4, 4, 4, 4, 8, 8, 8, 8, 16, 16]
+    assert np.array_equal(buffer.to_array(), vectors(10))
+
+
+def test_take_and_blocks_span_base_and_tail():
+    buffer = EmbeddingBuffer(DIM)
+    buffer.reset(base=vectors(3), tail=vectors(2, 3 * DIM))
+    expected = vectors(5)
+
+    assert np.array_equal(buffer.take([4, 0, 3, 2]), expected[[4, 0, 3, 2]])
+    assert np.array_equal(buffer.to_array(), expected)
+    blocks = list(buffer.blocks(2))
+    assert [start for start, _ in blocks] == [0, 2, 3]
+    assert np.array_equal(np.concatenate([block for _, block in blocks]), expected)
+
+
+def test_delete_shifts_rows():
+    buffer = EmbeddingBuffer(DIM)
+    buffer.reset(base=vectors(3), tail=vectors(3, 3 * DIM))
+    buffer.delete([0, 4])
+
+    assert len(buffer) == 4
+    assert len(buffer.base) == 0
+    assert np.array_equal(buffer.to_array(), vectors(6)[[1, 2, 3, 5]])
+
+    buffer.append(vectors(1, 100))
+    assert np.array_equal(buffer.take([4]), vectors(1, 100))
+
+
+def test_nbytes_excludes_only_file_backed_snapshot(tmp_path):
+    path = tmp_path / "vectors.npy"
+    np.save(path, vectors(8))
+    mapped = np.load(path, mmap_mode="r")
+
+    buffer = EmbeddingBuffer(DIM, initial_capacity=2)
+    buffer.reset(base=mapped)
+    assert buffer.nbytes == 0
+
+    # 截断得到的切片仍映射文件
+    buffer.reset(base=mapped[:4])
+    assert buffer.nbytes == 0
+
+    # 没有文件的 memmap 子类（花式索引拷贝）数据在堆上，需要计入
+    heap_copy = np.ascontiguousarray(mapped[[0, 2, 4]]).view(np.memmap)
+    buffer.reset(base=heap_copy)
+    assert buffer.nbytes == heap_copy.nbytes
+
+    buffer.reset(base=mapped, tail=vectors(1))
+    assert buffer.nbytes == buffer.capacity * DIM * 4
+
+
+def test_growable_array_extend_and_delete():
+    array = GrowableArray(np.int64, initial_capacity=1)
+    for i in range(5):
+        array.extend([i])
+    array.extend(np.arange(5, 8))
+
+    assert array.values.tolist() == list(range(8))
+    array.delete([0, 3, 7])
+    assert array.values.tolist() == [1, 2, 4, 5, 6]
+    array.replace([9])
+    assert len(array) == 1 and array.values.tolist() == [9]
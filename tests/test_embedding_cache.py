@@ -0,0 +1,78 @@
+"""
+EmbeddingCache：内存 / 磁盘命中与未命中、按模型隔离、LRU 淘汰，以及 CachedEmbeddingFunction 只计算未命中文本
+"""
+
+import numpy as np
+
+from ame.vector_store.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+
+MODEL = "test-model"
+
+
+def vectors(n, dim=4):
+    return np.arange(n * dim, dtype=np.float32).reshape(n, dim)
+
+
+def test_memory_hit_and_miss():
+    cache = EmbeddingCache()
+    cache.put_many(MODEL, ["a", "b"], vectors(2))
+
+    results = cache.get_many(MODEL, ["a", "c", "b", "a"])
+
+    assert np.array_equal(results[0], vectors(2)[0])
+    assert results[1] is None
+    assert np.array_equal(results[2], vectors(2)[1])
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (3, 0, 1)
+
+
+def test_entries_are_scoped_by_model():
+    cache = EmbeddingCache()
+    cache.put_many(MODEL, ["a"], vectors(1))
+    assert cache.get_many("other-model", ["a"]) == [None]
+
+
+def test_disk_hit_after_reopen(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    EmbeddingCache(path).put_many(MODEL, ["a", "b"], vectors(2))
+
+    cache = EmbeddingCache(path)
+    results = cache.get_many(MODEL, ["b", "b", "x"])
+
+    assert np.array_equal(results[0], vectors(2)[1])
+    assert np.array_equal(results[1], vectors(2)[1])
+    assert results[2] is None
+    assert cache.get_stats()["disk_hits"] == 2
+
+    # 磁盘命中后进入内存 LRU
+    cache.get_many(MODEL, ["b"])
+    assert cache.get_stats()["memory_hits"] == 1
+
+
+def test_memory_lru_evicts_oldest():
+    cache = EmbeddingCache(max_memory_entries=2)
+    cache.put_many(MODEL, ["a", "b"], vectors(2))
+    cache.get_many(MODEL, ["a"])
+    cache.put_many(MODEL, ["c"], vectors(1))
+
+    results = cache.get_many(MODEL, ["a", "b", "c"])
+    assert results[0] is not None
+    assert results[1] is None
+    assert results[2] is not None
+
+
+def test_cached_embedding_function_computes_only_misses():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    function = CachedEmbeddingFunction(embed, EmbeddingCache(), MODEL)
+
+    first = function(["aa", "bbb"])
+    second = function(["bbb", "c", "aa"])
+
+    assert first == [[2.0, 1.0], [3.0, 1.0]]
+    assert second == [[3.0, 1.0], [1.0, 1.0], [2.0, 1.0]]
+    assert calls == [["aa", "bbb"], ["c"]]
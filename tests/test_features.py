@@ -0,0 +1,71 @@
+"""
+文档特征：存储随检索结果返回的预计算特征与由原文计算的结果一致（含删除后、未启用关键词索引时）
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from ame.retrieval.base import RetrievalResult
+from ame.vector_store.features import DocumentFeatures
+from ame.vector_store.memu_store import MemuVectorStore
+
+DOCUMENTS = [
+    {"content": "机器学习是人工智能的一个分支", "timestamp": "2024-03-01T08:00:00"},
+    {"content": "Python is a popular language for machine learning", "timestamp": "2024-03-02T09:30:00"},
+    {"content": "深度学习 deep learning 神经网络"},
+    {"content": "今天天气很好", "timestamp": "not a date"},
+]
+
+
+def assert_same_features(actual, expected):
+    assert np.array_equal(actual.token_ids, expected.token_ids)
+    assert actual.epoch == expected.epoch
+    assert actual.length == expected.length
+
+
+@pytest.mark.parametrize("keyword_index", [True, False])
+def test_store_features_match_text(tmp_path, keyword_index):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=32, offload=False, keyword_index=keyword_index)
+    asyncio.run(store.add_documents([dict(doc) for doc in DOCUMENTS]))
+    asyncio.run(store.delete_documents([store.documents[0]["id"]]))
+
+    results = asyncio.run(store.search("学习", limit=10, include_features=True))
+
+    assert len(results) == 3
+    for doc in results:
+        assert_same_features(doc["features"], DocumentFeatures.from_text(doc["content"], doc.get("timestamp")))
+
+
+def test_features_are_opt_in(tmp_path):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=32, offload=False)
+    asyncio.run(store.add_documents([dict(doc) for doc in DOCUMENTS]))
+    results = asyncio.run(store.search("学习", limit=10))
+    assert all("features" not in doc for doc in results)
+
+
+def test_overlap_and_jaccard():
+    a = DocumentFeatures.from_text("机器学习")
+    b = DocumentFeatures.from_text("深度学习")
+
+    # 共享 学 / 习 / 学习
+    assert a.overlap(b.token_ids) == 3
+    assert a.jaccard(b) == pytest.approx(3 / (7 + 7 - 3))
+    assert a.jaccard(a) == 1.0
+    assert DocumentFeatures.from_text("").jaccard(DocumentFeatures.from_text("")) == 0.0
+
+
+def test_epoch_parsing():
+    assert DocumentFeatures.from_text("x", "1970-01-01T00:00:10+00:00").epoch == 10.0
+    assert DocumentFeatures.from_text("x", "bad").epoch is None
+    assert DocumentFeatures.from_text("x").epoch is None
+
+
+def test_retrieval_result_computes_features_once():
+    result = RetrievalResult(content="机器学习", metadata={"timestamp": "2024-03-01T08:00:00"}, score=1.0)
+    features = result.get_features()
+
+    assert result.get_features() is features
+    assert_same_features(features, DocumentFeatures.from_text("机器学习", "2024-03-01T08:00:00"))
+    assert "features" not in result.to_dict()
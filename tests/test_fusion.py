@@ -0,0 +1,78 @@
+"""
+多通道分数融合：加权（含单命中 / 分数相同的通道）与 RRF
+"""
+
+import numpy as np
+import pytest
+
+from ame.retrieval.fusion import fuse_scores, normalize_scores
+
+WEIGHTS = {"vector": 0.6, "keyword": 0.4}
+
+
+def _ranking(fused):
+    return sorted(fused, key=fused.get, reverse=True)
+
+
+def test_normalize_scores():
+    assert np.allclose(normalize_scores([2.0, 4.0, 3.0], "minmax"), [0.0, 1.0, 0.5])
+    assert np.allclose(normalize_scores([5.0, 5.0], "minmax"), [1.0, 1.0])
+    assert np.allclose(normalize_scores([1.0, 3.0], "zscore"), [-1.0, 1.0])
+    assert np.allclose(normalize_scores([5.0, 5.0], "zscore"), [0.0, 0.0])
+    assert np.allclose(normalize_scores([0.3, -2.0], "none"), [0.3, -2.0])
+    with pytest.raises(ValueError):
+        normalize_scores([1.0], "softmax")
+
+
+def test_weighted_single_keyword_hit_is_boosted():
+    channels = {"vector": {"a": 0.9, "b": 0.5, "c": 0.4}, "keyword": {"c": 3.2}}
+    fused = fuse_scores(channels, WEIGHTS)
+    assert fused == pytest.approx({"a": 0.6, "b": 0.12, "c": 0.4})
+
+    # 关键词命中改变排序
+    without_keyword = fuse_scores({"vector": channels["vector"]}, WEIGHTS)
+    assert _ranking(without_keyword) == ["a", "b", "c"]
+    assert _ranking(fused) == ["a", "c", "b"]
+
+
+@pytest.mark.parametrize("normalization", ["minmax", "zscore", "none"])
+def test_weighted_tied_channel_still_separates_hits(normalization):
+    channels = {
+        "vector": {"a": 0.8, "b": 0.8, "c": 0.8, "d": 0.8},
+        "keyword": {"b": 2.0, "d": 2.0}
+    }
+    fused = fuse_scores(channels, WEIGHTS, normalization=normalization)
+    assert fused["b"] == pytest.approx(fused["d"])
+    assert fused["a"] == pytest.approx(fused["c"])
+    assert fused["b"] > fused["a"]
+
+
+def test_weighted_zero_weight_channel_is_ignored():
+    channels = {"vector": {"a": 0.9, "b": 0.1}, "keyword": {"b": 5.0}}
+    fused = fuse_scores(channels, {"vector": 1.0, "keyword": 0.0})
+    assert fused == pytest.approx({"a": 1.0, "b": 0.0})
+
+
+def test_rrf_uses_ranks_only():
+    channels = {"vector": {"a": 0.9, "b": 0.5, "c": 0.4}, "keyword": {"c": 3.2, "b": 1.0}}
+    fused = fuse_scores(channels, {"vector": 1.0, "keyword": 1.0}, method="rrf", rrf_k=60)
+    assert fused == pytest.approx({
+        "a": 1 / 61,
+        "b": 1 / 62 + 1 / 62,
+        "c": 1 / 63 + 1 / 61
+    })
+    # 分数按比例放大不改变结果
+    scaled = {"vector": {k: v * 100 for k, v in channels["vector"].items()}, "keyword": channels["keyword"]}
+    assert fuse_scores(scaled, {}, method="rrf") == pytest.approx(fused)
+
+
+def test_rrf_single_hit_and_tied_channel():
+    channels = {"vector": {"a": 0.5, "b": 0.5, "c": 0.5}, "keyword": {"c": 1.0}}
+    fused = fuse_scores(channels, {}, method="rrf", rrf_k=0)
+    # 分数相同时按出现顺序排名，单个命中排名第一
+    assert fused == pytest.approx({"a": 1.0, "b": 0.5, "c": 1 / 3 + 1.0})
+
+
+def test_unknown_fusion_method_raises():
+    with pytest.raises(ValueError):
+        fuse_scores({"vector": {"a": 1.0}}, {}, method="borda")
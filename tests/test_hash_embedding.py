@@ -0,0 +1,60 @@
+"""
+本地哈希向量：结果与批次划分、进程（PYTHONHASHSEED）无关，归一化，且共享子串的文本更相似
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from ame.vector_store.hash_embedding import HashingEmbedder
+
+DIM = 64
+TEXTS = ["机器学习入门", "Machine Learning basics", "", "  多个   空白\t与 TAB ", "深度学习与机器学习", "a"]
+
+
+def test_same_text_same_vector_regardless_of_batch():
+    embedder = HashingEmbedder(DIM, batch_size=2)
+    together = embedder.embed(TEXTS)
+    alone = np.vstack([HashingEmbedder(DIM).embed([text]) for text in TEXTS])
+
+    assert np.array_equal(together, alone)
+    assert np.array_equal(together, HashingEmbedder(DIM).embed(TEXTS))
+
+
+def test_stable_across_processes():
+    script = (
+        "import sys, numpy as np\n"
+        "from ame.vector_store.hash_embedding import HashingEmbedder\n"
+        f"sys.stdout.write(HashingEmbedder({DIM}).embed({TEXTS!r}).tobytes().hex())\n"
+    )
+    outputs = set()
+    for seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        result = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        outputs.add(result.stdout)
+
+    assert outputs == {HashingEmbedder(DIM).embed(TEXTS).tobytes().hex()}
+
+
+def test_normalization_and_whitespace_folding():
+    vectors = HashingEmbedder(DIM).embed(TEXTS)
+    norms = np.linalg.norm(vectors, axis=1)
+
+    assert np.allclose(norms[[0, 1, 3, 4, 5]], 1.0, atol=1e-5)
+    assert norms[2] == 0.0
+    assert np.array_equal(
+        HashingEmbedder(DIM).embed(["Hello   World"]), HashingEmbedder(DIM).embed(["hello world"])
+    )
+
+
+def test_shared_substrings_are_more_similar():
+    embedder = HashingEmbedder(256)
+    query, related, unrelated = embedder.embed(["机器学习", "机器学习算法", "今天天气晴朗"])
+
+    assert query @ related > query @ unrelated
+    assert embedder.model == "hash-ngram-v1-13"
@@ -0,0 +1,84 @@
+"""
+共享 HTTP 连接池：同参数复用、参数变化替换，对话与向量请求共用同一个客户端
+"""
+
+import asyncio
+import json
+
+import pytest
+
+# httpx 随 openai SDK 安装
+httpx = pytest.importorskip("httpx")
+
+from ame.llm_caller import http_pool  # noqa: E402
+from ame.llm_caller.caller import LLMCaller  # noqa: E402
+from ame.llm_caller.rate_limiter import RateLimiter  # noqa: E402
+from ame.vector_store.embedding import OpenAIEmbedder  # noqa: E402
+
+
+def test_same_options_reuse_the_pool():
+    async def main():
+        first = http_pool.get_http_client(max_connections=10)
+        assert http_pool.get_http_client(max_connections=10) is first
+
+        second = http_pool.get_http_client(max_connections=20)
+        assert second is not first
+        assert not first.is_closed
+
+        await http_pool.close_http_clients()
+        assert first.is_closed and second.is_closed
+        assert http_pool.get_http_client(max_connections=20) is not second
+        await http_pool.close_http_clients()
+
+    asyncio.run(main())
+
+
+def test_chat_and_embedding_share_one_client():
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path.endswith("/embeddings"):
+            inputs = json.loads(request.content)["input"]
+            return httpx.Response(200, json={
+                "object": "list",
+                "model": "embed",
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": [float(i), 1.0]}
+                    for i in range(len(inputs))
+                ],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1}
+            })
+        return httpx.Response(200, json={
+            "id": "chat-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "chat",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "hi"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        caller = LLMCaller(
+            api_key="test", base_url="http://llm.local/v1", cache_enabled=False,
+            rate_limiter=RateLimiter(), http_client=client
+        )
+        embedder = OpenAIEmbedder(api_key="test", base_url="http://llm.local/v1", http_client=client)
+
+        response = await caller.generate([{"role": "user", "content": "hello"}])
+        embeddings = await embedder.embed(["a", "b"])
+        await client.aclose()
+        return caller, embedder, response, embeddings
+
+    caller, embedder, response, embeddings = asyncio.run(main())
+    assert response["content"] == "hi"
+    assert embeddings.shape == (2, 2)
+    assert paths == ["/v1/chat/completions", "/v1/embeddings"]
+    # 两个 SDK 客户端底层是同一个连接池，调用器不再持有单独的同步客户端
+    assert caller.async_client._client is embedder._get_client()._client
+    assert not hasattr(caller, "client")
@@ -0,0 +1,125 @@
+"""
+延迟构建的索引：增量结果与重建结果一致，并发首次读取结果正确
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ame.vector_store.ann import IVFFlatIndex
+from ame.vector_store.embedding_buffer import EmbeddingBuffer
+from ame.vector_store.keyword_index import BM25Index
+from ame.vector_store.metadata_index import MetadataColumns
+
+
+def _documents(start, count):
+    return [
+        {
+            "content": f"doc {i} topic{i % 5} 文档{i % 3}",
+            "source": f"source{i % 4}",
+            "timestamp": f"2024-01-{i % 28 + 1:02d}T00:00:00",
+            "metadata": {"context": f"ctx{i % 2}"},
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def test_metadata_select_after_extend_and_delete():
+    columns = MetadataColumns()
+    columns.extend(_documents(0, 40))
+    assert len(columns.select(sources=["source1"])) == 10
+    columns.extend(_documents(40, 40))
+    columns.delete([0, 1, 2, 3])
+
+    documents = _documents(4, 76)
+    expected = [
+        row for row, doc in enumerate(documents)
+        if doc["source"] == "source1"
+        and doc["metadata"]["context"] == "ctx1"
+        and "2024-01-05" <= doc["timestamp"][:10] <= "2024-01-10"
+    ]
+    rows = columns.select(
+        sources=["source1"], contexts=["ctx1"],
+        start="2024-01-05T00:00:00", end="2024-01-10T00:00:00"
+    )
+    assert rows.tolist() == expected
+
+
+def test_metadata_concurrent_first_reads():
+    columns = MetadataColumns()
+    columns.extend(_documents(0, 5000))
+    expected = np.flatnonzero(np.arange(5000) % 4 == 2)
+
+    def read(_):
+        return columns.sources.rows(["source2"]), columns.time_range(start="2024-01-01T00:00:00")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for rows, in_range in pool.map(read, range(64)):
+            assert np.array_equal(rows, expected)
+            assert len(in_range) == 5000
+
+
+def test_bm25_incremental_matches_rebuild():
+    incremental = BM25Index()
+    incremental.add(_documents(0, 50))
+    incremental.search("topic1", limit=5)
+    # 少量新增走未建索引的尾部扫描
+    incremental.add(_documents(50, 3))
+    rebuilt = BM25Index()
+    rebuilt.reset(_documents(0, 53))
+
+    rows, scores = incremental.search("topic1 文档2", limit=10)
+    expected_rows, expected_scores = rebuilt.search("topic1 文档2", limit=10)
+    assert rows.tolist() == expected_rows.tolist()
+    assert np.allclose(scores, expected_scores)
+
+
+def test_bm25_concurrent_first_search():
+    index = BM25Index()
+    index.add(_documents(0, 2000))
+    expected_rows, _ = index.search("topic3", limit=20)
+    index._invalidate()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: index.search("topic3", limit=20)[0], range(64)))
+    for rows in results:
+        assert rows.tolist() == expected_rows.tolist()
+
+
+def _unit_rows(rng, count, dim):
+    x = rng.standard_normal((count, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_ivf_candidates_include_recent_rows():
+    rng = np.random.default_rng(0)
+    dim = 16
+    buffer = EmbeddingBuffer(dim)
+    buffer.append(_unit_rows(rng, 512, dim))
+    index = IVFFlatIndex(dim, nlist=8, nprobe=8, min_train_size=256)
+    index.reset(buffer)
+    assert index.search(buffer.take(np.arange(1))[0], 10) is not None
+
+    # 新增行少于 1/8，不重建倒排表，也要出现在候选中
+    start = len(buffer)
+    buffer.append(_unit_rows(rng, 16, dim))
+    index.add(buffer, start)
+    candidates = index.search(buffer.take(np.array([start]))[0], 10)
+    assert sorted(candidates.tolist()) == list(range(len(buffer)))
+
+
+def test_ivf_concurrent_first_search():
+    rng = np.random.default_rng(1)
+    dim = 16
+    buffer = EmbeddingBuffer(dim)
+    buffer.append(_unit_rows(rng, 4096, dim))
+    index = IVFFlatIndex(dim, nlist=64, nprobe=4, min_train_size=1024)
+    index.reset(buffer)
+    query = buffer.take(np.arange(1))[0]
+    expected = np.sort(index.search(query, 10))
+    index._invalidate_lists()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: np.sort(index.search(query, 10)), range(64)))
+    for candidates in results:
+        assert np.array_equal(candidates, expected)
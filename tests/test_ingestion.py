@@ -0,0 +1,221 @@
+"""
+IngestionQueue：完成、失败、背压、按字节的进度与重启续跑
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from ame.data_processor import chunker
+from ame.rag.ingestion import (
+    COMPLETED, FAILED, RUNNING, IngestionJob, IngestionQueue, IngestionQueueFull
+)
+from ame.rag.knowledge_base import KnowledgeBase
+from ame.vector_store.base import PrecomputedEmbeddingsMixin, VectorStoreBase
+
+
+def _knowledge_base(tmp_path, name="store"):
+    return KnowledgeBase(
+        db_path=str(tmp_path / name), embedding_dim=32,
+        query_cache_size=0, chunk_size=40, chunk_overlap=0
+    )
+
+
+def _write_text(tmp_path, paragraphs=60):
+    path = tmp_path / "notes.txt"
+    path.write_text(
+        "\n\n".join(f"第{i}段。这是关于主题{i}的一段较长的说明文字，用来产生多个分块。" * 3 for i in range(paragraphs)),
+        encoding="utf-8"
+    )
+    return str(path)
+
+
+async def _wait(queue, job_id, timeout=10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = queue.get(job_id)
+        if job.status in (COMPLETED, FAILED):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job stuck at {job.stage}"
+        await asyncio.sleep(0.01)
+
+
+def test_job_completes_and_reports_byte_progress(tmp_path, monkeypatch):
+    # 分块器按小块切句，使解析随读取推进
+    monkeypatch.setattr(chunker, "BLOCK_CHARS", 1024)
+    kb = _knowledge_base(tmp_path)
+    path = _write_text(tmp_path, paragraphs=400)
+    store = kb.vector_store
+    observed = []
+    add = store.add_embedded_documents
+
+    async def recording_add(documents, embeddings):
+        job = next(iter(queue._jobs.values()))
+        observed.append((job.stage, job.progress, job.chunks_done, job.chunks_total))
+        return await add(documents, embeddings)
+
+    store.add_embedded_documents = recording_add
+    queue = IngestionQueue(kb, str(tmp_path / "jobs.db"), batch_size=4)
+
+    async def run():
+        job = await queue.submit(path, "notes.txt", {"owner": "test"})
+        done = await _wait(queue, job.id)
+        await queue.stop()
+        return done
+
+    job = asyncio.run(run())
+    assert job.status == COMPLETED and job.stage == COMPLETED
+    assert job.chunks_done == job.chunks_total == len(store.documents) > 8
+    assert job.bytes_done == job.bytes_total == os.path.getsize(path)
+    assert job.progress == 1.0
+    assert all(doc["metadata"]["owner"] == "test" for doc in store.documents)
+
+    # 写入时处于 index 阶段；进度按字节推进，不会在解析尚未结束时接近 1
+    assert {stage for stage, _, _, _ in observed} == {"index"}
+    progress = [value for _, value, _, _ in observed]
+    assert progress == sorted(progress)
+    assert progress[0] == 0.0
+    _, middle, chunks_done, _ = observed[len(observed) // 2]
+    assert abs(middle - chunks_done / job.chunks_total) < 0.1
+
+
+def test_unsupported_file_fails(tmp_path):
+    kb = _knowledge_base(tmp_path)
+    path = tmp_path / "slides.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    queue = IngestionQueue(kb, str(tmp_path / "jobs.db"))
+
+    async def run():
+        job = await queue.submit(str(path), "slides.pdf")
+        done = await _wait(queue, job.id)
+        await queue.stop()
+        return done
+
+    job = asyncio.run(run())
+    assert job.status == FAILED
+    assert "Unsupported file format" in job.error
+    assert job.finished_at is not None
+    assert queue.get_stats()["pending"] == 0
+
+
+def test_store_failure_marks_job_failed(tmp_path):
+    kb = _knowledge_base(tmp_path)
+    path = _write_text(tmp_path, paragraphs=5)
+
+    async def failing_add(documents, embeddings):
+        return False
+
+    kb.vector_store.add_embedded_documents = failing_add
+    queue = IngestionQueue(kb, str(tmp_path / "jobs.db"))
+
+    async def run():
+        job = await queue.submit(path, "notes.txt")
+        done = await _wait(queue, job.id)
+        await queue.stop()
+        return done
+
+    job = asyncio.run(run())
+    assert job.status == FAILED
+    assert job.stage == "index"
+    assert job.chunks_done == 0
+
+
+class _PlainStore(VectorStoreBase):
+    """只实现 add_documents 的存储（不提供预先生成向量的接口）"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.batches = []
+
+    async def add_documents(self, documents):
+        self.batches.append(len(documents))
+        return await self.inner.add_documents(documents)
+
+    async def search(self, query, limit=5, **kwargs):
+        return await self.inner.search(query, limit=limit, **kwargs)
+
+    async def delete_documents(self, ids):
+        return await self.inner.delete_documents(ids)
+
+    async def get_statistics(self):
+        return await self.inner.get_statistics()
+
+    async def clear(self):
+        return await self.inner.clear()
+
+
+def test_store_without_precomputed_embeddings_indexes_sequentially(tmp_path):
+    kb = _knowledge_base(tmp_path)
+    assert isinstance(kb.vector_store, PrecomputedEmbeddingsMixin)
+    inner = kb.vector_store
+    kb.vector_store = store = _PlainStore(inner)
+    assert not isinstance(store, PrecomputedEmbeddingsMixin)
+    path = _write_text(tmp_path, paragraphs=5)
+    queue = IngestionQueue(kb, str(tmp_path / "jobs.db"), batch_size=4)
+
+    async def run():
+        job = await queue.submit(path, "notes.txt")
+        done = await _wait(queue, job.id)
+        await queue.stop()
+        return done
+
+    job = asyncio.run(run())
+    assert job.status == COMPLETED
+    assert sum(store.batches) == job.chunks_done == len(inner.documents) > 0
+    assert max(store.batches) <= 4
+
+
+def test_submit_rejects_when_full(tmp_path):
+    kb = _knowledge_base(tmp_path)
+    path = _write_text(tmp_path, paragraphs=2)
+    queue = IngestionQueue(kb, str(tmp_path / "jobs.db"), max_pending=1)
+
+    async def run():
+        first = await queue.submit(path, "notes.txt")
+        with pytest.raises(IngestionQueueFull):
+            await queue.submit(path, "notes.txt")
+        await _wait(queue, first.id)
+        # 完成后腾出名额
+        second = await queue.submit(path, "notes.txt")
+        await _wait(queue, second.id)
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_restart_resumes_after_indexed_chunks(tmp_path):
+    path = _write_text(tmp_path, paragraphs=20)
+    db_path = str(tmp_path / "jobs.db")
+    expected = [
+        doc["content"]
+        for doc in asyncio.run(_knowledge_base(tmp_path, "probe").data_processor.process_file(path))
+    ]
+
+    # 上次运行写入 3 个分块后进程退出，任务停留在 running
+    previous = IngestionQueue(_knowledge_base(tmp_path, "unused"), db_path)
+    previous._save(IngestionJob(
+        id="job-1", file_path=path, filename="notes.txt", status=RUNNING, stage="index",
+        chunks_total=3, chunks_done=3, bytes_total=os.path.getsize(path), bytes_done=100
+    ))
+
+    kb = _knowledge_base(tmp_path)
+    queue = IngestionQueue(kb, db_path, batch_size=4)
+
+    async def run():
+        await queue.start()
+        done = await _wait(queue, "job-1")
+        await queue.stop()
+        return done
+
+    job = asyncio.run(run())
+    assert job.status == COMPLETED
+    assert job.chunks_done == job.chunks_total == len(expected)
+    assert [doc["content"] for doc in kb.vector_store.documents] == expected[3:]
+
+
+def test_jobs_from_older_rows_decode_with_defaults(tmp_path):
+    queue = IngestionQueue(_knowledge_base(tmp_path), str(tmp_path / "jobs.db"))
+    job = queue._decode('{"id": "old", "file_path": "a.txt", "filename": "a.txt", "chunks_total": 4, "chunks_done": 2}')
+    assert job.bytes_total == 0 and job.progress == 0.0
+    assert job.to_dict()["progress"] == 0.0
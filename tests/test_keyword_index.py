@@ -0,0 +1,123 @@
+"""
+BM25 倒排索引：中英文分词、与逐文档参考实现的分数一致、增量新增 / 删除后与重建一致
+"""
+
+import asyncio
+import math
+from collections import Counter
+
+import numpy as np
+
+from ame.vector_store.keyword_index import BM25Index, tokenize
+from ame.vector_store.memu_store import MemuVectorStore
+
+CORPUS = [
+    "机器学习是人工智能的一个分支",
+    "深度学习使用神经网络进行学习",
+    "Python is a popular language for machine learning",
+    "The quick brown fox jumps over the lazy dog",
+    "自然语言处理 NLP 与机器翻译",
+    "学习 Python 编程：从入门到实践",
+    "Machine translation with neural networks",
+    "今天天气很好，适合出去散步",
+]
+
+
+def _documents(texts):
+    return [{"content": text} for text in texts]
+
+
+def reference_bm25(texts, query, k1=1.2, b=0.75):
+    """逐文档计算的 BM25 参考实现"""
+    docs = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_length = sum(lengths) / len(docs)
+    scores = np.zeros(len(docs))
+    for term in set(tokenize(query)):
+        df = sum(1 for doc in docs if term in doc)
+        if df == 0:
+            continue
+        idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, doc in enumerate(docs):
+            tf = doc.get(term, 0)
+            if tf:
+                norm = k1 * (1.0 - b + b * lengths[i] / avg_length)
+                scores[i] += idf * tf * (k1 + 1.0) / (tf + norm)
+    return scores
+
+
+def assert_matches_reference(index, texts, query, limit=len(CORPUS)):
+    rows, scores = index.search(query, limit)
+    expected = reference_bm25(texts, query)
+    hit = np.flatnonzero(expected > 0)
+    assert sorted(rows.tolist()) == sorted(hit[np.argsort(-expected[hit], kind="stable")][:limit].tolist())
+    assert np.allclose(scores, expected[rows], rtol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_tokenize_mixed_text():
+    assert tokenize("机器学习 Machine-Learning_v2 2024") == [
+        "机", "器", "学", "习", "机器", "器学", "学习", "machine", "learning", "v2", "2024"
+    ]
+    assert tokenize("") == []
+
+
+def test_scores_match_reference_on_cjk_and_latin():
+    index = BM25Index()
+    index.add(_documents(CORPUS))
+
+    for query in ("机器学习", "machine learning", "Python 学习", "神经网络 neural", "天气"):
+        assert_matches_reference(index, CORPUS, query)
+
+
+def test_ranking_prefers_exact_terms():
+    index = BM25Index()
+    index.add(_documents(CORPUS))
+
+    rows, _ = index.search("机器翻译", 3)
+    assert rows[0] == 4
+    rows, _ = index.search("quick fox", 3)
+    assert rows.tolist() == [3]
+    assert len(index.search("火星 zzz", 3)[0]) == 0
+
+
+def test_incremental_add_and_delete_match_rebuild():
+    index = BM25Index()
+    index.add(_documents(CORPUS[:3]))
+    index.search("学习", 3)  # 先构建倒排表，之后的新增走未索引记录
+    for text in CORPUS[3:]:
+        index.add(_documents([text]))
+    assert_matches_reference(index, CORPUS, "学习 machine")
+
+    index.delete([0, 5])
+    remaining = [text for i, text in enumerate(CORPUS) if i not in (0, 5)]
+    rebuilt = BM25Index()
+    rebuilt.reset(_documents(remaining))
+    for query in ("学习", "python", "机器翻译 neural"):
+        assert_matches_reference(index, remaining, query)
+        rows, scores = index.search(query, 5)
+        expected_rows, expected_scores = rebuilt.search(query, 5)
+        assert rows.tolist() == expected_rows.tolist()
+        assert np.allclose(scores, expected_scores)
+
+
+def test_rows_filter_and_persistence(tmp_path):
+    index = BM25Index()
+    index.add(_documents(CORPUS))
+
+    rows, _ = index.search("学习", 10, rows=np.array([1, 5]))
+    assert sorted(rows.tolist()) == [1, 5]
+
+    index.save(str(tmp_path / "bm25"))
+    loaded = BM25Index()
+    assert loaded.load(str(tmp_path / "bm25"), len(CORPUS))
+    assert not BM25Index().load(str(tmp_path / "bm25"), len(CORPUS) + 1)
+    assert loaded.search("机器学习", 5)[0].tolist() == index.search("机器学习", 5)[0].tolist()
+
+
+def test_store_keyword_search(tmp_path):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=32, offload=False)
+    asyncio.run(store.add_documents(_documents(CORPUS)))
+
+    results = asyncio.run(store.keyword_search("brown fox", limit=3))
+    assert [doc["content"] for doc in results] == [CORPUS[3]]
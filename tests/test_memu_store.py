@@ -0,0 +1,53 @@
+"""
+MemuVectorStore：内存映射快照上的删除只写日志，到合并阈值才重写快照
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from ame.vector_store.memu_store import MemuVectorStore
+
+
+def _documents(count, start=0):
+    return [{"content": f"文档{i} topic{i} 内容", "metadata": {}} for i in range(start, start + count)]
+
+
+@pytest.mark.parametrize("options", [{"use_mmap": True}, {"quantization": "int8"}])
+def test_delete_on_mapped_snapshot_does_not_compact(tmp_path, options):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=32, offload=False, **options)
+    asyncio.run(store.add_documents(_documents(20)))
+    store._save_data()
+    generation = store._storage.generation
+    assert isinstance(store._embeddings.base, np.memmap)
+
+    deleted = [doc["id"] for doc in store.documents[3:6]]
+    assert asyncio.run(store.delete_documents(deleted))
+    assert store._storage.generation == generation
+    assert len(store.documents) == 17
+
+    results = asyncio.run(store.search("文档4 topic4", limit=20))
+    assert all(result["id"] not in deleted for result in results)
+
+    reopened = MemuVectorStore(db_path=str(tmp_path), embedding_dim=32, offload=False, **options)
+    assert [doc["id"] for doc in reopened.documents] == [doc["id"] for doc in store.documents]
+    np.testing.assert_allclose(reopened.embeddings, store.embeddings)
+
+
+def test_deletes_compact_at_threshold(tmp_path):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=16, use_mmap=True, offload=False)
+    asyncio.run(store.add_documents(_documents(10)))
+    store._save_data()
+    store._storage.compact_min_ops = 3
+    store._storage.compact_ratio = 0.0
+    generation = store._storage.generation
+
+    for _ in range(3):
+        assert store._storage.generation == generation
+        assert asyncio.run(store.delete_documents([store.documents[0]["id"]]))
+    assert store._storage.generation == generation + 1
+    assert len(store.documents) == 7
+    # 合并后重新映射新快照
+    assert isinstance(store._embeddings.base, np.memmap)
+    assert len(store._embeddings.tail) == 0
@@ -0,0 +1,104 @@
+"""
+元数据过滤下推：来源 / 上下文 / 时间范围过滤后的检索结果与“先过滤再暴力打分”一致
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ame.vector_store.memu_store import MemuVectorStore
+from ame.vector_store.metadata_index import MetadataColumns
+
+DIM = 32
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def _documents(count):
+    return [
+        {
+            "content": f"文档{i} topic{i % 7} 内容{i % 5}",
+            "source": "abc"[i % 3],
+            "timestamp": (BASE_TIME + timedelta(days=i)).isoformat(),
+            "metadata": {"context": "xy"[i % 2]},
+        }
+        for i in range(count)
+    ]
+
+
+def _brute_force(store, query, keep, limit):
+    """对满足条件的全部文档精确打分"""
+    query_embedding = asyncio.run(store._generate_embeddings([query]))[0]
+    rows = [i for i, doc in enumerate(store.documents) if keep(doc)]
+    scores = store.embeddings[rows] @ query_embedding
+    order = np.argsort(-scores, kind="stable")[:limit]
+    return [store.documents[rows[i]]["id"] for i in order]
+
+
+def _day(i):
+    return (BASE_TIME + timedelta(days=i)).isoformat()
+
+
+FILTERS = [
+    ({"filter_by_source": ["a"]}, lambda doc: doc["source"] == "a"),
+    ({"filter": {"source": "b", "context": "x"}}, lambda doc: doc["source"] == "b" and doc["metadata"]["context"] == "x"),
+    ({"filter_context": "y"}, lambda doc: doc["metadata"]["context"] == "y"),
+    (
+        {"time_filter": {"start": _day(10), "end": _day(40)}},
+        lambda doc: _day(10) <= doc["timestamp"] <= _day(40),
+    ),
+    (
+        {"filter": {"source": ["a", "c"], "start": _day(50)}},
+        lambda doc: doc["source"] in ("a", "c") and doc["timestamp"] >= _day(50),
+    ),
+]
+
+
+@pytest.mark.parametrize("index", ["flat", "ivf"])
+@pytest.mark.parametrize("options, keep", FILTERS)
+def test_filtered_search_matches_brute_force(tmp_path, index, options, keep):
+    store = MemuVectorStore(
+        db_path=str(tmp_path), embedding_dim=DIM, offload=False,
+        index=index, index_params={"min_train_size": 16} if index == "ivf" else None
+    )
+    asyncio.run(store.add_documents(_documents(90)))
+
+    results = asyncio.run(store.search("topic3 内容2", limit=8, **options))
+
+    assert [doc["id"] for doc in results] == _brute_force(store, "topic3 内容2", keep, 8)
+    assert all(keep(doc) for doc in results)
+
+
+def test_filters_follow_deletes(tmp_path):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=DIM, offload=False)
+    asyncio.run(store.add_documents(_documents(30)))
+    deleted = [doc["id"] for doc in store.documents if doc["source"] == "a"][:5]
+    asyncio.run(store.delete_documents(deleted))
+
+    keep = lambda doc: doc["source"] == "a"
+    results = asyncio.run(store.search("topic1", limit=20, filter_by_source=["a"]))
+
+    assert [doc["id"] for doc in results] == _brute_force(store, "topic1", keep, 20)
+    assert not set(deleted) & {doc["id"] for doc in results}
+
+
+def test_unmatched_filter_returns_nothing(tmp_path):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=DIM, offload=False)
+    asyncio.run(store.add_documents(_documents(10)))
+    assert asyncio.run(store.search("topic1", filter_by_source=["missing"])) == []
+    assert asyncio.run(store.search("topic1", time_filter={"start": _day(100)})) == []
+
+
+def test_metadata_columns_select():
+    columns = MetadataColumns()
+    columns.extend(_documents(12))
+
+    assert columns.select() is None
+    assert columns.select(sources=["a"]).tolist() == [0, 3, 6, 9]
+    assert columns.select(sources=["a"], contexts=["y"]).tolist() == [3, 9]
+    assert columns.select(start=_day(2), end=_day(5)).tolist() == [2, 3, 4, 5]
+
+    columns.delete([0, 3])
+    assert columns.select(sources=["a"]).tolist() == [4, 7]
+    assert columns.source_counts() == {"a": 2, "b": 4, "c": 4}
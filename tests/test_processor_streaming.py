@@ -0,0 +1,108 @@
+"""
+DataProcessor 流式解析：JSON 数组增量解析、段落切分与 GBK 回退
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+from ame.data_processor import processor as processor_module
+from ame.data_processor.chunker import TextChunker
+from ame.data_processor.processor import DataProcessor
+
+
+def _parse_array(text, monkeypatch, read_size):
+    monkeypatch.setattr(processor_module, "READ_CHUNK_SIZE", read_size)
+    return list(DataProcessor()._iter_json_array(io.StringIO(text)))
+
+
+ITEMS = [
+    {"content": "你好, [世界]", "sender": "a", "timestamp": "2024-01-01T00:00:00"},
+    {"content": "quote \" and \\ backslash", "nested": {"list": [1, 2.5, -3e2, True, None]}},
+    12345,
+    -0.125,
+    6.02e23,
+    "]",
+    [],
+    {},
+]
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_json_array_matches_json_load(monkeypatch, read_size):
+    for text in (json.dumps(ITEMS, ensure_ascii=False), json.dumps(ITEMS, indent=2), " \n[ ]\n", "[]"):
+        assert _parse_array(text, monkeypatch, read_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 4, 5])
+def test_numbers_split_across_reads_are_not_truncated(monkeypatch, read_size):
+    numbers = [1.5, 12e3, -0.25, 10, 3.14159, 1e-7]
+    text = "[" + ", ".join(repr(n) for n in numbers) + "]"
+    assert _parse_array(text, monkeypatch, read_size) == numbers
+
+
+def test_top_level_object_yields_nothing(monkeypatch):
+    assert _parse_array('{"content": "x"}', monkeypatch, 4) == []
+    assert _parse_array("", monkeypatch, 4) == []
+
+
+@pytest.mark.parametrize("text", ["[1 2]", "[1, 2", "[{\"a\": 1}", "[1,,2]", "[tru]"])
+@pytest.mark.parametrize("read_size", [1, 3, 1 << 16])
+def test_malformed_json_raises(monkeypatch, text, read_size):
+    with pytest.raises(json.JSONDecodeError):
+        _parse_array(text, monkeypatch, read_size)
+
+
+def test_json_file_streams_messages(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor_module, "READ_CHUNK_SIZE", 5)
+    messages = [
+        {"content": f"第{i}条消息，内容足够长", "sender": f"user{i % 2}", "timestamp": f"2024-01-0{i + 1}T00:00:00"}
+        for i in range(5)
+    ] + [{"content": ""}, {"sender": "no content"}]
+    path = tmp_path / "chat.json"
+    path.write_text(json.dumps(messages, ensure_ascii=False), encoding="utf-8")
+
+    docs = asyncio.run(DataProcessor().process_file(str(path)))
+    assert [doc["source"] for doc in docs] == [f"{path}:user{i % 2}" for i in range(5)]
+    assert [doc["timestamp"] for doc in docs] == [m["timestamp"] for m in messages[:5]]
+
+
+def test_text_paragraphs_match_split_into_paragraphs(tmp_path):
+    text = "第一段第一行\n第一段第二行\n\n  \n短\n\nSecond paragraph with words.\n\n\n第三段内容足够长的文字\n"
+    path = tmp_path / "notes.txt"
+    path.write_text(text, encoding="utf-8")
+
+    processor = DataProcessor()
+    docs = asyncio.run(processor.process_file(str(path)))
+    expected = [processor._clean_text(p) for p in processor._split_into_paragraphs(text) if len(p) > 10]
+    assert [doc["content"] for doc in docs] == expected
+
+
+def test_unsupported_extension_raises(tmp_path):
+    path = tmp_path / "slides.pdf"
+    path.write_bytes(b"%PDF")
+    with pytest.raises(ValueError):
+        asyncio.run(DataProcessor().process_file(str(path)))
+
+
+@pytest.mark.parametrize("chunker", [None, TextChunker(chunk_size=20, chunk_overlap=0)])
+def test_gbk_fallback_restarts_without_duplicates(tmp_path, monkeypatch, chunker):
+    # ASCII 开头的段落会先按 UTF-8 产出，之后遇到 GBK 字节才回退
+    monkeypatch.setattr("ame.data_processor.chunker.BLOCK_CHARS", 64)
+    paragraphs = [f"ascii paragraph number {i} with enough text" for i in range(400)]
+    paragraphs += [f"第{i}段中文内容，使用 GBK 编码保存" for i in range(5)]
+    text = "\n\n".join(paragraphs)
+    path = tmp_path / "legacy.txt"
+    path.write_bytes(text.encode("gbk"))
+    reference = tmp_path / "reference.txt"
+    reference.write_text(text, encoding="utf-8")
+
+    processor = DataProcessor(chunker=chunker)
+    docs = asyncio.run(processor.process_file(str(path)))
+    expected = asyncio.run(processor.process_file(str(reference)))
+    assert [doc["content"] for doc in docs] == [doc["content"] for doc in expected]
+    if chunker is not None:
+        assert [doc["metadata"]["chunk_index"] for doc in docs] == list(range(len(docs)))
+    assert any("中文内容" in doc["content"] for doc in docs)
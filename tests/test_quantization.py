@@ -0,0 +1,111 @@
+"""
+标量量化：float16 / int8 编码误差、量化粗排 + 全精度重排的召回率与重排后的精确分数
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from ame.vector_store.embedding_buffer import EmbeddingBuffer
+from ame.vector_store.memu_store import MemuVectorStore
+from ame.vector_store.quantization import QuantizedMatrix, create_quantizer
+from ame.vector_store.topk import streaming_top_k_batch, top_k
+
+DIM = 64
+K = 10
+
+
+def _normalized(n, seed=0):
+    x = np.random.default_rng(seed).normal(size=(n, DIM))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _buffer(x):
+    buffer = EmbeddingBuffer(DIM)
+    buffer.append(x)
+    return buffer
+
+
+@pytest.mark.parametrize("kind, tolerance", [("float16", 1e-3), ("int8", 1e-2)])
+def test_encode_decode_error(kind, tolerance):
+    x = _normalized(500)
+    matrix = QuantizedMatrix(DIM, kind)
+    matrix.reset(_buffer(x), block_size=128)
+
+    decoded = matrix.decode(matrix.codes.to_array())
+    assert np.abs(decoded - x).max() < tolerance
+
+    # 近似分数与解码后的内积一致
+    queries = _normalized(3, seed=1)
+    scores = np.concatenate([block for _, block in matrix.score_blocks(queries, 128)], axis=1)
+    assert np.allclose(scores, queries @ decoded.T, atol=1e-4)
+
+
+@pytest.mark.parametrize("kind", ["float16", "int8"])
+def test_rescored_recall_against_exact(kind):
+    x = _normalized(5000)
+    queries = _normalized(20, seed=1)
+    matrix = QuantizedMatrix(DIM, kind)
+    matrix.reset(_buffer(x))
+
+    candidates, _ = streaming_top_k_batch(matrix.score_blocks(queries, 1024), len(queries), K * 4)
+    hits = 0
+    for rows, query in zip(candidates, queries):
+        order, _ = top_k(x[rows] @ query, K)
+        exact, _ = top_k(x @ query, K)
+        hits += len(set(rows[order].tolist()) & set(exact.tolist()))
+    assert hits / (K * len(queries)) >= 0.98
+
+
+def test_appended_rows_use_existing_parameters():
+    x = _normalized(200)
+    matrix = QuantizedMatrix(DIM, "int8")
+    matrix.reset(_buffer(x[:100]))
+    scale = matrix.scale.copy()
+
+    matrix.append(x[100:])
+    matrix.delete([0, 1])
+
+    assert len(matrix) == 198
+    assert np.array_equal(matrix.scale, scale)
+    # 超出拟合范围的值截断到边界
+    low = matrix.offset - 128 * matrix.scale
+    high = matrix.offset + 127 * matrix.scale
+    expected = np.clip(x[2:], low, high)
+    assert np.abs(matrix.decode(matrix.codes.to_array()) - expected).max() <= matrix.scale.max()
+
+
+def test_create_quantizer():
+    assert create_quantizer("none", DIM) is None
+    assert create_quantizer("INT8", DIM).kind == "int8"
+    with pytest.raises(ValueError):
+        create_quantizer("int4", DIM)
+
+
+@pytest.mark.parametrize("kind", ["float16", "int8"])
+def test_quantized_store_matches_full_precision(tmp_path, kind):
+    documents = [{"content": f"文档{i} topic{i % 13} 内容{i % 7}", "metadata": {}} for i in range(300)]
+    exact = MemuVectorStore(db_path=str(tmp_path / "exact"), embedding_dim=DIM, offload=False)
+    quantized = MemuVectorStore(
+        db_path=str(tmp_path / kind), embedding_dim=DIM, offload=False, quantization=kind
+    )
+    asyncio.run(exact.add_documents(documents))
+    asyncio.run(quantized.add_documents(documents))
+    quantized._save_data()
+
+    reopened = MemuVectorStore(
+        db_path=str(tmp_path / kind), embedding_dim=DIM, offload=False, quantization=kind
+    )
+    for store in (quantized, reopened):
+        for query in ("topic3 内容1", "文档42", "topic12"):
+            expected = asyncio.run(exact.search(query, limit=K, include_similarity=True))
+            results = asyncio.run(store.search(query, limit=K, include_similarity=True))
+
+            assert [doc["content"] for doc in results] == [doc["content"] for doc in expected]
+            # 重排后的分数来自全精度向量
+            assert np.allclose(
+                [doc["similarity"] for doc in results],
+                [doc["similarity"] for doc in expected],
+                atol=1e-5
+            )
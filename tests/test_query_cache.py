@@ -0,0 +1,29 @@
+"""
+QueryCache：命中、写入代数失效与结果隔离
+"""
+
+from ame.rag.query_cache import QueryCache
+
+
+def test_hit_and_generation_invalidation():
+    cache = QueryCache(max_entries=4)
+    key = QueryCache.make_key("  hello   world ", 5, None, generation=1)
+    cache.put(key, [{"content": "a", "metadata": {"source": "x"}}])
+
+    assert cache.get(QueryCache.make_key("hello world", 5, None, generation=1))[0]["content"] == "a"
+    assert cache.get(QueryCache.make_key("hello world", 5, None, generation=2)) is None
+
+
+def test_cached_results_are_isolated_from_callers():
+    cache = QueryCache(max_entries=4)
+    key = QueryCache.make_key("q", 5, None, generation=1)
+    results = [{"content": "a", "metadata": {"tags": ["x"]}}]
+    cache.put(key, results)
+    # 写入后修改原结果
+    results[0]["metadata"]["tags"].append("put")
+
+    hit = cache.get(key)
+    hit[0]["metadata"]["annotated"] = True
+    hit[0]["metadata"]["tags"].append("get")
+
+    assert cache.get(key) == [{"content": "a", "metadata": {"tags": ["x"]}}]
@@ -0,0 +1,216 @@
+"""
+RateLimiter：在途上限、token 预算、上游退避，以及流式请求在整个流期间占用名额
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ame.llm_caller.caller import LLMCaller
+from ame.llm_caller.rate_limiter import RateLimiter, backoff_delay, is_rate_limited, retry_after_seconds
+
+
+def test_concurrency_cap():
+    limiter = RateLimiter(max_concurrency=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.get_stats()["in_flight"])
+            await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(main())
+    stats = limiter.get_stats()
+    assert peak == 2
+    assert stats["in_flight"] == 0
+    assert stats["admitted"] == 6
+    assert stats["queued"] >= 4
+
+
+def test_token_budget_waits_and_is_corrected_by_actual_usage():
+    # 每秒补充 100 token
+    limiter = RateLimiter(max_concurrency=0, tokens_per_minute=6000)
+
+    async def main():
+        async with limiter.acquire(6000) as permit:
+            permit.tokens = 5900  # 实际用量少于预估，退还 100
+        start = time.monotonic()
+        async with limiter.acquire(150):
+            pass
+        return time.monotonic() - start
+
+    waited = asyncio.run(main())
+    # 退还 100 后只差约 50 token，约 0.5 秒
+    assert 0.3 < waited < 1.0
+
+
+def test_defer_pauses_admissions():
+    limiter = RateLimiter(max_concurrency=4)
+
+    async def main():
+        limiter.defer(0.2)
+        start = time.monotonic()
+        async with limiter.acquire():
+            pass
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.2
+    assert limiter.get_stats()["throttled"] == 1
+
+
+def test_release_is_idempotent():
+    limiter = RateLimiter(max_concurrency=1)
+
+    async def main():
+        permit = await limiter.admit()
+        limiter.release(permit)
+        limiter.release(permit)
+        async with limiter.acquire():
+            return limiter.get_stats()["in_flight"]
+
+    assert asyncio.run(main()) == 1
+    assert limiter.get_stats()["in_flight"] == 0
+
+
+def test_error_helpers():
+    error = SimpleNamespace(status_code=429, response=SimpleNamespace(headers={"retry-after": "3"}))
+    assert is_rate_limited(error)
+    assert retry_after_seconds(error) == 3.0
+    assert retry_after_seconds(SimpleNamespace(response=SimpleNamespace(headers={"retry-after-ms": "250"}))) == 0.25
+    assert retry_after_seconds(ValueError()) is None
+    assert not is_rate_limited(ValueError())
+    assert all(0 <= backoff_delay(attempt) <= 0.5 * 2 ** attempt for attempt in range(5))
+
+
+class FakeStream:
+    """逐个产出片段的上游流，release 事件置位前停在最后一个片段之前"""
+
+    def __init__(self, parts, release):
+        self._parts = list(parts)
+        self._release = release
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._parts:
+            raise StopAsyncIteration
+        if len(self._parts) == 1:
+            await self._release.wait()
+        content = self._parts.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+
+    async def close(self):
+        self.closed = True
+
+
+def make_caller(limiter, streams):
+    caller = LLMCaller(api_key="test", cache_enabled=False, coalesce_requests=False, rate_limiter=limiter)
+
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return streams.pop(0)
+
+    caller.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return caller
+
+
+def test_stream_holds_permit_until_exhausted():
+    limiter = RateLimiter(max_concurrency=1, tokens_per_minute=100000)
+
+    async def main():
+        release = asyncio.Event()
+        streams = [FakeStream(["你好", "世界"], release), FakeStream(["第二个"], release)]
+        caller = make_caller(limiter, streams)
+        first = (await caller.generate([{"role": "user", "content": "hi"}], stream=True))["stream"]
+
+        # 第一个流未读完时第二个流式请求不能准入
+        second = asyncio.create_task(caller.generate([{"role": "user", "content": "hi"}], stream=True))
+        await asyncio.sleep(0.05)
+        assert limiter.get_stats()["in_flight"] == 1
+        assert not second.done()
+
+        release.set()
+        parts = [chunk.choices[0].delta.content async for chunk in first]
+        assert parts == ["你好", "世界"]
+        second_stream = (await asyncio.wait_for(second, 1))["stream"]
+        await second_stream.aclose()
+        return first
+
+    first = asyncio.run(main())
+    stats = limiter.get_stats()
+    assert stats["in_flight"] == 0
+    assert stats["admitted"] == 2
+    # 按已输出内容而非 max_tokens 预估计费，预算几乎全部退还
+    assert stats["tokens_available"] > 100000 - 50
+
+
+def test_closed_or_abandoned_stream_releases_permit():
+    limiter = RateLimiter(max_concurrency=1)
+
+    async def main():
+        release = asyncio.Event()
+        upstream = FakeStream(["a", "b"], release)
+        caller = make_caller(limiter, [upstream, FakeStream(["c"], release)])
+        stream = (await caller.generate([{"role": "user", "content": "hi"}], stream=True))["stream"]
+        await stream.__anext__()
+        await stream.aclose()
+        assert upstream.closed
+        assert limiter.get_stats()["in_flight"] == 0
+
+        # 未读也未关闭即被丢弃的流
+        abandoned = (await caller.generate([{"role": "user", "content": "hi"}], stream=True))["stream"]
+        assert limiter.get_stats()["in_flight"] == 1
+        del abandoned
+
+    asyncio.run(main())
+    assert limiter.get_stats()["in_flight"] == 0
+
+
+def test_generate_stream_yields_text_and_releases():
+    limiter = RateLimiter(max_concurrency=1)
+
+    async def main():
+        release = asyncio.Event()
+        release.set()
+        caller = make_caller(limiter, [FakeStream(["流", "式"], release)])
+        return [part async for part in caller.generate_stream([{"role": "user", "content": "hi"}])]
+
+    assert asyncio.run(main()) == ["流", "式"]
+    assert limiter.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"max_concurrency": 0}, {"requests_per_minute": 0, "tokens_per_minute": 0}])
+def test_unlimited_admits_immediately(kwargs):
+    limiter = RateLimiter(**kwargs)
+
+    async def main():
+        async with limiter.acquire(10 ** 9) as permit:
+            return permit.waited
+
+    assert asyncio.run(main()) < 0.05
+
+
+def test_partial_configure_keeps_other_limits(monkeypatch):
+    from ame.llm_caller import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "_limiter", None)
+    shared = rate_limiter.get_rate_limiter(max_concurrency=2, requests_per_minute=60, tokens_per_minute=1000)
+    assert rate_limiter.get_rate_limiter(max_concurrency=4) is shared
+
+    stats = shared.get_stats()
+    assert shared.max_concurrency == 4
+    assert shared._requests.capacity == 60
+    assert shared._tokens.capacity == 1000
+    assert stats["tokens_available"] == 1000
+
+    # 不传参数时不修改限额
+    assert rate_limiter.get_rate_limiter() is shared
+    assert shared.max_concurrency == 4
@@ -0,0 +1,91 @@
+"""
+MMR 多样性重排：与逐轮重新计算的参考实现一致，重复文档被后移；向量 / 词项两种相似度
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from ame.retrieval.base import RetrievalResult
+from ame.retrieval.reranker import (
+    Reranker,
+    embedding_similarity,
+    jaccard_similarity,
+    maximal_marginal_relevance,
+)
+from ame.vector_store.features import DocumentFeatures
+
+
+def reference_mmr(relevance, similarity, k, lambda_param):
+    """每轮对剩余文档重新计算与已选文档的最大相似度（第一个总是最相关的文档）"""
+    selected = [int(np.argmax(relevance))]
+    remaining = [i for i in range(len(relevance)) if i not in selected]
+    while remaining and len(selected) < k:
+        def score(i):
+            max_sim = max(similarity[i][j] for j in selected)
+            return lambda_param * relevance[i] - (1 - lambda_param) * max_sim
+        best = max(remaining, key=lambda i: (score(i), -i))
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+@pytest.mark.parametrize("lambda_param", [0.0, 0.3, 0.7, 1.0])
+def test_mmr_matches_reference(lambda_param):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(30, 8))
+    similarity = embedding_similarity(embeddings)
+    relevance = rng.random(30)
+
+    for k in (1, 5, 30):
+        assert maximal_marginal_relevance(relevance, similarity, k, lambda_param) == \
+            reference_mmr(relevance, similarity, k, lambda_param)
+
+
+def test_mmr_edge_cases():
+    similarity = np.eye(3)
+    assert maximal_marginal_relevance(np.array([0.1, 0.9, 0.5]), similarity, None, 1.0) == [1, 2, 0]
+    assert maximal_marginal_relevance(np.array([0.1, 0.9]), np.eye(2), 0) == []
+    assert maximal_marginal_relevance(np.array([0.1, 0.9]), np.eye(2), 10) == [1, 0]
+
+
+def test_similarity_matrices():
+    embeddings = np.array([[1.0, 0.0], [2.0, 0.0], [0.0, 3.0]])
+    assert np.allclose(embedding_similarity(embeddings), [[1, 1, 0], [1, 1, 0], [0, 0, 1]])
+
+    texts = ["机器学习", "深度学习", "天气", ""]
+    features = [DocumentFeatures.from_text(text) for text in texts]
+    matrix = jaccard_similarity([f.token_ids for f in features])
+    for i, a in enumerate(features):
+        for j, b in enumerate(features):
+            assert matrix[i, j] == pytest.approx(a.jaccard(b) if i != j or len(a.token_ids) else 0.0)
+
+
+def _result(content, score, embedding=None):
+    return RetrievalResult(content=content, metadata={}, score=score, embedding=embedding)
+
+
+def test_diversity_rerank_demotes_duplicates():
+    results = [
+        _result("机器学习入门教程", 0.95),
+        _result("机器学习入门教程", 0.94),
+        _result("今天天气很好", 0.80),
+        _result("深度学习与神经网络", 0.85),
+    ]
+    reranked = asyncio.run(Reranker("diversity", lambda_param=0.5).rerank("学习", results, top_k=3))
+
+    assert reranked[0] is results[0]
+    assert results[1] not in reranked
+
+
+def test_diversity_rerank_prefers_embeddings():
+    # 文本完全相同，但向量正交：按向量相似度不应视为重复
+    results = [
+        _result("同样的文本", 0.9, np.array([1.0, 0.0])),
+        _result("同样的文本", 0.8, np.array([0.0, 1.0])),
+        _result("其他内容", 0.7, np.array([0.99, 0.1])),
+    ]
+    reranked = asyncio.run(Reranker("diversity", lambda_param=0.5).rerank("q", results))
+    assert reranked == [results[0], results[1], results[2]]
+    assert [r.score for r in reranked] == [0.9, 0.8, 0.7]
@@ -0,0 +1,115 @@
+"""
+LLM 响应缓存（memory / sqlite）：LRU 按条目数与字节数淘汰、TTL 过期、命中统计
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ame.llm_caller import cache as cache_module
+from ame.llm_caller.cache import create_response_cache
+
+
+class FakeClock:
+    """每次读取前进 1 秒，保证访问时间有先后"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1.0
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        path = str(tmp_path / "responses.db") if request.param == "sqlite" else None
+        return create_response_cache(request.param, path=path, **kwargs)
+    return make
+
+
+def response(text, tokens=10):
+    return {"content": text, "usage": {"total_tokens": tokens}}
+
+
+def size_of(value):
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def test_lru_evicts_least_recently_used(clock, make_cache):
+    cache = make_cache(max_entries=2, max_bytes=0)
+    cache.put("a", response("A"))
+    cache.put("b", response("B"))
+    assert cache.get("a") == response("A")
+    cache.put("c", response("C"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == response("A")
+    assert cache.get("c") == response("C")
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+
+
+def test_byte_limit_evicts_until_under_budget(clock, make_cache):
+    item = response("数据" * 20)
+    cache = make_cache(max_entries=0, max_bytes=size_of(item) * 2 + 1)
+    for key in ("a", "b", "c"):
+        cache.put(key, item)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == item and cache.get("c") == item
+    assert cache.get_stats()["bytes"] == size_of(item) * 2
+
+    # 单条超过预算时自身也被淘汰
+    cache.put("big", response("x" * 1000))
+    assert cache.get("big") is None
+
+
+def test_ttl_expires_entries(clock, make_cache):
+    cache = make_cache(ttl_seconds=5)
+    cache.put("a", response("A"))
+    assert cache.get("a") == response("A")
+
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_overwrite_and_stats(clock, make_cache):
+    cache = make_cache()
+    cache.put("a", response("A", tokens=7))
+    cache.put("a", response("A2", tokens=3))
+    assert cache.get("a") == response("A2", tokens=3)
+    assert cache.get("missing") is None
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] == size_of(response("A2", tokens=3))
+    assert (stats["hits"], stats["misses"], stats["tokens_saved"]) == (1, 1, 3)
+    assert stats["bytes_saved"] == size_of(response("A2", tokens=3))
+    assert stats["hit_ratio"] == 0.5
+
+    cache.clear()
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_sqlite_cache_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "responses.db")
+    create_response_cache("sqlite", path=path).put("a", response("A"))
+    assert create_response_cache("sqlite", path=path).get("a") == response("A")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_response_cache("redis")
+    with pytest.raises(ValueError):
+        create_response_cache("sqlite")
@@ -0,0 +1,83 @@
+"""
+检索器：批量检索与逐个检索一致，只在需要时取回文档向量与预计算特征
+"""
+
+import asyncio
+
+import pytest
+
+from ame.retrieval.factory import RetrieverFactory
+from ame.vector_store.memu_store import MemuVectorStore
+
+QUERIES = ["北京 天气", "python install", "项目 进度 报告"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MemuVectorStore(db_path=str(tmp_path), embedding_dim=64, offload=False)
+    documents = [
+        {"content": "北京今天的天气晴朗", "timestamp": "2024-05-01T00:00:00", "metadata": {}},
+        {"content": "How to install python packages", "timestamp": "2024-04-01T00:00:00", "metadata": {}},
+        {"content": "项目进度报告：第一阶段完成", "timestamp": "2024-03-01T00:00:00", "metadata": {}},
+        {"content": "上海明天有雨", "timestamp": "2024-02-01T00:00:00", "metadata": {}},
+        {"content": "python virtual environments", "metadata": {}},
+    ]
+    asyncio.run(store.add_documents(documents))
+    return store
+
+
+def _contents(results):
+    return [[(result.content, round(result.score, 6)) for result in batch] for batch in results]
+
+
+@pytest.mark.parametrize("retriever_type", ["vector", "keyword", "hybrid"])
+def test_batch_matches_single_queries(store, retriever_type):
+    retriever = RetrieverFactory.create_retriever(retriever_type, vector_store=store)
+
+    async def main():
+        batch = await retriever.retrieve_batch(QUERIES, top_k=3)
+        single = [await retriever.retrieve(query, top_k=3) for query in QUERIES]
+        return batch, single
+
+    batch, single = asyncio.run(main())
+    assert _contents(batch) == _contents(single)
+    assert any(batch)
+
+
+def test_vector_results_skip_embeddings_and_features_by_default(store):
+    retriever = RetrieverFactory.create_retriever("vector", vector_store=store)
+    results = asyncio.run(retriever.retrieve("北京 天气", top_k=3))
+    assert results
+    assert all(result.embedding is None and result.features is None for result in results)
+
+    with_embeddings = RetrieverFactory.create_retriever("vector", vector_store=store, include_embeddings=True)
+    results = asyncio.run(with_embeddings.retrieve("北京 天气", top_k=3))
+    assert all(result.embedding is not None and result.embedding.shape == (64,) for result in results)
+
+
+def test_hybrid_requests_features_only_when_scoring_uses_them(store):
+    requested = []
+    search_batch = store.search_batch
+
+    async def recording_search_batch(queries, **kwargs):
+        requested.append((kwargs["include_features"], kwargs["include_embeddings"]))
+        return await search_batch(queries, **kwargs)
+
+    store.search_batch = recording_search_batch
+
+    # BM25 可用且不计时间分数：不需要特征
+    no_time = RetrieverFactory.create_retriever(
+        "hybrid", vector_store=store, vector_weight=0.7, keyword_weight=0.3, time_weight=0.0
+    )
+    asyncio.run(no_time.retrieve("北京 天气", top_k=3))
+    # 时间分数需要预计算的时间戳
+    with_time = RetrieverFactory.create_retriever("hybrid", vector_store=store)
+    results = asyncio.run(with_time.retrieve("北京 天气", top_k=3))
+    # 没有 BM25 通道时按词重叠率打分，也需要特征
+    overlap = RetrieverFactory.create_retriever(
+        "hybrid", vector_store=store, time_weight=0.0, use_keyword_index=False
+    )
+    asyncio.run(overlap.retrieve("北京 天气", top_k=3, include_embeddings=True))
+
+    assert requested == [(False, False), (True, False), (True, True)]
+    assert results[0].content == "北京今天的天气晴朗"
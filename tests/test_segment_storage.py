@@ -0,0 +1,106 @@
+"""
+SegmentStorage：WAL 重放、崩溃尾部恢复与旧代文件清理
+"""
+
+import os
+
+import numpy as np
+
+from ame.vector_store.segment_storage import SegmentStorage
+
+DIM = 4
+
+
+def make_storage(path) -> SegmentStorage:
+    storage = SegmentStorage(str(path), embedding_dim=DIM, fsync=False)
+    storage.load()
+    return storage
+
+
+def make_docs(*ids):
+    return [{"id": doc_id, "content": f"doc {doc_id}"} for doc_id in ids]
+
+
+def vectors(n, start=0):
+    return np.arange(start, start + n * DIM, dtype=np.float32).reshape(n, DIM)
+
+
+def test_replays_appends_and_deletes(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append(make_docs("a", "b", "c"), vectors(3))
+    storage.delete(["b"])
+    storage.append(make_docs("d"), vectors(1, start=100))
+
+    documents, base, segment = make_storage(tmp_path).load()
+
+    assert [doc["id"] for doc in documents] == ["a", "c", "d"]
+    assert len(base) == 0
+    np.testing.assert_array_equal(segment, np.vstack([vectors(3)[[0, 2]], vectors(1, start=100)]))
+
+
+def test_drops_torn_wal_tail(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append(make_docs("a", "b"), vectors(2))
+    wal_size = os.path.getsize(storage.wal_file)
+    # 崩溃时写了一半的日志行
+    with open(storage.wal_file, "ab") as f:
+        f.write(b'{"op": "add", "row": 2, "doc": {"id": "c"')
+
+    reloaded = SegmentStorage(str(tmp_path), embedding_dim=DIM, fsync=False)
+    documents, _, segment = reloaded.load()
+
+    assert [doc["id"] for doc in documents] == ["a", "b"]
+    assert len(segment) == 2
+    assert os.path.getsize(reloaded.wal_file) == wal_size
+    # 截断后继续追加仍然可读
+    reloaded.append(make_docs("c"), vectors(1, start=50))
+    documents, _, segment = make_storage(tmp_path).load()
+    assert [doc["id"] for doc in documents] == ["a", "b", "c"]
+    np.testing.assert_array_equal(segment[2], vectors(1, start=50)[0])
+
+
+def test_drops_records_without_vectors_and_orphan_vectors(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append(make_docs("a"), vectors(1))
+    # 日志引用了不存在的向量行（向量未落盘）
+    with open(storage.wal_file, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "row": 5, "doc": {"id": "ghost"}}\n')
+    # 没有日志引用的孤立向量与不完整的行
+    with open(storage.vectors_file, "ab") as f:
+        f.write(vectors(1, start=9).tobytes() + b"\x00\x01")
+
+    reloaded = SegmentStorage(str(tmp_path), embedding_dim=DIM, fsync=False)
+    documents, _, segment = reloaded.load()
+
+    assert [doc["id"] for doc in documents] == ["a"]
+    assert len(segment) == 1
+    assert os.path.getsize(reloaded.vectors_file) == DIM * 4
+
+
+def test_compaction_keeps_data_and_unrelated_files(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.append(make_docs("a", "b"), vectors(2))
+    storage.delete(["a"])
+    documents, base, segment = make_storage(tmp_path).load()
+    (tmp_path / "backup-202410.json").write_text("{}")
+    (tmp_path / "notes-000000.txt").write_text("keep")
+    old_wal = storage.wal_file
+
+    def write_ann(prefix):
+        open(prefix + ".bin", "wb").close()
+
+    for _ in range(2):
+        storage.compact(documents, np.vstack([base, segment]), sidecars={"ann": write_ann})
+
+    files = set(os.listdir(tmp_path))
+    assert "backup-202410.json" in files
+    assert "notes-000000.txt" in files
+    assert os.path.basename(old_wal) not in files
+    assert storage.sidecar_path("ann") + ".bin" == str(tmp_path / f"ann-{storage.generation:06d}.bin")
+    assert f"ann-{storage.generation - 1:06d}.bin" not in files
+    assert f"ann-{storage.generation:06d}.bin" in files
+
+    documents, base, segment = make_storage(tmp_path).load()
+    assert [doc["id"] for doc in documents] == ["b"]
+    np.testing.assert_array_equal(base, vectors(2)[[1]])
+    assert len(segment) == 0
@@ -0,0 +1,107 @@
+"""
+SemanticCache：命中阈值、分区、多进程共享 SQLite 文件时的条目 id，以及与请求合并的配合
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from ame.llm_caller.caller import LLMCaller
+from ame.llm_caller.rate_limiter import RateLimiter
+from ame.llm_caller.semantic_cache import SemanticCache
+from ame.vector_store.hash_embedding import HashingEmbedder
+
+
+def ask(text):
+    return [{"role": "system", "content": "你是助手"}, {"role": "user", "content": text}]
+
+
+def store(cache, text, answer):
+    lookup = asyncio.run(cache.lookup(ask(text), "gpt", 0.7))
+    assert lookup.response is None
+    asyncio.run(cache.store(lookup, {"content": answer}))
+
+
+def test_similar_question_hits():
+    cache = SemanticCache(threshold=0.9)
+    store(cache, "今天北京的天气怎么样", "晴")
+
+    assert asyncio.run(cache.lookup(ask("今天北京的天气怎么样？"), "gpt", 0.7)).response == {"content": "晴"}
+    assert asyncio.run(cache.lookup(ask("如何安装 Python"), "gpt", 0.7)).response is None
+    # 温度档位不同的提问不共享分区
+    assert asyncio.run(cache.lookup(ask("今天北京的天气怎么样"), "gpt", 0.2)).response is None
+
+
+def test_writers_sharing_a_file_do_not_overwrite_each_other(tmp_path):
+    path = str(tmp_path / "semantic.db")
+    first = SemanticCache(path=path, threshold=0.99)
+    second = SemanticCache(path=path, threshold=0.99)
+
+    store(first, "第一个进程的问题", "A")
+    store(second, "第二个进程的问题", "B")
+    store(first, "第一个进程的另一个问题", "C")
+
+    reloaded = SemanticCache(path=path, threshold=0.99)
+    assert reloaded.get_stats()["entries"] == 3
+    for text, answer in (("第一个进程的问题", "A"), ("第二个进程的问题", "B"), ("第一个进程的另一个问题", "C")):
+        assert asyncio.run(reloaded.lookup(ask(text), "gpt", 0.7)).response == {"content": answer}
+
+
+def test_eviction_keeps_newest_entries(tmp_path):
+    path = str(tmp_path / "semantic.db")
+    cache = SemanticCache(path=path, threshold=0.99, max_entries=2)
+    for i in range(4):
+        store(cache, f"问题编号 {i} 的内容", str(i))
+
+    reloaded = SemanticCache(path=path, threshold=0.99, max_entries=2)
+    assert reloaded.get_stats()["entries"] == 2
+    assert asyncio.run(reloaded.lookup(ask("问题编号 3 的内容"), "gpt", 0.7)).response == {"content": "3"}
+    assert asyncio.run(reloaded.lookup(ask("问题编号 0 的内容"), "gpt", 0.7)).response is None
+
+
+def test_max_tokens_partitions_entries():
+    cache = SemanticCache(threshold=0.9)
+    lookup = asyncio.run(cache.lookup(ask("写一首关于秋天的诗"), "gpt", 0.7, max_tokens=16))
+    asyncio.run(cache.store(lookup, {"content": "截断的"}))
+
+    assert asyncio.run(cache.lookup(ask("写一首关于秋天的诗"), "gpt", 0.7, max_tokens=16)).response == {"content": "截断的"}
+    assert asyncio.run(cache.lookup(ask("写一首关于秋天的诗"), "gpt", 0.7, max_tokens=1024)).response is None
+    assert asyncio.run(cache.lookup(ask("写一首关于秋天的诗"), "gpt", 0.7)).response is None
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(512)
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return super().embed(texts)
+
+
+def test_concurrent_identical_calls_embed_once():
+    embedder = CountingEmbedder()
+    upstream_calls = 0
+
+    async def create(**kwargs):
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(0.02)
+        usage = SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+        message = SimpleNamespace(content="答案")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], model="gpt", usage=usage)
+
+    caller = LLMCaller(
+        api_key="test", semantic_cache=SemanticCache(embedder=embedder, threshold=0.9),
+        rate_limiter=RateLimiter()
+    )
+    caller.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def main():
+        return await asyncio.gather(*(caller.generate(ask("同一个问题")) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert [result["content"] for result in results] == ["答案"] * 5
+    assert embedder.calls == 1
+    assert upstream_calls == 1
+    assert caller.semantic_cache.get_stats()["entries"] == 1
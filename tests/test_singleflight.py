@@ -0,0 +1,145 @@
+"""
+在途请求合并：并发相同请求只调用一次上游、异常与取消的传播、流式扇出与晚加入订阅者的回放
+"""
+
+import asyncio
+
+import pytest
+
+from ame.llm_caller.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream():
+    async def main():
+        flights = SingleFlight()
+        calls = []
+
+        async def upstream(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        results = await asyncio.gather(
+            *(flights.do("a", lambda: upstream(1)) for _ in range(5)),
+            flights.do("b", lambda: upstream(10))
+        )
+        # 完成后再次调用重新请求上游
+        again = await flights.do("a", lambda: upstream(3))
+        return flights, calls, results, again
+
+    flights, calls, results, again = asyncio.run(main())
+    assert results == [2] * 5 + [20]
+    assert calls == [1, 10, 3]
+    assert again == 6
+    stats = flights.get_stats()
+    assert (stats["leaders"], stats["coalesced"], stats["in_flight"]) == (3, 4, 0)
+
+
+def test_errors_reach_every_waiter():
+    async def main():
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        return await asyncio.gather(
+            *(flights.do("k", failing) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def upstream():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("k", upstream))
+        second = asyncio.ensure_future(flights.do("k", upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("done", True)
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_stream_fans_out_and_replays_for_late_subscribers():
+    async def main():
+        flights = SingleFlight()
+        opened = []
+        gate = asyncio.Event()
+
+        async def upstream():
+            opened.append(1)
+            yield "a"
+            yield "b"
+            await gate.wait()
+            yield "c"
+
+        early = asyncio.ensure_future(_collect(flights.stream("k", upstream)))
+        await asyncio.sleep(0.01)
+        late = asyncio.ensure_future(_collect(flights.stream("k", upstream)))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return flights, opened, await early, await late
+
+    flights, opened, early, late = asyncio.run(main())
+    assert opened == [1]
+    assert early == late == ["a", "b", "c"]
+    stats = flights.get_stats()
+    assert (stats["stream_leaders"], stats["stream_coalesced"], stats["streams_in_flight"]) == (1, 1, 0)
+
+
+def test_stream_error_reaches_subscribers():
+    async def main():
+        flights = SingleFlight()
+
+        async def upstream():
+            yield "a"
+            await asyncio.sleep(0.01)
+            raise ValueError("broken stream")
+
+        async def consume():
+            chunks = []
+            with pytest.raises(ValueError):
+                async for chunk in flights.stream("k", upstream):
+                    chunks.append(chunk)
+            return chunks
+
+        return await asyncio.gather(consume(), consume())
+
+    assert asyncio.run(main()) == [["a"], ["a"]]
+
+
+def test_upstream_cancelled_when_all_subscribers_leave():
+    async def main():
+        flights = SingleFlight()
+        closed = asyncio.Event()
+
+        async def upstream():
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+                yield "b"
+            finally:
+                closed.set()
+
+        stream = flights.stream("k", upstream)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        await asyncio.wait_for(closed.wait(), 1)
+        await asyncio.sleep(0)
+        return flights.get_stats()["streams_in_flight"]
+
+    assert asyncio.run(main()) == 0
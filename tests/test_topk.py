@@ -0,0 +1,64 @@
+"""
+Top-k 选择：与稳定 argsort 的结果一致（含分数相同、k 超过 N、分块合并）
+"""
+
+import numpy as np
+import pytest
+
+from ame.vector_store.embedding_buffer import EmbeddingBuffer
+from ame.vector_store.topk import blockwise_top_k, blockwise_top_k_batch, top_k, top_k_batch
+
+
+def argsort_top_k(scores, k):
+    order = np.argsort(-scores, kind="stable")[:k]
+    return order, scores[order]
+
+
+@pytest.mark.parametrize("k", [1, 5, 37, 100, 150])
+def test_top_k_matches_argsort(k):
+    rng = np.random.default_rng(k)
+    # 整数分数制造大量并列，检验并列时下标小的在前
+    scores = rng.integers(0, 20, size=100).astype(np.float32)
+
+    indices, values = top_k(scores, k)
+    expected_indices, expected_values = argsort_top_k(scores, k)
+
+    assert np.array_equal(indices, expected_indices)
+    assert np.array_equal(values, expected_values)
+
+
+def test_top_k_batch_matches_argsort_per_row():
+    rng = np.random.default_rng(0)
+    scores = rng.normal(size=(6, 200)).astype(np.float32)
+
+    indices, values = top_k_batch(scores, 10)
+
+    for row in range(len(scores)):
+        expected_indices, expected_values = argsort_top_k(scores[row], 10)
+        assert np.array_equal(indices[row], expected_indices)
+        assert np.array_equal(values[row], expected_values)
+
+
+def test_top_k_empty():
+    indices, values = top_k(np.empty(0, dtype=np.float32), 5)
+    assert indices.shape == (0,) and values.shape == (0,)
+    indices, values = top_k(np.ones(3, dtype=np.float32), 0)
+    assert indices.shape == (0,)
+
+
+def test_blockwise_top_k_matches_full_scan():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(1000, 16)).astype(np.float32)
+    queries = rng.normal(size=(4, 16)).astype(np.float32)
+    buffer = EmbeddingBuffer(16)
+    buffer.reset(base=matrix[:300], tail=matrix[300:])
+
+    indices, scores = blockwise_top_k_batch(buffer.blocks(128), queries, 20)
+
+    for row, query in enumerate(queries):
+        expected_indices, expected_scores = argsort_top_k(matrix @ query, 20)
+        assert np.array_equal(indices[row], expected_indices)
+        assert np.allclose(scores[row], expected_scores)
+
+    single_indices, _ = blockwise_top_k(buffer.blocks(128), queries[0], 20)
+    assert np.array_equal(single_indices, indices[0])
@@ -0,0 +1,29 @@
+"""
+VectorStoreFactory：memu 存储参数（关键词索引、线程池卸载等）按配置传递
+"""
+
+import pytest
+
+from ame.vector_store.factory import VectorStoreFactory
+
+
+def test_memu_defaults(tmp_path):
+    store = VectorStoreFactory.create("memu", str(tmp_path), embedding_dim=16)
+    assert store.supports_keyword_search
+    assert store.offload
+
+
+def test_memu_options_are_forwarded(tmp_path):
+    store = VectorStoreFactory.create(
+        "memu", str(tmp_path), embedding_dim=16,
+        keyword_index=False, offload=False, quantization="int8", rescore_multiplier=8
+    )
+    assert not store.supports_keyword_search
+    assert not store.offload
+    assert store.quantization == "int8"
+    assert store.rescore_multiplier == 8
+
+
+def test_unknown_store_type(tmp_path):
+    with pytest.raises(ValueError):
+        VectorStoreFactory.create("faiss", str(tmp_path))